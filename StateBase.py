@@ -8,10 +8,14 @@ class StateBase(TypedDict):
     context: dict[str, Any]
     messages: Annotated[list, add_messages]
     memory_context: str
+    memory_watermark: Optional[str]
     entities_pred: List[Tuple[str, int, int, str]]
     serviceability: dict
     follow_up: bool
     remaining_steps: int
     user_id: Optional[str]
     current_intent_tool: str
+    intent_tools: List[str]
     execution_order: str
+    page_cursor: Optional[str]
+    retrieved_tools: dict
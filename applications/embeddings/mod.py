@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from applications.etcd.init_etcd import global_config, EmbeddingConfig
+from applications.metrics.mod import metrics
+
+
+class EmbeddingService:
+    """
+    The one sentence-transformer model of the process.
+
+    Query embeddings go through a small LRU, so a user message embedded by the
+    fast lane is reused by routing, the classifier and RAG in the same turn.
+    Cache misses from concurrent Flask threads are collected for up to
+    batch_window_ms and encoded in a single forward pass.
+    """
+
+    def __init__(self, model_name: str, batch_window_ms: float = 5.0, max_batch_size: int = 32,
+                 cache_size: int = 2048, backend: str = "torch"):
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending: List[Tuple[str, Future]] = []
+        self._pending_cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def _encoder(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    if self.backend == "onnx-int8":
+                        from applications.embeddings.onnx_backend import OnnxInt8Encoder
+                        self._model = OnnxInt8Encoder(self.model_name)
+                    else:
+                        from sentence_transformers import SentenceTransformer
+                        self._model = SentenceTransformer(self.model_name)
+                    print(f"Loaded embedding model {self.model_name} ({self.backend}) "
+                          f"in {time.perf_counter() - start:.1f}s")
+        return self._model
+
+    def load(self) -> "EmbeddingService":
+        """Load the model now instead of on the first query."""
+        self._encoder()
+        return self
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Unit-normalized float32 embeddings, one row per text, in one forward pass."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        start = time.perf_counter()
+        vectors = self._encoder().encode(texts, batch_size=max(len(texts), 1), normalize_embeddings=True)
+        metrics.observe("embedding_forward_ms", (time.perf_counter() - start) * 1000)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embedding of one query; cached, and batched with concurrent misses."""
+        with self._cache_lock:
+            vector = self._cache.get(text)
+            if vector is not None:
+                self._cache.move_to_end(text)
+        if vector is not None:
+            metrics.incr("embedding_cache_hits")
+            return vector
+
+        metrics.incr("embedding_cache_misses")
+        future: Future = Future()
+        with self._pending_cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True)
+                self._worker.start()
+            self._pending.append((text, future))
+            self._pending_cond.notify()
+        return future.result()
+
+    def _batch_loop(self) -> None:
+        while True:
+            with self._pending_cond:
+                while not self._pending:
+                    self._pending_cond.wait()
+                # Collection window: let concurrent requests join this batch
+                deadline = time.monotonic() + self.batch_window
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                self._pending = self._pending[self.max_batch_size:]
+
+            by_text = {}
+            with self._cache_lock:
+                # Requests that queued while an earlier batch encoded the same text
+                for text, _ in batch:
+                    if text in self._cache:
+                        by_text[text] = self._cache[text]
+            texts = [text for text in dict.fromkeys(text for text, _ in batch) if text not in by_text]
+            try:
+                vectors = self.encode(texts) if texts else []
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            if texts:
+                metrics.observe("embedding_batch_size", len(texts))
+            with self._cache_lock:
+                for text, vector in zip(texts, vectors):
+                    vector.setflags(write=False)
+                    by_text[text] = vector
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for text, future in batch:
+                future.set_result(by_text[text])
+
+    def stats(self):
+        with self._cache_lock:
+            cached = len(self._cache)
+        return {"model": self.model_name, "backend": self.backend, "loaded": self._model is not None,
+                "cached_queries": cached, "cache_size": self.cache_size}
+
+
+class ServiceEmbeddings(Embeddings):
+    """LangChain adapter so vector stores (Milvus) share the EmbeddingService."""
+
+    def __init__(self, service: EmbeddingService):
+        self.service = service
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.service.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.service.embed_query(text).tolist()
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_rag_embedding_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def _embedding_config() -> EmbeddingConfig:
+    return global_config.config.embedding if global_config.config else EmbeddingConfig()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """The process-wide EmbeddingService, configured from AppConfig.embedding."""
+    global _embedding_service
+    if _embedding_service is None:
+        with _service_lock:
+            if _embedding_service is None:
+                config = _embedding_config()
+                _embedding_service = EmbeddingService(
+                    config.model_name,
+                    batch_window_ms=config.batch_window_ms,
+                    max_batch_size=config.max_batch_size,
+                    cache_size=config.cache_size,
+                    backend=config.backend
+                )
+    return _embedding_service
+
+
+def get_rag_embedding_service() -> EmbeddingService:
+    """
+    Embeddings for the Milvus RAG collections (AppConfig.embedding.rag_model_name).
+    When that is the routing model and backend, the one service and its query
+    cache are shared; otherwise RAG gets its own, loaded on first use.
+    """
+    global _rag_embedding_service
+    config = _embedding_config()
+    if (config.rag_model_name, config.rag_backend) == (config.model_name, config.backend):
+        return get_embedding_service()
+    if _rag_embedding_service is None:
+        with _service_lock:
+            if _rag_embedding_service is None:
+                _rag_embedding_service = EmbeddingService(
+                    config.rag_model_name,
+                    batch_window_ms=config.batch_window_ms,
+                    max_batch_size=config.max_batch_size,
+                    cache_size=config.cache_size,
+                    backend=config.rag_backend
+                )
+    return _rag_embedding_service
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+ONNX_DIR = os.path.join("models", "onnx")
+
+
+def onnx_model_dir(model_name: str, onnx_dir: str = ONNX_DIR) -> str:
+    return os.path.join(onnx_dir, model_name.replace("/", "__"))
+
+
+def export_quantized(model_name: str, onnx_dir: str = ONNX_DIR) -> str:
+    """
+    Export the sentence-transformer's encoder to ONNX and quantize its weights
+    to int8 (dynamic quantization). Saves the tokenizer and pooling mode next
+    to it so serving needs neither torch nor sentence-transformers.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = onnx_model_dir(model_name, onnx_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "model.fp32.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+
+    start = time.perf_counter()
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = st_model[1].get_config_dict()
+    is_cls = pooling.get("pooling_mode") == "cls" or pooling.get("pooling_mode_cls_token")
+    pooling_mode = "cls" if is_cls else "mean"
+
+    dummy = transformer.tokenizer(["embedding export"], return_tensors="pt")
+    input_names = list(dummy.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Encoder(torch.nn.Module):
+        """Positional inputs in tokenizer order; forward() argument order differs between models."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    encoder = _Encoder(transformer.auto_model).eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            encoder,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            dynamo=False
+        )
+
+    # Large encoders (bge-m3) exceed the 2 GB protobuf limit, so keep weights external
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8, use_external_data_format=True)
+    for name in os.listdir(out_dir):
+        if name.startswith("model.fp32"):
+            os.remove(os.path.join(out_dir, name))
+
+    transformer.tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "encoder.json"), "w") as f:
+        json.dump({"pooling_mode": pooling_mode, "max_seq_length": st_model.max_seq_length,
+                   "pad_token": transformer.tokenizer.pad_token}, f)
+
+    print(f"Exported {model_name} to {int8_path} (int8, {pooling_mode} pooling) "
+          f"in {time.perf_counter() - start:.1f}s")
+    return int8_path
+
+
+class OnnxInt8Encoder:
+    """
+    int8 ONNX Runtime encoder with the same encode() signature the embedding
+    service uses on SentenceTransformer, so it is a drop-in backend.
+    """
+
+    def __init__(self, model_name: str, onnx_dir: str = ONNX_DIR, intra_op_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = onnx_model_dir(model_name, onnx_dir)
+        model_path = os.path.join(model_dir, "model.int8.onnx")
+        if not os.path.exists(model_path):
+            export_quantized(model_name, onnx_dir)
+
+        with open(os.path.join(model_dir, "encoder.json")) as f:
+            encoder_config = json.load(f)
+        self.pooling_mode = encoder_config["pooling_mode"]
+
+        # The standalone tokenizers library keeps transformers (and torch) out of the process
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=encoder_config["max_seq_length"])
+        pad_token = encoder_config["pad_token"]
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token), pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = True) -> np.ndarray:
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[i:i + batch_size])
+            tokens = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {name: tokens[name] for name in self.input_names})[0]
+
+            if self.pooling_mode == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = tokens["attention_mask"][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled.astype(np.float32))
+
+        vectors = np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(vectors):
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+# ============================================
+# ACCURACY CHECK & BENCHMARK
+# ============================================
+
+def tool_description_lines() -> List[str]:
+    from flask_api_service.tool_retriever import example_lines
+    from flask_api_service.tool_setup import TOOL_REGISTRY
+
+    lines = []
+    for entry in TOOL_REGISTRY.values():
+        lines.extend(example_lines(entry["description"]))
+    return lines
+
+
+def _tool_owner() -> List[str]:
+    from flask_api_service.tool_retriever import example_lines
+    from flask_api_service.tool_setup import TOOL_REGISTRY
+
+    owners = []
+    for name, entry in TOOL_REGISTRY.items():
+        owners.extend([name] * len(example_lines(entry["description"])))
+    return owners
+
+
+def check_accuracy(model_name: str, onnx_dir: str = ONNX_DIR) -> Dict[str, Any]:
+    """
+    Cosine agreement between FP32 sentence-transformers and int8 ONNX vectors on
+    the tool-description example lines, plus leave-one-out nearest-tool agreement
+    (the decision the tool retriever actually makes).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    lines = tool_description_lines()
+    owners = np.array(_tool_owner())
+
+    fp32 = np.asarray(SentenceTransformer(model_name, device="cpu").encode(lines, normalize_embeddings=True),
+                      dtype=np.float32)
+    int8 = OnnxInt8Encoder(model_name, onnx_dir).encode(lines)
+    cosine = (fp32 * int8).sum(axis=1)
+
+    def nearest_other_tool(vectors: np.ndarray) -> np.ndarray:
+        sims = vectors @ vectors.T
+        np.fill_diagonal(sims, -np.inf)
+        return owners[sims.argmax(axis=1)]
+
+    return {
+        "model": model_name,
+        "lines": len(lines),
+        "cosine_mean": round(float(cosine.mean()), 5),
+        "cosine_min": round(float(cosine.min()), 5),
+        "cosine_p5": round(float(np.percentile(cosine, 5)), 5),
+        "nearest_tool_agreement": round(float((nearest_other_tool(fp32) == nearest_other_tool(int8)).mean()), 4),
+    }
+
+
+def _rss_mb() -> float:
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def benchmark_backend(backend: str, model_name: str, runs: int = 50, onnx_dir: str = ONNX_DIR) -> Dict[str, Any]:
+    """Load time, RSS and single-query / batch latency for one backend in this process."""
+    lines = tool_description_lines()
+    rss_before = _rss_mb()
+
+    start = time.perf_counter()
+    if backend == "onnx-int8":
+        encoder = OnnxInt8Encoder(model_name, onnx_dir)
+    else:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(model_name, device="cpu")
+    load_s = time.perf_counter() - start
+
+    encoder.encode(lines[:2], normalize_embeddings=True)  # warm up
+    single = []
+    for i in range(runs):
+        t = time.perf_counter()
+        encoder.encode([lines[i % len(lines)]], normalize_embeddings=True)
+        single.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    encoder.encode(lines[:32], batch_size=32, normalize_embeddings=True)
+    batch_ms = (time.perf_counter() - t) * 1000
+
+    return {
+        "backend": backend,
+        "model": model_name,
+        "load_s": round(load_s, 2),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_model_mb": round(_rss_mb() - rss_before, 1),
+        "query_ms_p50": round(float(np.percentile(single, 50)), 2),
+        "query_ms_p95": round(float(np.percentile(single, 95)), 2),
+        "batch32_ms": round(batch_ms, 2),
+    }
+
+
+def benchmark(model_name: str, runs: int = 50, onnx_dir: str = ONNX_DIR) -> List[Dict[str, Any]]:
+    """Benchmark each backend in a fresh interpreter so RSS numbers do not overlap."""
+    results = []
+    for backend in ("torch", "onnx-int8"):
+        out = subprocess.run(
+            [sys.executable, "-m", "applications.embeddings.onnx_backend", "benchmark-one",
+             "--model", model_name, "--backend", backend, "--runs", str(runs), "--onnx-dir", onnx_dir],
+            capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+if __name__ == "__main__":
+    # python -m applications.embeddings.onnx_backend export|check|benchmark [--model BAAI/bge-m3]
+    from applications.embeddings.mod import get_embedding_service
+
+    parser = argparse.ArgumentParser(description="int8 ONNX embedding backend tools.")
+    parser.add_argument("command", choices=["export", "check", "benchmark", "benchmark-one"])
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--backend", default="onnx-int8", choices=["torch", "onnx-int8"])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--onnx-dir", default=ONNX_DIR)
+    args = parser.parse_args()
+    model = args.model or get_embedding_service().model_name
+
+    if args.command == "export":
+        print(export_quantized(model, args.onnx_dir))
+    elif args.command == "check":
+        print(json.dumps(check_accuracy(model, args.onnx_dir), indent=2))
+    elif args.command == "benchmark":
+        print(json.dumps(benchmark(model, args.runs, args.onnx_dir), indent=2))
+    else:
+        print(json.dumps(benchmark_backend(args.backend, model, args.runs, args.onnx_dir)))
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import List
+from typing import List, Optional, Union
 from pydantic import BaseModel
 
 class FlaskApiServiceConfig(BaseModel):
@@ -19,11 +19,79 @@ class ScyllaConfig(BaseModel):
     password: str
     keyspace: str
 
+class EmbeddingConfig(BaseModel):
+    model_name: str = "BAAI/bge-m3"
+    backend: str = "torch"  # "torch" or "onnx-int8" (CPU-only boxes)
+    # Model the Milvus RAG collections (article_rag) were indexed with; change only
+    # together with a re-index, vectors of different models do not mix
+    rag_model_name: str = "all-MiniLM-L6-v2"
+    rag_backend: str = "torch"
+    batch_window_ms: float = 5.0
+    max_batch_size: int = 32
+    cache_size: int = 2048
+
+class LLMProfileConfig(BaseModel):
+    """Model and generation settings for one graph node's LLM calls."""
+    model: str = "gpt-oss:20b"
+    reasoning: Optional[Union[bool, str]] = None  # "low" | "medium" | "high" for gpt-oss
+    num_predict: int = 4096
+    stop: List[str] = []
+    keep_alive: Optional[str] = "30m"
+    temperature: float = 0.0
+    repeat_penalty: Optional[float] = None
+    json_format: bool = False
+    max_concurrency: int = 4
+
+class LLMBackendConfig(BaseModel):
+    """One Ollama server in the LLM pool."""
+    url: str = "http://localhost:11434"
+    models: List[str] = []  # models this server may serve; empty = any
+
+class LLMWarmupConfig(BaseModel):
+    """Model warmup at boot and keep-alive pings (see flask_api_service.llm_warmup)."""
+    enabled: bool = True
+    keepalive_interval_seconds: float = 600.0  # keep below the profiles' keep_alive
+    business_hours: List[int] = [8, 22]        # [start, end) hour, IST; pings only run inside
+    business_days: List[int] = [0, 1, 2, 3, 4, 5]  # Monday = 0
+    required_for_readiness: bool = True        # /health/ready answers 503 until a warm call succeeded...
+    readiness_profile: str = "tool_calling"    # ...for this profile (warmed first, retried until it does)
+
+class LLMConfig(BaseModel):
+    # Ollama servers; requests go to the least busy healthy one, preferring servers with the model loaded
+    backends: List[LLMBackendConfig] = [LLMBackendConfig()]
+    health_check_interval_seconds: float = 10.0
+    backend_cooldown_seconds: float = 15.0  # a failed server gets no requests until it passes a health check or this passes
+    warmup: LLMWarmupConfig = LLMWarmupConfig()
+    # chatbot intent decision: a short JSON object (schema-constrained per call, see structured_output)
+    routing: LLMProfileConfig = LLMProfileConfig(
+        reasoning="low", num_predict=1024, json_format=True, max_concurrency=8
+    )
+    # chatbot parameter extraction and tool calls
+    tool_calling: LLMProfileConfig = LLMProfileConfig(
+        reasoning="high", num_predict=4096, stop=["<|call|>"], repeat_penalty=10
+    )
+    # chatbot_response formatting of tool output
+    formatting: LLMProfileConfig = LLMProfileConfig(
+        reasoning="low", num_predict=4096, stop=["<|call|>"], repeat_penalty=10
+    )
+
+class AdmissionConfig(BaseModel):
+    """Admission control for chat turns (see flask_api_service.admission)."""
+    enabled: bool = True
+    user_rate_per_second: float = 0.5   # sustained turns per user
+    user_burst: int = 5                 # turns a user may send back to back
+    max_in_flight: Optional[int] = None # None: derived from the tool_calling LLM's max_concurrency
+    queue_deadline_seconds: float = 20.0  # turn away requests whose estimated queue wait is longer
+    store_path: Optional[str] = None    # sqlite file shared by the worker processes (default: temp dir)
+
 class AppConfig(BaseModel):
     flask_api_service: FlaskApiServiceConfig
     milvus_config: MilvusConfig
     scylla: ScyllaConfig
     jwt_secret: str
+    embedding: EmbeddingConfig = EmbeddingConfig()
+    llm: LLMConfig = LLMConfig()
+    admission: AdmissionConfig = AdmissionConfig()
 
 class GlobalConfig:
     def __init__(self):
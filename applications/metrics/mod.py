@@ -0,0 +1,46 @@
+import threading
+from typing import Any, Dict
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    label_str = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{label_str}}}"
+
+
+class Metrics:
+    """Process-local counters and timing summaries, exported as JSON on /metrics."""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation (e.g. a latency in ms) into a count/sum/min/max summary."""
+        key = _metric_key(name, labels)
+        with self._lock:
+            summary = self._timings.get(key)
+            if summary is None:
+                self._timings[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["sum"] += value
+                summary["min"] = min(summary["min"], value)
+                summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = {}
+            for key, summary in self._timings.items():
+                timings[key] = dict(summary, avg=summary["sum"] / summary["count"])
+            return {"counters": dict(self._counters), "timings": timings}
+
+
+metrics = Metrics()
@@ -1,5 +1,3 @@
-from pymilvus import connections
-
 from applications.etcd.init_etcd import global_config
 
 
@@ -22,6 +20,7 @@ class MilvusDB:
 
         print(f"{cls._host}:{cls._port}:{cls._alias}")
         if not cls._connected:
+            from pymilvus import connections
             connections.connect(
                 alias = cls._alias,
                 host = cls._host,
@@ -34,6 +33,7 @@ class MilvusDB:
     @classmethod
     def disconnect(cls):
         if cls._connected:
+            from pymilvus import connections
             connections.disconnect(cls._alias)
             cls._connected = False
             print(f"Disconnected from Milvus alias '{cls._alias}'")
@@ -41,4 +41,5 @@ class MilvusDB:
     # function for get instance of milvus db
     @classmethod
     def get_connection(cls):
+        from pymilvus import connections
         return connections.get_connection(cls._alias)
\ No newline at end of file
@@ -1,14 +1,15 @@
 import threading
 
-from langchain_community.embeddings import SentenceTransformerEmbeddings
 from langchain_milvus import Milvus
 from pymilvus import connections, Collection, utility
 from pymilvus.client.types import LoadState
 
+from applications.embeddings.mod import ServiceEmbeddings, get_rag_embedding_service
 from applications.etcd.init_etcd import global_config
 
-# Initialize embedding model only once
-embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+# The model the collections were indexed with (embedding.rag_model_name, all-MiniLM-L6-v2);
+# shared with tool routing only when both are configured to the same model
+embeddings = ServiceEmbeddings(get_rag_embedding_service())
 
 # Global variable for static connection
 _vector_store = None
@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from applications.metrics.mod import metrics
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class _ModelEntry:
+    def __init__(self, name: str, loader: Callable[[], Any], background: bool, required: bool):
+        self.name = name
+        self.loader = loader
+        self.background = background
+        self.required = required
+        self.state = NOT_LOADED
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.load_ms: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Named models that load on first use (lazy) or in a background thread at boot.
+
+    Loads are timed per model. Readiness means every model registered as
+    required has loaded, so /health/ready can keep cold workers out of rotation
+    while they warm up.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._started_at = time.time()
+
+    def register(self, name: str, loader: Callable[[], Any], background: bool = False,
+                 required: bool = False) -> None:
+        self._entries[name] = _ModelEntry(name, loader, background, required)
+
+    def get(self, name: str) -> Any:
+        """Return the loaded model, loading it now if needed (concurrent callers wait for one load)."""
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.value
+
+        with entry.lock:
+            if entry.state != READY:
+                entry.state = LOADING
+                start = time.perf_counter()
+                try:
+                    entry.value = entry.loader()
+                except Exception as e:
+                    entry.state = FAILED
+                    entry.error = str(e)
+                    print(f"Model '{name}' failed to load: {e}")
+                    raise
+                entry.load_ms = (time.perf_counter() - start) * 1000
+                entry.error = None
+                entry.state = READY
+                metrics.observe("model_load_ms", entry.load_ms, model=name)
+                print(f"Model '{name}' loaded in {entry.load_ms / 1000:.1f}s")
+        return entry.value
+
+    def start_background_loads(self) -> None:
+        """Load every background model in its own daemon thread."""
+        for entry in self._entries.values():
+            if entry.background and entry.state == NOT_LOADED:
+                threading.Thread(target=self._load_quietly, args=(entry.name,),
+                                 name=f"model-load-{entry.name}", daemon=True).start()
+
+    def _load_quietly(self, name: str) -> None:
+        try:
+            self.get(name)
+        except Exception:
+            pass  # recorded as FAILED; the next get() retries
+
+    def is_ready(self) -> bool:
+        return all(entry.state == READY for entry in self._entries.values() if entry.required)
+
+    def status(self) -> Dict[str, Any]:
+        models = {}
+        for entry in self._entries.values():
+            models[entry.name] = {
+                "state": entry.state,
+                "required": entry.required,
+                "load_ms": round(entry.load_ms, 1) if entry.load_ms is not None else None,
+            }
+            if entry.error:
+                models[entry.name]["error"] = entry.error
+        return {
+            "ready": self.is_ready(),
+            "uptime_s": round(time.time() - self._started_at, 1),
+            "models": models
+        }
+
+
+model_registry = ModelRegistry()
@@ -1,7 +1,4 @@
 import atexit
-from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT, ConsistencyLevel
-from cassandra.auth import PlainTextAuthProvider
-from cassandra.policies import ConstantReconnectionPolicy, DCAwareRoundRobinPolicy, TokenAwarePolicy
 from applications.etcd.init_etcd import global_config
 
 class ScyllaConnection:
@@ -11,6 +8,11 @@ class ScyllaConnection:
     @staticmethod
     def init_connection():
         if ScyllaConnection._session is None:
+            # The cassandra driver is slow to import; only load it when a connection is made
+            from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT, ConsistencyLevel
+            from cassandra.auth import PlainTextAuthProvider
+            from cassandra.policies import ConstantReconnectionPolicy, DCAwareRoundRobinPolicy, TokenAwarePolicy
+
             print("ScyllaDB connection initiated...")
             scylla_config = global_config.config.scylla
             auth_provider = PlainTextAuthProvider(
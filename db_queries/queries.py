@@ -1,6 +1,5 @@
 import json
 import time
-from cassandra.query import SimpleStatement
 from applications.scylla.init_scylla import ScyllaConnection
 
 def insert_user_chat_mapping(chat_data):
@@ -0,0 +1,264 @@
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, NamedTuple, Optional
+
+from flask import g, jsonify, make_response
+
+from applications.etcd.init_etcd import global_config, AdmissionConfig, LLMConfig
+from applications.metrics.mod import metrics
+from flask_api_service.constants import COMMON_RESPONSE_TEXT
+
+# Turns allowed in flight per tool-calling LLM slot (one running, the rest queued for it)
+IN_FLIGHT_PER_LLM_SLOT = 4
+
+# Turn duration assumed until real turns have been measured
+INITIAL_TURN_SECONDS = 5.0
+TURN_SECONDS_SMOOTHING = 0.2
+
+# In-flight entries older than this are dropped (a worker killed mid-turn never releases them)
+STALE_TICKET_SECONDS = 600
+
+STORE_TIMEOUT_SECONDS = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (user_id TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS in_flight (ticket TEXT PRIMARY KEY, user_id TEXT, pid INTEGER NOT NULL, started REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value REAL NOT NULL);
+"""
+
+
+class Admission(NamedTuple):
+    admitted: bool
+    ticket: Optional[str] = None
+    retry_after: int = 0      # seconds, for the Retry-After header
+    reason: str = ""          # "user_rate" | "overloaded" when turned away
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists but belongs to someone else
+    return True
+
+
+class AdmissionController:
+    """
+    Admission control for chat turns, shared by every worker process through
+    one sqlite file:
+
+    - per-user token buckets (user_rate_per_second, user_burst)
+    - a global in-flight cap derived from the tool-calling LLM's concurrency
+    - an estimated queue wait (turns ahead × average turn time / LLM slots);
+      requests that would wait longer than queue_deadline_seconds are answered
+      429 at once instead of queueing behind the LLM
+
+    Every check-and-update runs in one BEGIN IMMEDIATE transaction, so
+    concurrent workers see each other's tickets. If the store cannot be used,
+    requests are admitted (the limiter never takes the service down).
+    """
+
+    def __init__(self, config: AdmissionConfig, llm_slots: int):
+        self.config = config
+        self.llm_slots = max(1, llm_slots)
+        self.max_in_flight = config.max_in_flight or self.llm_slots * IN_FLIGHT_PER_LLM_SLOT
+        self.store_path = config.store_path or os.path.join(tempfile.gettempdir(), "chatbot_admission.sqlite3")
+        self._pid = os.getpid()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # ---------------- store ----------------
+
+    @contextmanager
+    def _transaction(self):
+        connection = sqlite3.connect(self.store_path, timeout=STORE_TIMEOUT_SECONDS, isolation_level=None)
+        try:
+            if not self._initialized:
+                with self._init_lock:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(_SCHEMA)
+                    self._initialized = True
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.close()
+
+    def _purge(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute("DELETE FROM in_flight WHERE started < ?", (now - STALE_TICKET_SECONDS,))
+        for (pid,) in connection.execute("SELECT DISTINCT pid FROM in_flight").fetchall():
+            if pid != self._pid and not _pid_alive(pid):
+                connection.execute("DELETE FROM in_flight WHERE pid = ?", (pid,))
+
+    @staticmethod
+    def _turn_seconds(connection: sqlite3.Connection) -> float:
+        row = connection.execute("SELECT value FROM stats WHERE key = 'turn_seconds'").fetchone()
+        return row[0] if row else INITIAL_TURN_SECONDS
+
+    def _refill(self, connection: sqlite3.Connection, user_id: str, now: float) -> float:
+        row = connection.execute("SELECT tokens, updated FROM buckets WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return float(self.config.user_burst)
+        tokens, updated = row
+        return min(float(self.config.user_burst), tokens + (now - updated) * self.config.user_rate_per_second)
+
+    def estimated_wait(self, in_flight: int, turn_seconds: float) -> float:
+        """Seconds a new turn would wait for an LLM slot with in_flight turns already admitted."""
+        ahead = max(0, in_flight + 1 - self.llm_slots)
+        return ahead * turn_seconds / self.llm_slots
+
+    # ---------------- admission ----------------
+
+    def admit(self, user_id: str) -> Admission:
+        if not self.config.enabled:
+            return Admission(True)
+        now = time.time()
+        try:
+            with self._transaction() as connection:
+                self._purge(connection, now)
+                tokens = self._refill(connection, user_id, now)
+                if tokens < 1:
+                    rate = self.config.user_rate_per_second
+                    retry_after = math.ceil((1 - tokens) / rate) if rate > 0 else STALE_TICKET_SECONDS
+                    return self._reject("user_rate", retry_after)
+
+                in_flight = connection.execute("SELECT COUNT(*) FROM in_flight").fetchone()[0]
+                turn_seconds = self._turn_seconds(connection)
+                wait = self.estimated_wait(in_flight, turn_seconds)
+                metrics.observe("admission_estimated_wait_ms", wait * 1000)
+                if in_flight >= self.max_in_flight:
+                    return self._reject("overloaded", math.ceil(turn_seconds / self.llm_slots))
+                if wait > self.config.queue_deadline_seconds:
+                    return self._reject("overloaded", math.ceil(wait - self.config.queue_deadline_seconds))
+
+                ticket = uuid.uuid4().hex
+                connection.execute("INSERT OR REPLACE INTO buckets (user_id, tokens, updated) VALUES (?, ?, ?)",
+                                   (user_id, tokens - 1, now))
+                connection.execute("INSERT INTO in_flight (ticket, user_id, pid, started) VALUES (?, ?, ?, ?)",
+                                   (ticket, user_id, self._pid, now))
+        except sqlite3.Error as e:
+            print(f"Admission store unavailable ({e}); admitting request")
+            metrics.incr("admission_store_errors")
+            return Admission(True)
+
+        metrics.incr("admission_admitted")
+        return Admission(True, ticket)
+
+    @staticmethod
+    def _reject(reason: str, retry_after: int) -> Admission:
+        metrics.incr("admission_rejected", reason=reason)
+        return Admission(False, retry_after=max(1, retry_after), reason=reason)
+
+    def restart(self, ticket: Optional[str]) -> None:
+        """Start timing an admitted turn now (a queued job once it starts running)."""
+        if not ticket:
+            return
+        try:
+            with self._transaction() as connection:
+                connection.execute("UPDATE in_flight SET started = ? WHERE ticket = ?", (time.time(), ticket))
+        except sqlite3.Error as e:
+            print(f"Admission store unavailable ({e})")
+
+    def release(self, ticket: Optional[str], record: bool = True) -> None:
+        """
+        End a turn. With record, its duration feeds the average turn time used
+        for wait estimates; requests that never ran a turn release with record=False.
+        """
+        if not ticket:
+            return
+        now = time.time()
+        try:
+            with self._transaction() as connection:
+                row = connection.execute("SELECT started FROM in_flight WHERE ticket = ?", (ticket,)).fetchone()
+                if row is None:
+                    return
+                connection.execute("DELETE FROM in_flight WHERE ticket = ?", (ticket,))
+                if not record:
+                    return
+                turn_seconds = self._turn_seconds(connection)
+                turn_seconds += TURN_SECONDS_SMOOTHING * ((now - row[0]) - turn_seconds)
+                connection.execute("INSERT OR REPLACE INTO stats (key, value) VALUES ('turn_seconds', ?)",
+                                   (turn_seconds,))
+        except sqlite3.Error as e:
+            print(f"Admission store unavailable ({e}); ticket {ticket} left to expire")
+
+    def snapshot(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "enabled": self.config.enabled,
+            "llm_slots": self.llm_slots,
+            "max_in_flight": self.max_in_flight,
+            "queue_deadline_seconds": self.config.queue_deadline_seconds,
+        }
+        try:
+            with self._transaction() as connection:
+                self._purge(connection, time.time())
+                in_flight = connection.execute("SELECT COUNT(*) FROM in_flight").fetchone()[0]
+                turn_seconds = self._turn_seconds(connection)
+        except sqlite3.Error as e:
+            result["error"] = str(e)
+            return result
+        result.update(in_flight=in_flight, turn_seconds_avg=round(turn_seconds, 2),
+                      estimated_wait_seconds=round(self.estimated_wait(in_flight, turn_seconds), 2))
+        return result
+
+
+def _admission_controller() -> AdmissionController:
+    config = global_config.config
+    llm = config.llm if config else LLMConfig()
+    return AdmissionController(config.admission if config else AdmissionConfig(), llm.tool_calling.max_concurrency)
+
+
+admission = _admission_controller()
+
+
+def too_many_requests(retry_after: int):
+    response = jsonify({"status": False, "msg": COMMON_RESPONSE_TEXT})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def take_admission_ticket() -> Optional[str]:
+    """
+    Take over the current request's admission ticket, e.g. for a queued job
+    that outlives the request; the caller releases it when the turn ends.
+    """
+    return g.pop("admission_ticket", None)
+
+
+def admission_control(f):
+    """
+    Admit the request before running the view (429 with Retry-After otherwise).
+    The turn stays in flight until the response is closed, so streamed
+    responses count until their last event is sent, unless the view took the
+    ticket over (take_admission_ticket). Use after session_middleware.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        result = admission.admit(str(g.user_id))
+        if not result.admitted:
+            return too_many_requests(result.retry_after)
+        g.admission_ticket = result.ticket
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            admission.release(g.pop("admission_ticket", None), record=False)
+            raise
+        ticket = g.pop("admission_ticket", None)
+        response.call_on_close(lambda: admission.release(ticket))
+        return response
+
+    return decorated_function
@@ -1,68 +1,45 @@
 import json
 import re
+import time
 import uuid
 from typing import Optional, Dict, Any, Tuple, List
-from datetime import datetime, timedelta, timezone
-import chromadb
-from chromadb.utils import embedding_functions
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_core.rate_limiters import InMemoryRateLimiter
-from langchain_ollama import ChatOllama
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+from langgraph.graph import END
 from pydantic import ValidationError
 from applications.etcd.init_etcd import global_config
 from StateBase import StateBase
-import torch._dynamo
-import whisper
-from flask_api_service.tool_setup import tools, TOOL_REGISTRY
-torch._dynamo.config.suppress_errors = True
-
-# audio pipe
-whisper_model = None
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-whisper_model = whisper.load_model("base", device=DEVICE)
+from flask_api_service.tool_setup import tools, TOOL_REGISTRY, MUTATING_TOOLS
+from flask_api_service.tool_executor import ParallelToolExecutor, merge_tool_results
+from flask_api_service.fast_lane import match_fast_lane
+from flask_api_service.intent_router import route_deterministic, should_shadow_llm, log_routing_decision, \
+    INTENT_CHANGE_THRESHOLD
+from flask_api_service.intent_classifier import load_intent_classifier
+from flask_api_service.tool_retriever import NumpyToolRetriever
+from flask_api_service.llm_clients import llm_clients, llm_config
+from flask_api_service.llm_warmup import LLMWarmup
+from flask_api_service.deadline import TurnCancelled
+from flask_api_service.prompt_builder import PromptBuilder, date_context_message
+from flask_api_service.history_manager import history_manager
+from flask_api_service.routing_cards import build_routing_cards, render_candidates
+from flask_api_service.structured_output import first_json_value, generation_cap, parse_output, \
+    routing_schema, validate_output, JsonScanner, RoutingDecision
+from flask_api_service.token_counter import count_message_tokens
+from applications.metrics.mod import metrics
+from applications.embeddings.mod import get_embedding_service
+from applications.model_registry.mod import model_registry
 
 # ============================================
 # INITIALIZATION
 # ============================================
 
-# Rate limiter and model setup
-rate_limiter = InMemoryRateLimiter(
-    requests_per_second=10,
-    check_every_n_seconds=0.2,
-    max_bucket_size=50
-)
-# Audio setup
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-
 # Config
 global_config.read_etcd_config(file_path="config")
 
-# LLM
-llm = ChatOllama(
-    base_url="http://localhost:11434",
-    model="gpt-oss:20b",
-    temperature=0.0,
-    repeat_penalty=10,
-    extract_reasoning=True,
-    num_predict=8000,
-    rate_limiter=rate_limiter,
-    stop=["<|call|>"]
-)
-
-decision_llm = ChatOllama(
-    base_url="http://localhost:11434",
-    model="gpt-oss:20b",
-    temperature=0.0,
-    extract_reasoning=True,
-    format="json",          # helps Ollama return clean JSON
-    num_predict=4096,
-    stop=["\n\n", "```"]    # prevent extra text
-)
+# LLM clients ("routing", "tool_calling", "formatting") live in llm_clients; model,
+# reasoning level and token caps per node come from AppConfig.llm
 
 # System prompt
 system_prompt = """
-Reasoning: high
-
 You are **TBO Sense**, the TBO AI travel assistant.  
 Only introduce yourself if the user greets you or asks who you are.  
 Never mention AI models or companies.
@@ -100,66 +77,6 @@ If the question is about comparison between TBO and competitors (like MakeMyTrip
 
 
 
-class ChromaToolRetriever:
-    """Handles vector indexing and retrieval of tool descriptions."""
-
-    def __init__(self, tool_registry: Dict[str, Dict[str, Any]], collection_name: str = "tool_library"):
-        self.client = chromadb.Client()
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="BAAI/bge-m3"  # "mixedbread-ai/mxbai-embed-large-v1"
-        )
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            embedding_function=self.embedding_function
-        )
-        self.tool_registry = tool_registry
-        self._index_tools()
-
-    def _index_tools(self):
-        descriptions: List[str] = [data["description"] for data in self.tool_registry.values()]
-        ids: List[str] = list(self.tool_registry.keys())
-        self.collection.add(documents=descriptions, ids=ids)
-        print(f"Indexed {len(ids)} tools into ChromaDB.")
-
-    def retrieve_tool_and_score(self, query: str, k: int = 1) -> Tuple[Optional[str], float, List[Tuple[str, float]]]:
-        """
-        Retrieves the top tool name, its similarity score, and the list of all retrieved
-        tool-score pairs.
-
-        Returns:
-            (top_tool_name, top_similarity_score, all_results_list)
-        """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=k
-        )
-
-        all_results: List[Tuple[str, float]] = []
-
-        # Check if we have any results for the query
-        if results and results["ids"] and results["ids"][0] and results["distances"] and results["distances"][0]:
-
-            # Extract the list of IDs and distances for the single query
-            tool_ids = results["ids"][0]
-            distances = results["distances"][0]
-
-            # Process all retrieved results
-            for tool_name, distance in zip(tool_ids, distances):
-                # Simple heuristic to map L2 distance (lower is better, typically 0 to ~1.4)
-                # to a 0-1 similarity score (higher is better).
-                # The maximum value is used to ensure the score doesn't go below 0.0
-                similarity_score = max(0.0, 1.0 - (distance / 1.5))
-                all_results.append((tool_name, similarity_score))
-
-            # The top result is the first element, as ChromaDB returns results sorted by distance
-            top_tool_name = all_results[0][0]
-            top_similarity_score = all_results[0][1]
-
-            return (top_tool_name, top_similarity_score, all_results)
-
-        # Return structure if no results are found
-        return (None, 0.0, [])
-
 def extract_user_message(messages: List) -> str:
     """Extract the last user message from conversation history"""
     for msg in reversed(messages):
@@ -177,165 +94,384 @@ def extract_user_message(messages: List) -> str:
             return str(content)
     return ""
 
-def truncate_history(messages, max_messages=10):
-    """Keep fewer messages to reduce context confusion"""
-    if len(messages) <= max_messages:
-        return messages
+def extract_clean_json_tool(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the first valid JSON object/array parsed into a Python dict/list,
+    or None if nothing valid is found (single brace/string-aware pass).
+    """
+    return first_json_value(text or "")
+
+# Explicit paging requests ("show more", "next page", "more results") are paged straight
+# from the cursor cache (next_page tool); anything else ("more info", "other airlines")
+# goes through routing
+SHOW_MORE_PATTERN = re.compile(
+    r"^\W*(please\s+)?("
+    r"(show|give|send|load|see)( me)?( some| a few)? more( results| options| flights| hotels| packages)?"
+    r"|more results"
+    r"|(show( me)? the |go to the |the )?next (page|results|\d+( results)?)"
+    r")(\s+please)?\W*$",
+    re.IGNORECASE
+)
+
+prompt_builder = PromptBuilder(system_prompt, TOOL_REGISTRY)
 
-    # Keep System messages at the start
-    system_msgs = [m for m in messages if isinstance(m, SystemMessage)]
-    non_system_msgs = [m for m in messages if not isinstance(m, SystemMessage)]
+# Tools node; chatbot starts tool calls on it while the LLM is still streaming
+tool_executor = ParallelToolExecutor(tools=tools, mutating_tools=MUTATING_TOOLS)
 
-    recent_non_system = non_system_msgs[-max_messages + len(system_msgs):]
+# One-line candidate cards for the routing prompt, built once from the tool registry
+routing_cards = build_routing_cards(TOOL_REGISTRY)
 
-    return system_msgs + recent_non_system
+# Routing output is constrained to RoutingDecision's schema and capped at its maximum size
+ROUTING_SCHEMA = routing_schema(list(TOOL_REGISTRY.keys()))
+ROUTING_NUM_PREDICT = generation_cap(
+    ROUTING_SCHEMA, llm_clients.profiles["routing"].reasoning, llm_clients.profiles["routing"].num_predict
+)
 
-def extract_clean_json_tool(text: str) -> Optional[Dict[str, Any]]:
+
+# ============================================
+# MODELS (lazy or background-loaded, see /health/ready)
+# ============================================
+
+def _load_whisper():
+    # Only /transcribe needs Whisper, so torch and whisper are imported on first use
+    import torch
+    import torch._dynamo
+    import whisper
+
+    torch._dynamo.config.suppress_errors = True
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return whisper.load_model("base", device=device)
+
+
+model_registry.register("whisper", _load_whisper)
+model_registry.register("embeddings", lambda: get_embedding_service().load(), background=True, required=True)
+model_registry.register("tool_retriever", lambda: NumpyToolRetriever(TOOL_REGISTRY), background=True, required=True)
+model_registry.register(
+    "intent_classifier",
+    lambda: load_intent_classifier(
+        list(TOOL_REGISTRY.keys()), get_embedding_service().model_name, get_embedding_service().backend
+    ),
+    background=True
+)
+
+
+def get_tool_retriever() -> NumpyToolRetriever:
+    return model_registry.get("tool_retriever")
+
+
+def fast_lane(state: StateBase) -> StateBase:
     """
-    Returns the first valid JSON object/array parsed into a Python dict/list,
-    or None if nothing valid is found.
+    Runs before the LLM nodes. Pages "show more" requests from the cursor cache and
+    answers canned/lookup tools directly when retrieval is decisive and the
+    arguments can be extracted deterministically. Otherwise hands over to chatbot.
     """
-    # Look for a curly brace or square bracket block
-    match = re.search(r'(\{.*\}|\[.*\])', text, flags=re.DOTALL)
-    if not match:
-        return None
-
-    json_str = match.group(1)
     try:
-        # Use simple cleaning heuristic to strip surrounding text
-        start_index = json_str.find('{')
-        end_index = json_str.rfind('}')
-        if end_index > start_index:
-            clean_str = json_str[start_index:end_index + 1]
-        else:
-            clean_str = json_str
+        user_message = extract_user_message(state.get("messages", []))
+        current_intent_tool = state.get("current_intent_tool")
 
-        # print(f"\n input text: {text}\n") # Debugging print removed
-        return json.loads(clean_str)
-    except json.JSONDecodeError:
-        return None
+        # "Show more" on the previous search → next page from the cursor, no retrieval/LLM.
+        # Any other turn drops the cursor (a new search stores its own in chatbot_response).
+        page_cursor = state.get("page_cursor")
+        if page_cursor and SHOW_MORE_PATTERN.match(user_message):
+            print(f"Show-more follow-up, paging cursor {page_cursor}")
+            return {
+                "messages": [AIMessage(
+                    content="",
+                    tool_calls=[{
+                        "name": "next_page",
+                        "args": {"cursor_id": page_cursor},
+                        "id": str(uuid.uuid4())
+                    }]
+                )]
+            }
 
-# INTENT CHANGE THRESHOLD: 0.4 (fallback, but now LLM decides primarily)
-INTENT_CHANGE_THRESHOLD = 0.65  # Still keep as fallback if LLM fails to parse
-system_prompt_msg = SystemMessage(content=system_prompt)
-tool_retriever = ChromaToolRetriever(TOOL_REGISTRY)
+        start = time.perf_counter()
+        _, _, tools_list = get_tool_retriever().retrieve_tool_and_score(user_message, k=4)
+        retrieval = {"query": user_message, "results": tools_list}
 
-def chatbot(state: StateBase) -> StateBase:
-    """Enhanced chatbot – RAG → LLM decides intent (follow-up vs new) safely."""
-    try:
-        # 1. Truncate history
-        state["messages"] = truncate_history(state.get("messages", []), max_messages=10)
+        match = match_fast_lane(user_message, tools_list, current_intent_tool)
+        if match is None:
+            return {"retrieved_tools": retrieval, "page_cursor": None}
 
-        # 2. Extract latest user message
-        user_message = extract_user_message(state["messages"])
+        tool_name, args = match
+        call_id = str(uuid.uuid4())
+        tool_result = TOOL_REGISTRY[tool_name]["tool"].invoke(args)
 
-        print(f"\n{'=' * 60}")
-        print(f"USER MESSAGE: {user_message[:100]}...")
-        print(f"{'=' * 60}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Fast lane: {tool_name}({args}) answered in {elapsed_ms:.1f} ms")
+        metrics.incr("fast_lane_hits", tool=tool_name)
+        metrics.observe("fast_lane_ms", elapsed_ms, tool=tool_name)
 
-        # 3. Current intent from previous turn
-        current_intent_tool = state.get("current_intent_tool")
-        print(f"Current Stored Intent: {current_intent_tool}")
+        return {
+            "messages": [
+                AIMessage(content="", tool_calls=[{"name": tool_name, "args": args, "id": call_id}]),
+                ToolMessage(content=tool_result, name=tool_name, tool_call_id=call_id)
+            ],
+            "current_intent_tool": tool_name,
+            "intent_tools": [tool_name],
+            "page_cursor": None,
+            "retrieved_tools": retrieval
+        }
 
-        # 4. RAG – get top-3 candidate tools
-        _, _, tools_list = tool_retriever.retrieve_tool_and_score(user_message, k=3)
-        candidate_tools = []
-        for tool_tuple in tools_list:
-            tool_key, score = tool_tuple
-            print(f"Retrieved candidate: {tool_key} (Score: {score:.2f})")
-            if tool_key in TOOL_REGISTRY:
-                entry = TOOL_REGISTRY[tool_key]
-                tool_obj = entry.get("tool")
-                schema = entry.get("schema")
-                if tool_obj and schema:
-                    candidate_tools.append({
-                        "name": tool_key,
-                        "description": entry["description"],
-                        "schema": schema,
-                        "score": round(score, 3)
-                    })
-
-        history = " | ".join(
-            str(m.content).replace("\n", " ").strip()
-            for m in state.get("messages", [])
-            if str(m.content).strip()
-        )
+    except Exception as e:
+        print(f"ERROR in fast_lane: {e}")
+        return {"page_cursor": None}
+
+
+def fast_lane_condition(state: StateBase) -> str:
+    """Route after fast_lane: answered → END, next_page call → tools, otherwise → chatbot."""
+    last_message = state["messages"][-1]
+    if isinstance(last_message, ToolMessage):
+        return END
+    if isinstance(last_message, AIMessage) and getattr(last_message, "tool_calls", None):
+        return "tools"
+    return "chatbot"
+
+
+# Intent decision instructions (static part of the routing prompt)
+INTENT_DECISION_PROMPT = """
+You are a strict JSON-only Intent Classification Agent.
+
+Your job:
+- Decide if the user message is a "followup" or "new" intent.
+- Select the tool for each independent task in the message (usually exactly ONE).
+- You must ALWAYS return valid JSON. Never return blank output.
+
+-----------------------
+CLASSIFICATION RULES
+-----------------------
+
+1. FOLLOWUP  
+   - User is providing details, parameters, confirmations, or continuing the active intent.
+
+2. NEW  
+   - User asks anything unrelated to the current tool/task.
+   - OR the highest-scoring candidate tool clearly matches the request better than the current intent.
+
+3. TOOL SELECTION  
+   - Pick the tool with the **highest score**, not the first.
+   - If multiple tools have similar scores (difference < 0.03):  
+        → Prefer the tool that best semantically matches the user message.
+   - If NO tool score ≥ 0.60:  
+        → selected_tools = [].
+
+4. MULTIPLE TASKS IN ONE MESSAGE  
+   - Identify if the user asked for more than one independent task
+     (e.g. "flights to Maldives and hotels there").
+   - If yes:
+        → decision = "new"
+        → selected_tools = one candidate tool per task, in the order asked
+   - Never list the same tool twice and never list a tool that is not a candidate.
+
+5. OUTPUT FORMAT  
+   You MUST output ONLY this JSON format:
+
+{
+  "decision": "followup" | "new",
+  "selected_tools": ["<tool_name>", ...],
+  "reason": "<short justification>"
+}
+
+Never return empty output. Never include explanations outside JSON.
+"""
+INTENT_DECISION_PROMPT_MSG = SystemMessage(content=INTENT_DECISION_PROMPT)
 
-        full_history = f"Full conversation history: {history}"
 
-        # 5. **SAFE INTENT DECISION PROMPT** – using f-string (no KeyError ever)
-        intent_decision_prompt = f"""
-        You are a strict JSON-only Intent Classification Agent.
+def routing_data(routing_history: str, user_message: str, current_intent_tool: Optional[str],
+                 candidates_text: str) -> str:
+    """This turn's part of the routing prompt (sent after the static instructions, so their prefix stays cacheable)."""
+    return f"""
+-----------------------
+DATA
+-----------------------
 
-        Your job:
-        - Decide if the user message is a "followup" or "new" intent.
-        - Select exactly ONE tool based on the highest semantic score.
-        - You must ALWAYS return valid JSON. Never return blank output.
+Current intent: {current_intent_tool or "None"}
 
-        -----------------------
-        CLASSIFICATION RULES
-        -----------------------
+Conversation history (compressed):
+{routing_history}
 
-        1. FOLLOWUP  
-           - User is providing details, parameters, confirmations, or continuing the active intent.
+Candidate tools (with scores):
+{candidates_text}
 
-        2. NEW  
-           - User asks anything unrelated to the current tool/task.
-           - OR the highest-scoring candidate tool clearly matches the request better than the current intent.
+User message:
+{user_message}
+"""
 
-        3. TOOL SELECTION  
-           - Pick the tool with the **highest score**, not the first.
-           - If multiple tools have similar scores (difference < 0.03):  
-                → Prefer the tool that best semantically matches the user message.
-           - If NO tool score ≥ 0.60:  
-                → selected_tool = "none".
 
-        4. MULTIPLE TASKS IN ONE MESSAGE  
-           - Identify if the user asked for more than one unrelated task.
-           - If yes:
-                → decision = "new"
-                → selected_tool = "none"
-                → reason = "User attempted multiple tasks; only one can be processed."
+def llm_route_decision(routing_history: str, user_message: str, current_intent_tool: Optional[str],
+                       candidate_tools: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Ask the routing LLM whether the turn is a follow-up or a new intent, and for which tool(s)."""
+    # Candidates as precompiled one-line cards within a token budget
+    candidates_text = render_candidates(candidate_tools, routing_cards)
 
-        5. OUTPUT FORMAT  
-           You MUST output ONLY this JSON format:
+    # Call a lightweight LLM for decision
+    decision_response = llm_clients.invoke(
+        "routing",
+        [INTENT_DECISION_PROMPT_MSG,
+         HumanMessage(content=routing_data(routing_history, user_message, current_intent_tool, candidates_text))],
+        format=ROUTING_SCHEMA,
+        num_predict=ROUTING_NUM_PREDICT
+    )
+    decision_text = getattr(decision_response, "content", "").strip()
 
-        {{
-          "decision": "followup" | "new",
-          "selected_tool": "<tool_name or none>",
-          "reason": "<short justification>"
-        }}
+    print("##########################")
+    print(decision_text)
+    print("##########################")
 
-        Never return empty output. Never include explanations outside JSON.
+    # Validate against the same model the schema came from
+    decision = parse_output(decision_text, RoutingDecision, profile="routing")
+    return decision.model_dump() if decision else None
 
-        -----------------------
-        DATA
-        -----------------------
 
-        Current intent: {current_intent_tool or "None"}
+# ============================================
+# TOOL ARGUMENTS
+# ============================================
 
-        User message:
-        {user_message}
+def tool_args_model(tool_name: str):
+    tool = TOOL_REGISTRY.get(tool_name, {}).get("tool")
+    return getattr(tool, "args_schema", None)
 
-        Conversation history (compressed):
-        {full_history}
 
-        Candidate tools (with scores):
-        {json.dumps(candidate_tools, indent=2) if candidate_tools else "[]"}
-        """
+def validate_tool_args(tool_name: str, args: Any) -> Optional[Dict[str, Any]]:
+    """args if they satisfy the tool's Pydantic input model, else None (counted as a parse failure)."""
+    model = tool_args_model(tool_name)
+    if model is None:
+        return args if isinstance(args, dict) else None
+    return args if validate_output(args, model, profile="tool_calling") is not None else None
 
-        # 6. Call a lightweight LLM for decision
-        decision_response = decision_llm.invoke(
-            [SystemMessage(content=intent_decision_prompt)]
-        )
-        decision_text = getattr(decision_response, "content", "").strip()
 
-        print("##########################")
-        print(decision_text)
-        print("##########################")
+def extract_tool_args(tool_name: str, messages: List) -> Optional[Dict[str, Any]]:
+    """
+    Re-extract a tool's arguments with Ollama's structured output: the tool's
+    input schema as the format, generation capped at the schema's maximum size.
+    Used when the tool-calling LLM wrote arguments as text that do not parse or validate.
+    """
+    model = tool_args_model(tool_name)
+    if model is None:
+        return None
+    schema = model.model_json_schema()
+    profile = llm_clients.profiles["tool_calling"]
+    response = llm_clients.invoke(
+        "tool_calling",
+        messages + [SystemMessage(content=f"Return ONLY the arguments for `{tool_name}` as a JSON object.")],
+        format=schema,
+        num_predict=generation_cap(schema, profile.reasoning, profile.num_predict)
+    )
+    args = parse_output(getattr(response, "content", ""), model, profile="tool_arguments")
+    return args.model_dump(exclude_unset=True) if args else None
+
+
+def stream_tool_calls(messages: List, bound_tools: List, current_intent_tool: Optional[str],
+                      expected_calls: int) -> AIMessage:
+    """
+    Run the tool-calling LLM as a stream and start each read-only tool call on
+    the tools node's pool as soon as it is complete: native tool calls when
+    their chunk arrives, JSON arguments written as text when the scanner sees
+    the object close (and they validate). Once the expected number of calls is
+    running, the rest of the generation is cancelled.
+
+    Mutating calls (bookings, cancellations) are only collected; the tools node
+    starts them after the whole message is in. If the stream fails or the turn
+    is cancelled, calls already started are discarded.
+    """
+    stream_start = time.perf_counter()
+    scanner = JsonScanner(arrays=False)
+    content_parts: List[str] = []
+    additional_kwargs: Dict[str, Any] = {}
+    calls: List[Dict[str, Any]] = []
+    dispatched: List[Dict[str, Any]] = []
+
+    stream = llm_clients.stream("tool_calling", messages, tools=bound_tools)
+    try:
+        for chunk in stream:
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            content_parts.append(text)
+            for key, value in (chunk.additional_kwargs or {}).items():
+                if isinstance(value, str):
+                    additional_kwargs[key] = additional_kwargs.get(key, "") + value
+
+            new_calls = [dict(call) for call in chunk.tool_calls or []]
+            for call in new_calls:
+                validate_tool_args(call["name"], call.get("args"))  # counted; the tool reports bad args itself
+            if not new_calls and text and current_intent_tool:
+                for value in scanner.feed(text):
+                    args = value.get("parameters", value.get("arguments", value))
+                    if validate_tool_args(current_intent_tool, args) is not None:
+                        new_calls.append({"name": current_intent_tool, "args": args, "id": str(uuid.uuid4())})
+
+            for call in new_calls:
+                call["id"] = call.get("id") or str(uuid.uuid4())
+                calls.append(call)
+                if tool_executor.dispatch(call):
+                    dispatched.append(call)
+                    if len(dispatched) == 1:
+                        metrics.observe("tool_dispatch_after_ms", (time.perf_counter() - stream_start) * 1000,
+                                        tool=call["name"])
+
+            # Only when every call is already running; a mutating call waits for the complete message
+            if dispatched and len(dispatched) == len(calls) >= expected_calls:
+                print(f"Dispatched {[c['name'] for c in dispatched]} mid-stream; cancelling the rest of the generation")
+                break
+    except BaseException:
+        tool_executor.discard(call["id"] for call in dispatched)
+        raise
+    finally:
+        stream.close()
+
+    return AIMessage(content="".join(content_parts), tool_calls=calls, additional_kwargs=additional_kwargs)
 
-        # 7. Robust JSON extraction
-        parsed_decision = extract_clean_json_tool(decision_text)
+
+def chatbot(state: StateBase) -> StateBase:
+    """Enhanced chatbot – RAG → LLM decides intent (follow-up vs new) safely."""
+    try:
+        # 1. Fixed-size history for routing (the tool-calling window is picked in step 11)
+        routing_history = history_manager.routing_history(state.get("messages", []))
+
+        # 2. Extract latest user message
+        user_message = extract_user_message(state["messages"])
+
+        print(f"\n{'=' * 60}")
+        print(f"USER MESSAGE: {user_message[:100]}...")
+        print(f"{'=' * 60}")
+
+        # 3. Current intent from previous turn
+        current_intent_tool = state.get("current_intent_tool")
+        print(f"Current Stored Intent: {current_intent_tool}")
+
+        # 4. RAG – get top-4 candidate tools (a multi-task message needs room for each intent)
+        # Reuse the fast lane's retrieval for this message when available
+        retrieval = state.get("retrieved_tools") or {}
+        if retrieval.get("query") == user_message:
+            tools_list = retrieval.get("results", [])
+        else:
+            _, _, tools_list = get_tool_retriever().retrieve_tool_and_score(user_message, k=4)
+        candidate_tools = []
+        for tool_key, score in tools_list:
+            print(f"Retrieved candidate: {tool_key} (Score: {score:.2f})")
+            if tool_key in routing_cards:
+                candidate_tools.append({"name": tool_key, "score": round(score, 3)})
+
+        # 5. Tiered routing: deterministic tiers, then the trained classifier, the routing LLM only when unsure
+        route_start = time.perf_counter()
+        shadow_decision = None
+        parsed_decision = route_deterministic(user_message, current_intent_tool, tools_list)
+        intent_classifier = model_registry.get("intent_classifier")
+        if parsed_decision is None and intent_classifier is not None:
+            parsed_decision = intent_classifier.route(
+                user_message, get_tool_retriever().embed_query(user_message), current_intent_tool, tools_list
+            )
+        if parsed_decision is not None:
+            routing_tier = parsed_decision["tier"]
+            if should_shadow_llm():
+                shadow_decision = llm_route_decision(routing_history, user_message, current_intent_tool, candidate_tools)
+        else:
+            parsed_decision = llm_route_decision(routing_history, user_message, current_intent_tool, candidate_tools)
+            routing_tier = "llm" if parsed_decision else "fallback"
+        routing_ms = (time.perf_counter() - route_start) * 1000
+        previous_intent_tool = current_intent_tool
+
+        # Tools of the active intent(s); a multi-task turn has more than one
+        intent_tools = state.get("intent_tools") or ([current_intent_tool] if current_intent_tool else [])
 
         # 8. Fallback if LLM fails to give JSON
         if not parsed_decision or not isinstance(parsed_decision, dict):
@@ -345,33 +481,47 @@ def chatbot(state: StateBase) -> StateBase:
             print(f"top_score: {top_score}")
             if top_score >= INTENT_CHANGE_THRESHOLD and top_tool_name:
                 current_intent_tool = top_tool_name
+                intent_tools = [top_tool_name]
                 print(f"Fallback: INTENT SET to {current_intent_tool}")
             elif not current_intent_tool and top_tool_name:
                 current_intent_tool = top_tool_name
+                intent_tools = [top_tool_name]
         else:
             decision = parsed_decision.get("decision", "").lower()
-            selected = parsed_decision.get("selected_tool")
+            selected = parsed_decision.get("selected_tools")
+            if selected is None:
+                # Older single-tool format
+                selected = [parsed_decision.get("selected_tool")]
+            if isinstance(selected, str):
+                selected = [selected]
+            selected = list(dict.fromkeys(t for t in selected if t in TOOL_REGISTRY))
             reason = parsed_decision.get("reason", "No reason")
 
-            print(f"LLM Decision: {decision} | Tool: {selected} | Reason: {reason}")
+            print(f"LLM Decision: {decision} | Tools: {selected} | Reason: {reason}")
 
             if decision == "followup":
                 # keep current tool (even if None → will stay conversational)
                 pass
             elif decision == "new":
-                current_intent_tool = selected if selected != "none" else None
-                print(f"INTENT SWITCHED → {current_intent_tool}")
+                intent_tools = selected
+                current_intent_tool = selected[0] if selected else None
+                print(f"INTENT SWITCHED → {intent_tools or None}")
 
         # 9. Update state
         state["current_intent_tool"] = current_intent_tool
+        log_routing_decision(
+            user_message, previous_intent_tool, tools_list,
+            {"decision": (parsed_decision or {}).get("decision", "fallback"), "selected_tools": intent_tools},
+            routing_tier, routing_ms, shadow_decision
+        )
 
-        # 10. Bind only the decided tool (or top-2 candidates if undecided)
+        # 10. Bind the decided tool(s) (or top-2 candidates if undecided)
         tools_to_bind = []
-        if current_intent_tool and current_intent_tool in TOOL_REGISTRY:
-            tool_obj = TOOL_REGISTRY[current_intent_tool].get("tool")
+        for intent_tool in intent_tools:
+            tool_obj = TOOL_REGISTRY.get(intent_tool, {}).get("tool")
             if tool_obj:
                 tools_to_bind.append(tool_obj)
-        else:
+        if not tools_to_bind:
             # fallback: bind top-2 candidates
             for cand in candidate_tools[:2]:
                 obj = TOOL_REGISTRY.get(cand["name"], {}).get("tool")
@@ -380,63 +530,34 @@ def chatbot(state: StateBase) -> StateBase:
 
         print(f"Binding tools: {[t.name for t in tools_to_bind]}")
 
-        # 11. Main LLM messages
-        # 11. Build structured messages for the agent
-
-        # Add current time in IST
-        ist_offset = timedelta(hours=5, minutes=30)
-        current_time_ist = datetime.now(timezone(ist_offset)).strftime("%Y-%m-%d %H:%M:%S IST")
-        time_context_msg = SystemMessage(content=f"Current Date and Time (IST): {current_time_ist}")
-
-        messages_for_llm = [
-            system_prompt_msg,
-            time_context_msg
-        ]
-
-
-
-
-        # Add intent-specific schema if available
-        if current_intent_tool:
-            schema = TOOL_REGISTRY.get(current_intent_tool, {}).get("schema", {})
-            messages_for_llm.append(
-                SystemMessage(
-                    content=(
-                        f"Current intent: '{current_intent_tool}'. "
-                        f"Extract parameters ONLY for this tool.\n\n"
-                        f"Schema:\n{json.dumps(schema, indent=2)}"
-                    )
-                )
-            )
-        else:
-            messages_for_llm.append(
-                SystemMessage(content="No matched tool. Respond as a helpful assistant.")
-            )
-
-        # IMPORTANT: append ONLY Message objects (not strings)
-        messages_for_llm.extend(state["messages"])
-
-        # 12. Main LLM call
-        main_llm = ChatOllama(
-            base_url="http://localhost:11434",
-            model="gpt-oss:20b",
-            temperature=0.0,
-            repeat_penalty=10,
-            num_predict=4096,
-            rate_limiter=rate_limiter,
-            extract_reasoning=True,
-            stop=["<|call|>"]
+        # 11. Prompt: static → dynamic (system prompt, date, intent schema(s), summary, conversation).
+        # Recent messages fill the token budget left by the fixed prompt and the reply; older ones are
+        # folded into the rolling summary.
+        prompt_intent_tools = intent_tools or ([current_intent_tool] if current_intent_tool else [])
+        reserved_tokens = (count_message_tokens(prompt_builder.fixed_messages(prompt_intent_tools), tools_to_bind or tools)
+                           + llm_clients.profiles["tool_calling"].num_predict)
+        history = history_manager.select(
+            state["messages"], state.get("memory_context", ""), state.get("memory_watermark"), reserved_tokens
+        )
+        memory_update = {"memory_context": history.memory_context, "memory_watermark": history.memory_watermark}
+        messages_for_llm = prompt_builder.tool_calling_messages(
+            history.recent, prompt_intent_tools, history.memory_context
         )
 
-        llm_with_tools = main_llm.bind_tools(tools_to_bind or tools)  # fallback to all tools if empty
-        response = llm_with_tools.invoke(messages_for_llm)
+        # 12. Main LLM call, streamed: tools start as soon as their arguments are complete
+        # (fallback to all tools if none were bound)
+        response = stream_tool_calls(
+            messages_for_llm, tools_to_bind or tools, current_intent_tool, max(len(intent_tools), 1)
+        )
 
         # 13. Native tool calls (LangChain format)
         if getattr(response, "tool_calls", None):
             print("Native tool_calls detected.")
             return {
-                "messages": state["messages"] + [response],
-                "current_intent_tool": current_intent_tool
+                "messages": [response],
+                "current_intent_tool": current_intent_tool,
+                "intent_tools": intent_tools,
+                **memory_update
             }
 
         # 14. Fallback JSON extraction for Ollama raw output
@@ -451,32 +572,44 @@ def chatbot(state: StateBase) -> StateBase:
 
         if parsed_json and current_intent_tool:
             print(f"Extracted JSON for {current_intent_tool}")
+            args = parsed_json.get("parameters", parsed_json.get("arguments", parsed_json))
+            valid_args = validate_tool_args(current_intent_tool, args)
+            if valid_args is None:
+                # Arguments were attempted but are malformed: one schema-constrained retry
+                valid_args = extract_tool_args(current_intent_tool, messages_for_llm)
             return {
-                "messages": state["messages"] + [AIMessage(
+                "messages": [AIMessage(
                     content=response.content,
                     tool_calls=[{
                         "name": current_intent_tool,
-                        "args": parsed_json.get("parameters", parsed_json.get("arguments", {})),
+                        "args": valid_args if valid_args is not None else args,
                         "id": str(uuid.uuid4())
                     }]
                 )],
-                "current_intent_tool": current_intent_tool
+                "current_intent_tool": current_intent_tool,
+                "intent_tools": intent_tools,
+                **memory_update
             }
 
         # 15. Plain text response
         content = getattr(response, "content", "Sorry, I couldn't generate a response.")
         return {
-            "messages": state["messages"] + [AIMessage(content=content)],
-            "current_intent_tool": current_intent_tool
+            "messages": [AIMessage(content=content)],
+            "current_intent_tool": current_intent_tool,
+            "intent_tools": intent_tools,
+            **memory_update
         }
 
+    except TurnCancelled:
+        raise
     except Exception as e:
         print(f"ERROR in chatbot: {e}")
         import traceback
         traceback.print_exc()
         return {
             "messages": state.get("messages", []) + [AIMessage(content="Something went wrong. Please try again.")],
-            "current_intent_tool": None
+            "current_intent_tool": None,
+            "intent_tools": []
         }
 
 # ============================================
@@ -536,17 +669,10 @@ def handle_response_exception(state, response, current_intent_tool):
         }
 
 
-def chatbot_response(state: StateBase):
-    """
-    The main response function, primarily intended to process and format tool outputs.
-    """
-    try:
-        # 1. Retrieve the current tool state
-        current_intent_tool = state.get("current_intent_tool")
-
-        system_message = [SystemMessage(
-            content=(
-                """
+# Static formatting instructions (cached prefix for every formatting call)
+FORMATTING_PROMPT_MSG = SystemMessage(
+    content=(
+        """
                 You are **TBO Co-Pilot**. Your ONLY job is to display tool responses clearly.
 
                 📌 RULES
@@ -554,9 +680,29 @@ def chatbot_response(state: StateBase):
                 2. You may reformat for readability — but never change values.  
                 3. If the tool returns nothing/null → say: **"The tool did not return any data."**
                 """
-            )
-        )]
+    )
+)
+
+# Boot warmup and business-hours keep-alive for every profile's model, with each
+# profile's real prompt prefix (started by api_service)
+llm_warmup = LLMWarmup(
+    llm_clients,
+    {
+        "routing": lambda: [INTENT_DECISION_PROMPT_MSG],
+        "tool_calling": lambda: [prompt_builder.system_message, date_context_message()],
+        "formatting": lambda: [FORMATTING_PROMPT_MSG],
+    },
+    llm_config().warmup
+)
+
 
+def chatbot_response(state: StateBase):
+    """
+    The main response function, primarily intended to process and format tool outputs.
+    """
+    try:
+        # 1. Retrieve the current tool state
+        current_intent_tool = state.get("current_intent_tool")
 
         # Ensure messages list is not empty before accessing the last element
         if not state["messages"]:
@@ -573,19 +719,43 @@ def chatbot_response(state: StateBase):
             last_message_content = state["messages"][-1].content
 
             # The LLM's role is to reformat the tool output (last_message_content)
-            response = llm.invoke(system_message + [HumanMessage(content=last_message_content)])
+            response = llm_clients.invoke("formatting", [FORMATTING_PROMPT_MSG, HumanMessage(content=last_message_content)])
 
             # 4. Use the corrected handler with all required arguments
             return handle_response_exception(state, response, current_intent_tool)
 
-        # 5. Passthrough (if it wasn't a tool result to be processed)
+        # 5. Several tool results from a multi-task turn → merge them into one response
+        trailing_tool_messages = []
+        for message in reversed(state["messages"]):
+            if not isinstance(message, ToolMessage):
+                break
+            trailing_tool_messages.insert(0, message)
+
+        if len(trailing_tool_messages) > 1:
+            merged_content = merge_tool_results(trailing_tool_messages)
+            return {
+                "messages": state["messages"] + [AIMessage(content=merged_content)],
+                "current_intent_tool": current_intent_tool,
+                "page_cursor": json.loads(merged_content).get("cursor_id")
+            }
+
+        # 6. Passthrough (if it wasn't a tool result to be processed)
         # This state typically shouldn't be reached if the flow is: User -> Tool -> LLM
         # But if it is, we return the state as is, without adding a new message.
+        # Remember the result's cursor (if any) so a "show more" can page it.
+        try:
+            page_cursor = json.loads(state["messages"][-1].content).get("cursor_id")
+        except Exception:
+            page_cursor = None
+
         return {
             "messages": state["messages"],
-            "current_intent_tool": current_intent_tool
+            "current_intent_tool": current_intent_tool,
+            "page_cursor": page_cursor
         }
 
+    except TurnCancelled:
+        raise
     except Exception as e:
         print(f"❌ ERROR in chatbot_response: {e}")
         # Return an error message while preserving the full history and tool state
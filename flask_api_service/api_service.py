@@ -5,13 +5,14 @@ import tempfile
 import uuid
 import time
 from pathlib import Path
-from flask import request, jsonify, Flask, g, send_file, render_template
+from flask import request, jsonify, Flask, g, send_file, render_template, Response, stream_with_context
 from flask_cors import CORS
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, ToolMessage, AIMessageChunk
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver, InMemorySaver
 from langgraph.constants import START, END
 from langgraph.graph import StateGraph
-from langgraph.prebuilt.tool_node import ToolNode, tools_condition
+from langgraph.prebuilt.tool_node import tools_condition
 from applications.scylla.init_scylla import ScyllaConnection
 from StateBase import StateBase
 from api_call import get_api
@@ -21,14 +22,28 @@ from applications.milvus.connect_milvus import MilvusDB
 
 
 from flask_api_service.session_middleware import session_middleware
-from flask_api_service.tool_setup import tools
+from flask_api_service.data_query import DATA_FILES, QueryError, query_dataset, query_etag, \
+    compressed_json_response, negotiate_encoding, precompressed_path
+from tools.dataset import get_dataset
+from tools.result_cache import result_cache
+from tools.cursor_cache import cursor_scope
+from applications.metrics.mod import metrics
+from applications.embeddings.mod import get_embedding_service, get_rag_embedding_service
+from applications.model_registry.mod import model_registry
 from db_queries.queries import insert_user_chat_mapping, get_user_chat_mapping_by_id, update_chat_name_by_id, \
     get_user_all_chats, upsert_chat_conversation, get_user_chat_conversation, delete_chat_by_id
 from applications.logger.mod import generate_app_log, LogLevels
 
-from flask_api_service.api_helper import whisper_model, chatbot, chatbot_response
+from flask_api_service.api_helper import chatbot, chatbot_response, fast_lane, fast_lane_condition, tool_executor, \
+    llm_warmup
 
-from flask_api_service.api_helper import system_prompt
+from flask_api_service.prompt_builder import prompt_cache_stats
+from flask_api_service.llm_clients import llm_clients
+from flask_api_service.job_queue import JobQueue
+from flask_api_service.constants import JOB_STREAM_TIMEOUT_SECONDS, TURN_CANCELLED_TEXT
+from flask_api_service.admission import admission, admission_control, take_admission_ticket, too_many_requests
+from flask_api_service.deadline import Deadline, TurnCancelled, active_deadline, config_deadline, request_deadline
+from flask_api_service.tool_executor import merge_tool_results
 
 logging.basicConfig(level=logging.WARNING)
 
@@ -37,17 +52,56 @@ app = Flask(__name__)
 UPLOAD_DIR = Path("./uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Longest silence on an SSE stream while the graph is busy
+SSE_HEARTBEAT_SECONDS = 1.0
+
 CORS(app)
 
+def timed_node(name, node):
+    """
+    Wrap a graph node so its latency is reported per node (node_ms on /metrics).
+    The turn's deadline (config configurable.deadline) is checked before the node
+    runs and is active while it runs, so its LLM calls can be aborted. Tool calls
+    made by the node store and page result cursors in the conversation's scope.
+    """
+    def run(state, config: RunnableConfig):
+        deadline = config_deadline(config)
+        configurable = config.get("configurable") or {}
+        conversation = f"{configurable.get('user_id')}/{configurable.get('thread_id')}"
+        if deadline is not None and deadline.reason:
+            metrics.incr("nodes_skipped", node=name, reason=deadline.reason)
+            raise TurnCancelled(deadline.reason, name)
+        start = time.perf_counter()
+        try:
+            with active_deadline(deadline), cursor_scope(conversation):
+                return node(state)
+        except TurnCancelled as e:
+            e.node = e.node or name
+            metrics.incr("nodes_cancelled", node=name, reason=e.reason)
+            raise
+        finally:
+            metrics.observe("node_ms", (time.perf_counter() - start) * 1000, node=name)
+    return run
+
+
 graph_builder = StateGraph(StateBase)
-graph_builder.add_node("chatbot", chatbot)
+graph_builder.add_node("fast_lane", timed_node("fast_lane", fast_lane))
+graph_builder.add_node("chatbot", timed_node("chatbot", chatbot))
 
-tool_node = ToolNode(tools=tools)
-graph_builder.add_node("tools", tool_node)
+# Runs all tool calls of a turn concurrently (multi-task turns fan out here); picks up
+# calls chatbot already started while the LLM was streaming
+graph_builder.add_node("tools", timed_node("tools", tool_executor))
 
-graph_builder.add_node("chatbot_response", chatbot_response)
+graph_builder.add_node("chatbot_response", timed_node("chatbot_response", chatbot_response))
 
-graph_builder.add_edge(START, "chatbot")
+graph_builder.add_edge(START, "fast_lane")
+
+# Canned/lookup answers end here; "show more" goes straight to tools
+graph_builder.add_conditional_edges(
+    "fast_lane",
+    fast_lane_condition,
+    {"chatbot": "chatbot", "tools": "tools", END: END}
+)
 
 graph_builder.add_conditional_edges(
     "chatbot",
@@ -60,6 +114,17 @@ graph_builder.add_edge("chatbot_response", END)
 checkpointer = InMemorySaver()
 agent = graph_builder.compile(checkpointer=checkpointer, debug=False)
 
+# Warm the routing models in the background; /health/ready reports ready once they are loaded
+# (MODEL_REGISTRY_BACKGROUND=0 leaves that to the caller, e.g. the startup profiler)
+if os.environ.get("MODEL_REGISTRY_BACKGROUND", "1") != "0":
+    model_registry.start_background_loads()
+    # Load the LLMs with their real prompt prefixes before users arrive; keep them loaded in business hours.
+    # /health/ready also waits until llm.warmup.readiness_profile's model has been warmed on a server
+    llm_warmup.start()
+
+# Probe the Ollama servers in the background (health, and loaded models for affinity routing)
+llm_clients.pool.start_health_checks()
+
 # flask api service
 
 @app.route('/new_chat', methods=['POST'])
@@ -163,17 +228,364 @@ def view_results():
 def get_data_json(data_type):
     # Safe mapping to file paths
     # data_type should be hotels, packages, or flights
-    if data_type not in ['hotels', 'packages', 'flights']:
+    if data_type not in DATA_FILES:
         return jsonify({"error": "Invalid data type"}), 400
-    
-    file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", f"{data_type}.json")
-    if os.path.exists(file_path):
-        return send_file(file_path)
-    else:
+
+    dataset = get_dataset(DATA_FILES[data_type])
+    if not os.path.exists(dataset.path):
         return jsonify({"error": "Data not found"}), 404
 
+    # Serve a precompressed copy when the client accepts it; the ETag is tied to
+    # the dataset version so unchanged files are answered with 304.
+    encoding = negotiate_encoding(request.accept_encodings)
+    file_path = precompressed_path(dataset, encoding) if encoding else dataset.path
+
+    response = send_file(
+        file_path,
+        mimetype="application/json",
+        etag=f"{dataset.version}-{encoding or 'identity'}",
+        conditional=True
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+@app.route('/api/query/<data_type>')
+def query_data(data_type):
+    # Filtered / sorted / paginated view over a dataset, e.g.
+    # /api/query/flights?destination__contains=maldives&sort=price&limit=20&fields=id,airline,price
+    if data_type not in DATA_FILES:
+        return jsonify({"status": False, "msg": "Invalid data type"}), 400
+
+    params = request.args.to_dict(flat=True)
+    try:
+        etag = query_etag(data_type, params)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            return response
+
+        result = query_dataset(data_type, params)
+    except QueryError as e:
+        return jsonify({"status": False, "msg": str(e)}), 400
+
+    return compressed_json_response(result, etag, request.accept_encodings)
+
+# ============================================
+# QUERY TURN HELPERS
+# (shared by /handle_user_query and its streaming variant)
+# ============================================
+
+# Nodes whose ToolMessages are fresh tool results (chatbot_response passes the whole history through)
+TOOL_RESULT_NODES = ("tools", "fast_lane")
+
+
+def query_turn(query, user_id, deadline=None):
+    """Graph input and config for one user query."""
+    config = {
+        "configurable": {
+            "thread_id": "bc9f871c-6f26-44cc-853c-8ac98209e37d",
+            "user_id": user_id,
+            "deadline": deadline
+        }
+    }
+
+    # The system prompt is added by chatbot's prompt builder, not stored in the history
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": query}]},
+    ]
+    return {"messages": messages, "user_id": str(user_id)}, config
+
+
+def query_error_response(current_time, data=None, graph_type=None, graph_title="", image=False, video=False,
+                         audio=False):
+    raw_response = "Sorry, could not answer your question, please try again later.."
+    return {
+        "status": False,
+        "text": raw_response,
+        "data": data,
+        "end_prompt": False,
+        "table": False,
+        "is_downloadable": False,
+        "graph": False,
+        "graph_type": graph_type if graph_type is not None else [],
+        "graph_title": graph_title,
+        "timestamp": current_time,
+        "image": image,
+        "video": video,
+        "audio": audio
+    }
+
+
+def query_response(query, raw_content, current_time):
+    """Response envelope and status code for the graph's final message content."""
+    data = None
+    is_downloadable = False
+    ai_response_text = None
+    is_end_prompt = False
+    is_table_response = False
+    is_plot_graph = False
+    graph_type = []
+    graph_title = ""
+    file_name = ""
+    file_url = ""
+    image = False
+    video = False
+    audio = False
+    button = False
+    button_text = []
+    cursor_id = None
+
+    if isinstance(raw_content, str):
+        try:
+            parsed_json = json.loads(raw_content)
+            ai_response_text = parsed_json.get("text")
+            is_end_prompt = parsed_json.get("end_prompt", False)
+            is_table_response = parsed_json.get("table", False)
+            is_plot_graph = parsed_json.get("graph", False)
+            graph_type = parsed_json.get("graph_type", [])
+            graph_title = parsed_json.get("graph_title", "")
+            data = parsed_json.get("data")
+            is_downloadable = parsed_json.get("is_downloadable", False)
+            file_name = parsed_json.get("file_name", "")
+            file_url = parsed_json.get("file_url", "")
+            image = parsed_json.get("image", False)
+            video = parsed_json.get("video", False)
+            audio = parsed_json.get("audio", False)
+            button = parsed_json.get("button", False)
+            button_text = parsed_json.get("button_text", [])
+            search_type = parsed_json.get("search_type", "")
+            cursor_id = parsed_json.get("cursor_id")
+
+        except json.JSONDecodeError as ev:
+            print(ev)
+            ai_response_text = raw_content
+            search_type = ""
+    else:
+        ai_response_text = raw_content
+        search_type = ""
+
+    if ai_response_text is None:
+        print("ai_response_text is None")
+        return {
+            "status": False,
+            "text": "Sorry, could not answer your question, please try again later..",
+            "data": data,
+            "end_prompt": False,
+            "table": False,
+            "is_downloadable": False,
+            "graph": False,
+            "graph_type": graph_type,
+            "graph_title": graph_title,
+            "timestamp": current_time,
+            "image": image,
+            "video": video,
+            "audio": audio
+        }, 400
+
+    conversation_data = {
+        "user_query": query,
+        "ai_response": ai_response_text,
+        "data": data,
+        "timestamp": current_time,
+        "response_type": "text",
+        "end_prompt": is_end_prompt,
+        "table": is_table_response,
+        "graph": is_plot_graph,
+        "graph_type": graph_type,
+        "graph_title": graph_title,
+        "is_downloadable": is_downloadable,
+        "image": image,
+        "video": video,
+        "audio": audio,
+        "button": button,
+        "button_text": button_text
+    }
+
+    # conversation_updated: bool = upsert_chat_conversation(user_id, chat_id, conversation_data)
+    # if not conversation_updated:
+    #     print(f"[{function_name}] Failed to update conversation: {chat_id}")
+
+    return {
+        "status": True,
+        "text": ai_response_text,
+        "data": data,
+        "end_prompt": is_end_prompt,
+        "table": is_table_response,
+        "is_downloadable": is_downloadable,
+        "graph": is_plot_graph,
+        "graph_type": graph_type,
+        "graph_title": graph_title,
+        "timestamp": current_time,
+        "image": image,
+        "video": video,
+        "audio": audio,
+        "button": button,
+        "button_text": button_text,
+        "search_type": search_type,
+        "cursor_id": cursor_id
+    }, 200
+
+
+def cancelled_turn_response(query, config, current_time, cancelled):
+    """
+    Best answer left when a turn is cancelled: the tool result(s) of this turn
+    without the formatting step (marked "degraded"), or a try-again message.
+    """
+    print(f"Turn cancelled ({cancelled.reason}) in {cancelled.node}")
+    metrics.incr("turns_cancelled", reason=cancelled.reason, node=cancelled.node or "")
+    tool_results = []
+    for message in reversed(agent.get_state(config).values.get("messages", [])):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, ToolMessage):
+            tool_results.insert(0, message)
+
+    if tool_results:
+        content = tool_results[0].content if len(tool_results) == 1 else merge_tool_results(tool_results)
+        response_data, status_code = query_response(query, content, current_time)
+        if status_code == 200:
+            metrics.incr("turns_degraded", reason=cancelled.reason)
+            return dict(response_data, degraded=True), 200
+
+    return dict(query_error_response(current_time), text=TURN_CANCELLED_TEXT, degraded=True), 504
+
+
+def sse_event(event, payload):
+    if event == "ping":
+        return ": ping\n\n"
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+def tool_result_card(message):
+    """A tool's envelope as sent to the client (plain-text tool output is wrapped as {"text": ...})."""
+    content = message.content
+    if isinstance(content, str):
+        try:
+            parsed = json.loads(content)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+    return {"text": content}
+
+
+def stream_turn_events(graph_input, config):
+    """
+    Events of one graph run as (event, payload): node progress, each tool's
+    result card once its node finishes, and the formatting LLM's tokens as they
+    are generated. While other LLMs are generating, a "ping" goes out every
+    SSE_HEARTBEAT_SECONDS.
+    """
+    node_started = {}
+    last_event = time.monotonic()
+    deadline = config_deadline(config)
+    graph_events = agent.stream(graph_input, config=config, stream_mode=["tasks", "messages"])
+    completed = False
+    try:
+        for mode, payload in graph_events:
+            if mode == "tasks":
+                last_event = time.monotonic()
+                name = payload["name"]
+                if "result" not in payload:
+                    node_started[payload["id"]] = time.perf_counter()
+                    yield "node", {"node": name, "status": "started"}
+                    continue
+                started = node_started.pop(payload["id"], None)
+                yield "node", {
+                    "node": name,
+                    "status": "error" if payload.get("error") else "done",
+                    "ms": round((time.perf_counter() - started) * 1000, 1) if started else None
+                }
+                if name in TOOL_RESULT_NODES:
+                    for message in (payload.get("result") or {}).get("messages", []) or []:
+                        if isinstance(message, ToolMessage):
+                            yield "tool_result", {"tool": message.name, "card": tool_result_card(message)}
+            else:
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") == "chatbot_response" and isinstance(chunk, AIMessageChunk) \
+                        and isinstance(chunk.content, str) and chunk.content:
+                    last_event = time.monotonic()
+                    yield "token", {"text": chunk.content}
+                elif time.monotonic() - last_event >= SSE_HEARTBEAT_SECONDS:
+                    # Writing is the only way to notice a client that has gone away
+                    last_event = time.monotonic()
+                    yield "ping", {}
+        completed = True
+    finally:
+        if not completed and deadline is not None:
+            # Closed early (client gone): cancel before closing the graph stream, which waits for
+            # the running node; its LLM request is then aborted at the next chunk
+            deadline.cancel()
+        graph_events.close()
+
+
+def turn_events(query, user_id, api_name, start_time, deadline):
+    """
+    Run one user query through the graph, yielding its events, then
+    ("status", {"status_code"}) with the HTTP status /handle_user_query would
+    answer with and finally ("final", body), body being exactly what it returns.
+    Closing the generator early (the client went away) cancels the turn.
+    """
+    current_time = int(time.time() * 1000)
+    graph_input, config = query_turn(query, user_id, deadline)
+    finished = False
+    try:
+        try:
+            yield from stream_turn_events(graph_input, config)
+            raw_content = agent.get_state(config).values["messages"][-1].content
+            response_data, status_code = query_response(query, raw_content, current_time)
+            if status_code == 200:
+                # Log Response
+                generate_app_log(
+                    api_name=api_name,
+                    log_level=LogLevels.Info,
+                    message=f"Response: {json.dumps(response_data, default=str)}",
+                    start_time=start_time,
+                    reference_id=user_id,
+                    user_id=user_id
+                )
+        except TurnCancelled as e:
+            response_data, status_code = cancelled_turn_response(query, config, current_time, e)
+        except Exception as e:
+            print(e)
+            response_data, status_code = query_error_response(current_time), 400
+        finished = True
+    finally:
+        if not finished:
+            metrics.incr("turns_cancelled", reason="disconnected", node="")
+    yield "status", {"status_code": status_code}
+    yield "final", response_data
+
+
+def sse_stream(events):
+    return Response(
+        stream_with_context(sse_event(event, payload) for event, payload in events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def run_turn_job(job):
+    # The ticket taken at submission counts towards the in-flight cap while the job
+    # is queued and running; only the run time feeds the average turn time
+    admission.restart(job.ticket)
+    try:
+        for event, payload in turn_events(job.query, job.user_id, "handle_user_query_job",
+                                          int(job.submitted_at * 1000), Deadline(job.deadline_seconds)):
+            if event != "ping":
+                yield event, payload
+    finally:
+        admission.release(job.ticket)
+
+
+job_queue = JobQueue(run_turn_job)
+
+
 @app.route('/handle_user_query', methods=['POST'])
 @session_middleware
+@admission_control
 def handle_user_query():
     function_name = "handle_user_query"
     api_name = "handle_user_query"
@@ -194,21 +606,6 @@ def handle_user_query():
     )
 
     current_time = int(time.time() * 1000)
-    data = None
-    is_downloadable = False
-    ai_response_text = None
-    is_end_prompt = False
-    is_table_response = False
-    is_plot_graph = False
-    graph_type = []
-    graph_title = ""
-    file_name = ""
-    file_url = ""
-    image = False
-    video = False
-    audio = False
-    button = False
-    button_text = []
 
     try:
 
@@ -256,146 +653,132 @@ def handle_user_query():
         #         print(f"[{function_name}] Update chat name failed: {chat_name}")
 
 
-        config = {
-            "configurable": {
-                "thread_id": "bc9f871c-6f26-44cc-853c-8ac98209e37d",
-                "user_id": user_id
-            }
-        }
+        graph_input, config = query_turn(query, user_id, request_deadline(data))
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": [{"type": "text", "text": query}]},
-        ]
+        try:
+            response = agent.invoke(graph_input, config=config)
+        except TurnCancelled as e:
+            response_data, status_code = cancelled_turn_response(query, config, current_time, e)
+            return jsonify(response_data), status_code
 
-        response = agent.invoke({"messages": messages, "user_id": str(user_id)}, config=config)
+        raw_content = response["messages"][-1].content
 
-        raw_response = response["messages"][-1]
+        print(raw_content)
 
-        raw_content = raw_response.content
+        response_data, status_code = query_response(query, raw_content, current_time)
+        if status_code == 200:
+            # Log Response
+            generate_app_log(
+                api_name=api_name,
+                log_level=LogLevels.Info,
+                message=f"Response: {json.dumps(response_data, default=str)}",
+                start_time=start_time,
+                reference_id=user_id,
+                user_id=user_id
+            )
 
-        print(raw_content)
+        return jsonify(response_data), status_code
 
-        if isinstance(raw_content, str):
-            try:
-                parsed_json = json.loads(raw_content)
-                ai_response_text = parsed_json.get("text")
-                is_end_prompt = parsed_json.get("end_prompt", False)
-                is_table_response = parsed_json.get("table", False)
-                is_plot_graph = parsed_json.get("graph", False)
-                graph_type = parsed_json.get("graph_type", [])
-                graph_title = parsed_json.get("graph_title", "")
-                data = parsed_json.get("data")
-                is_downloadable = parsed_json.get("is_downloadable", False)
-                file_name = parsed_json.get("file_name", "")
-                file_url = parsed_json.get("file_url", "")
-                image = parsed_json.get("image", False)
-                video = parsed_json.get("video", False)
-                audio = parsed_json.get("audio", False)
-                button = parsed_json.get("button", False)
-                button_text = parsed_json.get("button_text", [])
-                search_type = parsed_json.get("search_type", "")
-
-            except json.JSONDecodeError as ev:
-                print(ev)
-                ai_response_text = raw_content
-                search_type = ""
-        else:
-            ai_response_text = raw_content
-            search_type = ""
+    except Exception as e:
+        print(e)
+        return jsonify(query_error_response(current_time)), 400
 
-        if ai_response_text is None:
-            print("ai_response_text is None")
-            return (jsonify({
-                "status": False,
-                "text": "Sorry, could not answer your question, please try again later..",
-                "data": data,
-                "end_prompt": False,
-                "table": False,
-                "is_downloadable": False,
-                "graph": False,
-                "graph_type": graph_type,
-                "graph_title": graph_title,
-                "timestamp": current_time,
-                "image": image,
-                "video": video,
-                "audio": audio
-            }), 400)
 
-        
-        conversation_data = {
-            "user_query": query,
-            "ai_response": ai_response_text,
-            "data": data,
-            "timestamp": current_time,
-            "response_type": "text",
-            "end_prompt": is_end_prompt,
-            "table": is_table_response,
-            "graph": is_plot_graph,
-            "graph_type": graph_type,
-            "graph_title": graph_title,
-            "is_downloadable": is_downloadable,
-            "image": image,
-            "video": video,
-            "audio": audio,
-            "button": button,
-            "button_text": button_text
-        }
+@app.route('/handle_user_query/stream', methods=['POST'])
+@session_middleware
+@admission_control
+def handle_user_query_stream():
+    """
+    Streaming variant of /handle_user_query (Server-Sent Events):
+
+        event: node         {"node", "status": "started" | "done" | "error", "ms"}
+        event: tool_result  {"tool", "card"}   the tool's envelope, as soon as the tool returns
+        event: token        {"text"}           formatted text as the formatting LLM writes it
+        event: status       {"status_code"}    the HTTP status /handle_user_query would answer with
+        event: final        the same JSON body /handle_user_query returns
+
+    Disconnecting cancels the turn; its running LLM request is aborted.
+    """
+    api_name = "handle_user_query_stream"
+    data = request.json
+    query = data.get('query')
+    user_id = g.user_id
 
-        # conversation_updated: bool = upsert_chat_conversation(user_id, chat_id, conversation_data)
-        # if not conversation_updated:
-        #     print(f"[{function_name}] Failed to update conversation: {chat_id}")
+    start_time = int(time.time() * 1000)
+    # Log Request
+    generate_app_log(
+        api_name=api_name,
+        log_level=LogLevels.Info,
+        message=f"Request: {json.dumps(data, default=str)}",
+        start_time=start_time,
+        reference_id=user_id,
+        user_id=user_id
+    )
 
+    return sse_stream(turn_events(query, user_id, api_name, start_time, request_deadline(data)))
 
-        response_data = {
-            "status": True,
-            "text": ai_response_text,
-            "data": data,
-            "end_prompt": is_end_prompt,
-            "table": is_table_response,
-            "is_downloadable": is_downloadable,
-            "graph": is_plot_graph,
-            "graph_type": graph_type,
-            "graph_title": graph_title,
-            "timestamp": current_time,
-            "image": image,
-            "video": video,
-            "audio": audio,
-            "button": button,
-            "button_text": button_text,
-            "search_type": search_type
-        }
-        
-        # Log Response
-        generate_app_log(
-            api_name=api_name,
-            log_level=LogLevels.Info,
-            message=f"Response: {json.dumps(response_data, default=str)}",
-            start_time=start_time,
-            reference_id=user_id,
-            user_id=user_id
-        )
-
-        return jsonify(response_data), 200
 
-    except Exception as e:
-        print(e)
-        raw_response = "Sorry, could not answer your question, please try again later.."
-        return jsonify({
-            "status": False,
-            "text": raw_response,
-            "data": data,
-            "end_prompt": False,
-            "table": False,
-            "is_downloadable": False,
-            "graph": False,
-            "graph_type": graph_type,
-            "graph_title": graph_title,
-            "timestamp": current_time,
-            "image": image,
-            "video": video,
-            "audio": audio
-        }), 400
+@app.route('/handle_user_query/jobs', methods=['POST'])
+@session_middleware
+@admission_control
+def submit_user_query_job():
+    """
+    Async variant of /handle_user_query: queues the turn and returns its job id
+    at once (202). Poll GET /handle_user_query/jobs/<job_id> for the result, or
+    follow GET /handle_user_query/jobs/<job_id>/stream for its events.
+    """
+    api_name = "submit_user_query_job"
+    data = request.json
+    query = data.get('query')
+    user_id = g.user_id
+
+    start_time = int(time.time() * 1000)
+    # Log Request
+    generate_app_log(
+        api_name=api_name,
+        log_level=LogLevels.Info,
+        message=f"Request: {json.dumps(data, default=str)}",
+        start_time=start_time,
+        reference_id=user_id,
+        user_id=user_id
+    )
+
+    ticket = take_admission_ticket()
+    job = job_queue.submit(user_id, query, ticket, request_deadline(data).seconds)
+    if job is None:
+        admission.release(ticket, record=False)
+        return too_many_requests(job_queue.retry_after())
+
+    return jsonify({
+        "status": True,
+        "job_id": job.id,
+        "job_status": job.status,
+        "queue_position": job_queue.position(job)
+    }), 202
+
+
+def _user_job(job_id):
+    job = job_queue.get(job_id)
+    return job if job is not None and job.user_id == g.user_id else None
+
+
+@app.route('/handle_user_query/jobs/<job_id>', methods=['GET'])
+@session_middleware
+def get_user_query_job(job_id):
+    job = _user_job(job_id)
+    if job is None:
+        return jsonify({"status": False, "msg": "Job not found"}), 404
+    return jsonify(dict(job.to_dict(), status=True, queue_position=job_queue.position(job))), 200
+
+
+@app.route('/handle_user_query/jobs/<job_id>/stream', methods=['GET'])
+@session_middleware
+def stream_user_query_job(job_id):
+    """The job's events (replayed from the start) as Server-Sent Events, ending with "final"."""
+    job = _user_job(job_id)
+    if job is None:
+        return jsonify({"status": False, "msg": "Job not found"}), 404
+    return sse_stream(job.follow(JOB_STREAM_TIMEOUT_SECONDS))
 
 
 
@@ -476,7 +859,7 @@ def transcribe():
         tmp_path = tmp.name
 
     try:
-        result = whisper_model.transcribe(tmp_path, language="en")  # force English
+        result = model_registry.get("whisper").transcribe(tmp_path, language="en")  # force English
         return jsonify({"text": result["text"].strip()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -485,10 +868,36 @@ def transcribe():
 
 
 @app.route("/health", methods=["GET"])
+@app.route("/health/live", methods=["GET"])
 def health():
+    """Liveness: the process is up and serving HTTP (existing probes expect 200 "OK")."""
     return "OK", 200
 
 
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    """Readiness: 200 once the required models are loaded and the primary LLM is warm, 503 until then."""
+    status = model_registry.status()
+    status["live"] = True
+    status["llm"] = llm_warmup.status()
+    if not status["llm"]["ready"]:
+        status["ready"] = False
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot["tool_cache"] = result_cache.stats()
+    snapshot["embeddings"] = get_embedding_service().stats()
+    snapshot["rag_embeddings"] = get_rag_embedding_service().stats()
+    snapshot["prompt_cache"] = prompt_cache_stats.snapshot()
+    snapshot["jobs"] = job_queue.snapshot()
+    snapshot["admission"] = admission.snapshot()
+    snapshot["llm_backends"] = llm_clients.pool.snapshot()
+    return jsonify(snapshot), 200
+
+
 if __name__ == '__main__':
 
     import argparse
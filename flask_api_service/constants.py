@@ -5,6 +5,24 @@ COGITO_32B_MODEL = "cogito:32b"
 
 MAX_CONTEXT_TOKENS = 128000  # leave ~25 % margin
 
+# Conversation memory (see history_manager)
+HISTORY_MAX_TOKENS = 8000       # recent messages sent in full to the tool-calling LLM
+SUMMARY_MAX_TOKENS = 600        # rolling summary of older messages (StateBase.memory_context)
+ROUTING_HISTORY_TOKENS = 300    # compressed history in the routing prompt
+ROUTING_CANDIDATES_TOKENS = 400 # candidate tool cards in the routing prompt (see routing_cards)
+
+# Async chat turns (see job_queue); size JOB_WORKERS to the LLM backend's real concurrency
+JOB_WORKERS = 4
+JOB_QUEUE_DEPTH = 32            # waiting jobs before new submissions are turned away
+JOB_RESULT_TTL_SECONDS = 600    # how long finished jobs stay pollable
+JOB_STREAM_TIMEOUT_SECONDS = 300
+
+# Per-request deadline for a chat turn (see deadline); clients may ask for less
+TURN_DEADLINE_SECONDS = 90
+# LLM invoke() calls are streamed (so they can be aborted mid-generation) once less than this is left
+STREAMED_INVOKE_BELOW_SECONDS = 30
+TURN_CANCELLED_TEXT = "This is taking longer than expected. Please try again in a moment."
+
 COMMON_RESPONSE_TEXT = "Currently we are having too many requests. Please try again after sometime."
 
 # collection name
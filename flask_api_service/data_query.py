@@ -0,0 +1,244 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Response
+
+from tools.dataset import Dataset, get_dataset, intersect_positions
+from tools.utils import DATA_DIR
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Public data types served by the query API -> backing data file
+DATA_FILES = {
+    "hotels": "hotels.json",
+    "packages": "packages.json",
+    "flights": "flights.json",
+}
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+MIN_COMPRESS_BYTES = 1024
+RESERVED_PARAMS = {"sort", "limit", "cursor", "fields"}
+FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+FILTER_OPERATORS = ("eq", "contains", "gte", "lte")
+
+COMPRESSED_DIR = os.path.join(DATA_DIR, ".compressed")
+_compress_lock = threading.RLock()
+
+
+class QueryError(Exception):
+    """Raised for malformed query parameters (maps to HTTP 400)."""
+
+
+# ============================================
+# QUERY
+# ============================================
+
+def _parse_filter(param: str) -> Tuple[str, str]:
+    field, _, operator = param.partition("__")
+    operator = operator or "eq"
+    if not FIELD_PATTERN.match(field) or operator not in FILTER_OPERATORS:
+        raise QueryError(f"Unsupported filter: {param}")
+    return field, operator
+
+
+def _to_number(param: str, value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        raise QueryError(f"Filter {param} expects a number, got '{value}'")
+
+
+def _sort_key(field: str):
+    def key(record):
+        value = record.get(field)
+        if value is None:
+            return (1, 0, "")
+        if isinstance(value, (int, float)):
+            return (0, 0, value)
+        return (0, 1, str(value).lower())
+    return key
+
+
+def encode_cursor(offset: int, version: str) -> str:
+    raw = json.dumps({"o": offset, "v": version}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        offset = int(data["o"])
+    except Exception:
+        raise QueryError("Invalid cursor")
+    if data.get("v") != version:
+        raise QueryError("Cursor expired, the dataset has changed. Please restart the query.")
+    return max(0, offset)
+
+
+def _filtered_records(dataset: Dataset, params: Dict[str, str]) -> List[Dict[str, Any]]:
+    index_filters = []
+    numeric_filters = []
+
+    for param, value in params.items():
+        if param in RESERVED_PARAMS:
+            continue
+        field, operator = _parse_filter(param)
+        if operator == "eq":
+            index_filters.append(dataset.positions_equal(field, value))
+        elif operator == "contains":
+            index_filters.append(dataset.positions_contains(field, value))
+        else:
+            numeric_filters.append((field, operator, _to_number(param, value)))
+
+    if index_filters:
+        records = dataset.select(intersect_positions(*index_filters))
+    else:
+        records = list(dataset.records)
+
+    for field, operator, bound in numeric_filters:
+        kept = []
+        for record in records:
+            value = record.get(field)
+            if not isinstance(value, (int, float)):
+                continue
+            if (operator == "gte" and value >= bound) or (operator == "lte" and value <= bound):
+                kept.append(record)
+        records = kept
+
+    return records
+
+
+def query_dataset(data_type: str, params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Filter, sort, paginate and project a dataset.
+
+    Filters are `field=value` (exact), `field__contains=value`, `field__gte=n`
+    and `field__lte=n`. `sort` takes comma-separated fields (prefix `-` for
+    descending), `fields` a comma-separated projection, and `limit`/`cursor`
+    page through the result.
+    """
+    if data_type not in DATA_FILES:
+        raise QueryError("Invalid data type")
+
+    dataset = get_dataset(DATA_FILES[data_type])
+    records = _filtered_records(dataset, params)
+
+    sort_spec = params.get("sort", "")
+    for sort_field in reversed([s.strip() for s in sort_spec.split(",") if s.strip()]):
+        descending = sort_field.startswith("-")
+        field = sort_field.lstrip("-")
+        if not FIELD_PATTERN.match(field):
+            raise QueryError(f"Unsupported sort field: {field}")
+        records = sorted(records, key=_sort_key(field), reverse=descending)
+
+    try:
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise QueryError("limit must be an integer")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    offset = decode_cursor(params["cursor"], dataset.version) if params.get("cursor") else 0
+    page = records[offset:offset + limit]
+
+    fields = [f.strip() for f in params.get("fields", "").split(",") if f.strip()]
+    if fields:
+        page = [{k: record[k] for k in fields if k in record} for record in page]
+
+    next_offset = offset + len(page)
+    return {
+        "status": True,
+        "data": page,
+        "count": len(page),
+        "total": len(records),
+        "next_cursor": encode_cursor(next_offset, dataset.version) if next_offset < len(records) else None,
+        "version": dataset.version,
+    }
+
+
+def query_etag(data_type: str, params: Dict[str, str]) -> str:
+    """ETag for a query: dataset version + canonicalized parameters."""
+    dataset = get_dataset(DATA_FILES[data_type])
+    canonical = json.dumps(sorted(params.items()), separators=(",", ":"))
+    return f"{dataset.version}-{hashlib.sha1(canonical.encode()).hexdigest()[:16]}"
+
+
+# ============================================
+# COMPRESSION
+# ============================================
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """Pick br or gzip from the request's Accept-Encoding (None for identity)."""
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return accept_encodings.best_match(supported)
+
+
+def compress_body(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def compressed_json_response(payload: Dict[str, Any], etag: str, accept_encodings) -> Response:
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    encoding = negotiate_encoding(accept_encodings) if len(body) >= MIN_COMPRESS_BYTES else None
+
+    response = Response(compress_body(body, encoding), status=200, mimetype="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    # Weak ETag: the same representation is served under several encodings
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def precompressed_path(dataset: Dataset, encoding: str) -> str:
+    """
+    Path of a compressed copy of the dataset file for the current version,
+    created on first use. Copies of older versions are removed.
+    """
+    stem = os.path.splitext(dataset.filename)[0]
+    ext = "br" if encoding == "br" else "gz"
+    target = os.path.join(COMPRESSED_DIR, f"{stem}.{dataset.version}.json.{ext}")
+    if os.path.exists(target):
+        return target
+
+    with _compress_lock:
+        if os.path.exists(target):
+            return target
+
+        os.makedirs(COMPRESSED_DIR, exist_ok=True)
+        with open(dataset.path, "rb") as f:
+            raw = f.read()
+        if hashlib.sha1(raw).hexdigest()[:16] != dataset.version:
+            # File changed under us; serve what is on disk under its own version
+            dataset.refresh()
+            return precompressed_path(dataset, encoding)
+
+        body = brotli.compress(raw, quality=11) if ext == "br" else gzip.compress(raw, compresslevel=9)
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, target)
+
+        for name in os.listdir(COMPRESSED_DIR):
+            if name.startswith(f"{stem}.") and name.endswith(f".json.{ext}") and name != os.path.basename(target):
+                try:
+                    os.remove(os.path.join(COMPRESSED_DIR, name))
+                except OSError:
+                    pass
+
+    return target
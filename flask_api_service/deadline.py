@@ -0,0 +1,84 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from flask_api_service.constants import TURN_DEADLINE_SECONDS
+
+
+class TurnCancelled(Exception):
+    """The turn ran past its deadline or its client went away; remaining work is dropped."""
+
+    def __init__(self, reason: str, node: Optional[str] = None):
+        super().__init__(f"turn cancelled ({reason})" + (f" in {node}" if node else ""))
+        self.reason = reason  # "deadline" | "disconnected"
+        self.node = node
+
+
+class Deadline:
+    """
+    Per-request time limit, carried in the LangGraph config (configurable.deadline).
+
+    Checked between graph nodes and between LLM stream chunks; cancel() marks
+    the turn as abandoned (client disconnected) from any thread.
+    """
+
+    def __init__(self, seconds: float = TURN_DEADLINE_SECONDS):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why the turn should stop, or None while it may continue."""
+        if self._cancelled.is_set():
+            return "disconnected"
+        if time.monotonic() >= self.expires_at:
+            return "deadline"
+        return None
+
+    def check(self, node: Optional[str] = None) -> None:
+        reason = self.reason
+        if reason:
+            raise TurnCancelled(reason, node)
+
+
+def request_deadline(data: Optional[Dict[str, Any]]) -> Deadline:
+    """The request's deadline: its optional "deadline_seconds", at most TURN_DEADLINE_SECONDS."""
+    seconds = TURN_DEADLINE_SECONDS
+    try:
+        requested = float((data or {}).get("deadline_seconds") or 0)
+    except (TypeError, ValueError):
+        requested = 0
+    if requested > 0:
+        seconds = min(seconds, requested)
+    return Deadline(seconds)
+
+
+def config_deadline(config: Optional[Dict[str, Any]]) -> Optional[Deadline]:
+    return ((config or {}).get("configurable") or {}).get("deadline")
+
+
+# The deadline of the graph node running in this thread (set by api_service.timed_node), so
+# LLM and tool calls can honour it without threading it through every helper
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("turn_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def active_deadline(deadline: Optional[Deadline]):
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
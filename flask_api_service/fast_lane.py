@@ -0,0 +1,118 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.dataset import get_dataset
+
+# Tools whose answers are canned or a lookup, so they can run without any LLM
+# call when the retriever is confident and the arguments are easy to extract.
+FAST_LANE_TOOLS = {"get_cancellation_policy", "get_baggage_policy", "check_booking_status", "view_bookings"}
+
+# Calibrated with `python -m flask_api_service.tool_retriever` (see intent_router)
+FAST_LANE_MIN_SCORE = float(os.environ.get("FAST_LANE_MIN_SCORE", "0.70"))
+FAST_LANE_MIN_MARGIN = float(os.environ.get("FAST_LANE_MIN_MARGIN", "0.05"))
+
+# Short replies mid-conversation are answers to the active flow, not new questions
+FOLLOWUP_MAX_WORDS = 4
+
+BOOKING_TYPE_PATTERN = re.compile(r"\b(flight|hotel|package)s?\b", re.IGNORECASE)
+BOOKING_TYPE_ALIASES = {
+    "room": "hotel", "rooms": "hotel", "stay": "hotel",
+    "ticket": "flight", "tickets": "flight",
+    "holiday": "package", "tour": "package",
+}
+# Ids issued by the booking tools: BKG-<flight id>-<travelers> (flight ids contain "_"),
+# BKG-RANDOM-<n> (book_trip), HTL-<hotel id>-<room> and PKG-<package id>-<travelers>.
+# Ids are case-sensitive, so neither the match nor the result is case-folded.
+BOOKING_ID_PATTERN = re.compile(r"\b(?:BKG|HTL|PKG)-[A-Za-z0-9_]+(?:-[A-Za-z0-9_]+)*")
+
+# Airlines we know beyond the ones present in flights.json
+KNOWN_AIRLINES = ["SpiceJet", "Akasa Air", "Qatar Airways", "Etihad", "Singapore Airlines", "Lufthansa"]
+
+_airline_gazetteer: Tuple[str, List[Tuple[re.Pattern, str]]] = ("", [])
+
+
+def _airlines() -> List[Tuple[re.Pattern, str]]:
+    """(pattern, canonical name) pairs, longest names first so 'Air India' wins over 'India'."""
+    global _airline_gazetteer
+    flights = get_dataset("flights.json")
+    if _airline_gazetteer[0] == flights.version:
+        return _airline_gazetteer[1]
+
+    names = {name.lower(): name for name in KNOWN_AIRLINES}
+    for record in flights.records:
+        airline = record.get("airline")
+        if airline:
+            names.setdefault(airline.lower(), airline)
+
+    patterns = [
+        (re.compile(rf"\b{re.escape(lower)}\b", re.IGNORECASE), names[lower])
+        for lower in sorted(names, key=len, reverse=True)
+    ]
+    _airline_gazetteer = (flights.version, patterns)
+    return patterns
+
+
+def extract_booking_type(message: str) -> Optional[str]:
+    match = BOOKING_TYPE_PATTERN.search(message)
+    if match:
+        return match.group(1).lower()
+    for word in re.findall(r"[a-z]+", message.lower()):
+        if word in BOOKING_TYPE_ALIASES:
+            return BOOKING_TYPE_ALIASES[word]
+    return None
+
+
+def extract_booking_id(message: str) -> Optional[str]:
+    match = BOOKING_ID_PATTERN.search(message)
+    return match.group(0) if match else None
+
+
+def extract_airline(message: str) -> Optional[str]:
+    for pattern, name in _airlines():
+        if pattern.search(message):
+            return name
+    return None
+
+
+def extract_fast_lane_args(tool_name: str, message: str) -> Optional[Dict[str, Any]]:
+    """Deterministic argument extraction; None when a required argument is missing."""
+    if tool_name == "get_cancellation_policy":
+        booking_type = extract_booking_type(message)
+        return {"booking_type": booking_type} if booking_type else None
+    if tool_name == "get_baggage_policy":
+        airline = extract_airline(message)
+        return {"airline": airline} if airline else None
+    if tool_name == "check_booking_status":
+        booking_id = extract_booking_id(message)
+        return {"booking_id": booking_id} if booking_id else None
+    if tool_name == "view_bookings":
+        return {"booking_type": extract_booking_type(message)}
+    return None
+
+
+def match_fast_lane(user_message: str, tools_list: List[Tuple[str, float]],
+                    current_intent_tool: Optional[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Return (tool_name, args) when the turn can be answered without the LLM:
+    the retriever's top tool is a fast-lane tool, it is clearly ahead of the
+    runner-up, and its arguments can be extracted from the message.
+    """
+    if not tools_list:
+        return None
+
+    top_tool, top_score = tools_list[0]
+    runner_up_score = tools_list[1][1] if len(tools_list) > 1 else 0.0
+
+    if top_tool not in FAST_LANE_TOOLS:
+        return None
+    if top_score < FAST_LANE_MIN_SCORE or top_score - runner_up_score < FAST_LANE_MIN_MARGIN:
+        return None
+    if (current_intent_tool and current_intent_tool not in FAST_LANE_TOOLS
+            and len(user_message.split()) <= FOLLOWUP_MAX_WORDS):
+        return None
+
+    args = extract_fast_lane_args(top_tool, user_message)
+    if args is None:
+        return None
+    return top_tool, args
@@ -0,0 +1,169 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from applications.metrics.mod import metrics
+from flask_api_service.constants import MAX_CONTEXT_TOKENS, HISTORY_MAX_TOKENS, SUMMARY_MAX_TOKENS, \
+    ROUTING_HISTORY_TOKENS
+from flask_api_service.token_counter import count_tokens, message_text, MESSAGE_OVERHEAD_TOKENS
+
+# Longest excerpt of one message kept in a summary / routing digest line
+DIGEST_CHARS = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clip(text: str, limit: int = DIGEST_CHARS) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _display_text(content: Any) -> str:
+    """Tool results and formatted replies are JSON envelopes; their "text" field is what the user saw."""
+    text = message_text(content)
+    try:
+        parsed = json.loads(text)
+    except (ValueError, TypeError):
+        return text
+    if isinstance(parsed, dict) and parsed.get("text"):
+        return str(parsed["text"])
+    return text
+
+
+def digest(message: Any) -> Optional[str]:
+    """One short line describing a message, or None for messages that carry no conversation content."""
+    if isinstance(message, SystemMessage):
+        return None
+    if isinstance(message, HumanMessage):
+        return f"User: {_clip(message_text(message))}"
+    if isinstance(message, AIMessage) and message.tool_calls:
+        calls = ", ".join(
+            f"{c.get('name')}({', '.join(f'{k}={v}' for k, v in (c.get('args') or {}).items())})"
+            for c in message.tool_calls
+        )
+        return f"Assistant called {_clip(calls)}"
+    if isinstance(message, ToolMessage):
+        return f"Tool {message.name or 'result'}: {_clip(_display_text(message))}"
+    text = _display_text(message)
+    return f"Assistant: {_clip(text)}" if text.strip() else None
+
+
+class HistoryView(NamedTuple):
+    recent: List[Any]           # messages sent in full
+    memory_context: str         # rolling summary of everything older
+    memory_watermark: Optional[str]  # id of the last message folded into the summary
+
+
+class HistoryManager:
+    """
+    Token-budgeted conversation memory.
+
+    The newest messages that fit the token budget go to the LLM in full. Older
+    messages are folded into a rolling summary (StateBase.memory_context), one
+    digest line each. A watermark (the id of the last summarized message) makes
+    the update incremental: each turn only digests messages that fell out of the
+    window since the previous turn. The summary drops its oldest lines to stay
+    within SUMMARY_MAX_TOKENS.
+    """
+
+    def __init__(self, max_tokens: int = HISTORY_MAX_TOKENS, summary_max_tokens: int = SUMMARY_MAX_TOKENS,
+                 token_cache_size: int = 4096):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.token_cache_size = token_cache_size
+        self._token_cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def message_tokens(self, message: Any) -> int:
+        """Token count of a message, cached by message id (messages do not change once checkpointed)."""
+        message_id = getattr(message, "id", None)
+        if message_id:
+            with self._lock:
+                tokens = self._token_cache.get(message_id)
+            if tokens is not None:
+                return tokens
+        tokens = count_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+        if message_id:
+            with self._lock:
+                self._token_cache[message_id] = tokens
+                while len(self._token_cache) > self.token_cache_size:
+                    self._token_cache.popitem(last=False)
+        return tokens
+
+    def budget(self, reserved_tokens: int = 0) -> int:
+        """History tokens left once the fixed prompt (system prompt, schemas, tools) and the reply are reserved."""
+        return max(0, min(self.max_tokens, MAX_CONTEXT_TOKENS - reserved_tokens))
+
+    def select(self, messages: List[Any], memory_context: str = "", memory_watermark: Optional[str] = None,
+               reserved_tokens: int = 0) -> HistoryView:
+        conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+        budget = self.budget(reserved_tokens)
+
+        # The current turn (from the last user message on) is always kept
+        last_human = max((i for i, m in enumerate(conversation) if isinstance(m, HumanMessage)), default=0)
+        start = last_human
+        used = sum(self.message_tokens(m) for m in conversation[last_human:])
+        while start > 0:
+            tokens = self.message_tokens(conversation[start - 1])
+            if used + tokens > budget:
+                break
+            used += tokens
+            start -= 1
+        # Never open the window on tool results whose call was cut off
+        while start < last_human and isinstance(conversation[start], ToolMessage):
+            start += 1
+
+        recent = conversation[start:]
+        evicted = conversation[:start]
+        metrics.observe("history_tokens", used)
+
+        # Incremental summary: only messages after the watermark are new to it
+        summarized_upto = 0
+        if memory_watermark:
+            for i in range(len(evicted) - 1, -1, -1):
+                if getattr(evicted[i], "id", None) == memory_watermark:
+                    summarized_upto = i + 1
+                    break
+            else:
+                if any(getattr(m, "id", None) == memory_watermark for m in recent):
+                    # Window grew back over summarized messages (e.g. bigger budget); keep the summary as is
+                    summarized_upto = len(evicted)
+        new_messages = evicted[summarized_upto:]
+        if not new_messages:
+            return HistoryView(recent, memory_context or "", memory_watermark)
+
+        lines = [line for line in (memory_context or "").split("\n") if line]
+        lines.extend(line for line in (digest(m) for m in new_messages) if line)
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        metrics.incr("history_messages_summarized", len(new_messages))
+        return HistoryView(recent, "\n".join(lines), getattr(evicted[-1], "id", None) or memory_watermark)
+
+    def routing_history(self, messages: List[Any], max_tokens: int = ROUTING_HISTORY_TOKENS) -> str:
+        """
+        Fixed-size history for the routing prompt: digest lines of the newest
+        messages, up to max_tokens. The current user message is left out (it is
+        sent separately), and only as many messages are read as fit.
+        """
+        lines: List[str] = []
+        used = 0
+        conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+        if conversation and isinstance(conversation[-1], HumanMessage):
+            conversation = conversation[:-1]
+        for message in reversed(conversation):
+            line = digest(message)
+            if not line:
+                continue
+            tokens = count_tokens(line)
+            if used + tokens > max_tokens:
+                break
+            lines.insert(0, line)
+            used += tokens
+        return "\n".join(lines) if lines else "(none)"
+
+
+history_manager = HistoryManager()
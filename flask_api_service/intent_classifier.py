@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from applications.embeddings.mod import get_embedding_service
+from applications.metrics.mod import metrics
+from flask_api_service.intent_router import MULTI_TASK_PATTERN, ROUTING_LOG_PATH, read_routing_log
+
+INTENT_CLASSIFIER_PATH = os.environ.get("INTENT_CLASSIFIER_PATH", os.path.join("models", "intent_classifier.npz"))
+
+# Below this probability the turn is escalated to the routing LLM
+CLASSIFIER_MIN_CONFIDENCE = float(os.environ.get("INTENT_CLASSIFIER_MIN_CONFIDENCE", "0.85"))
+
+FOLLOWUP_LABEL = "followup"
+NO_TOOL_LABEL = "none"
+
+
+def label_for(decision: Optional[str], selected_tools: Optional[List[str]]) -> Optional[str]:
+    """Collapse an LLM (decision, selected_tools) pair into one class label."""
+    if decision == "followup":
+        return FOLLOWUP_LABEL
+    if decision != "new":
+        return None
+    selected_tools = selected_tools or []
+    if len(selected_tools) > 1:
+        # Multi-task turns always go to the LLM
+        return None
+    return selected_tools[0] if selected_tools else NO_TOOL_LABEL
+
+
+def llm_label(record: Dict[str, Any]) -> Optional[str]:
+    """Label a logged turn with the LLM's own decision, if the LLM was asked."""
+    if "llm_decision" in record:
+        return label_for(record.get("llm_decision"), record.get("llm_selected_tools"))
+    if record.get("tier") == "llm":
+        return label_for(record.get("decision"), record.get("selected_tools"))
+    return None
+
+
+def featurize(embedding: np.ndarray, current_intent_tool: Optional[str],
+              tools_list: List[Tuple[str, float]], tool_names: List[str]) -> np.ndarray:
+    """Normalized message embedding + current-intent one-hot + retrieval score per tool."""
+    embedding = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(embedding)
+    if norm > 0:
+        embedding = embedding / norm
+
+    intent = np.zeros(len(tool_names) + 1, dtype=np.float32)
+    position = {name: i for i, name in enumerate(tool_names)}
+    intent[position.get(current_intent_tool, len(tool_names))] = 1.0
+
+    scores = np.zeros(len(tool_names), dtype=np.float32)
+    for name, score in tools_list:
+        if name in position:
+            scores[position[name]] = score
+    return np.concatenate([embedding, intent, scores])
+
+
+class IntentClassifier:
+    """
+    Softmax classifier over (followup | tool name | none), served with NumPy.
+
+    Weights are trained offline from the routing log (see `train`) and stored
+    as an .npz file, so inference is a single matrix-vector product. They only
+    fit the embedding model and backend (torch or onnx-int8) they were trained on.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, classes: List[str],
+                 tool_names: List[str], embedding_model: str, embedding_backend: str = "torch"):
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.classes = classes
+        self.tool_names = tool_names
+        self.embedding_model = embedding_model
+        self.embedding_backend = embedding_backend
+
+    @classmethod
+    def load(cls, path: str = INTENT_CLASSIFIER_PATH) -> "IntentClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            # Classifiers saved before backends were recorded were trained on torch embeddings
+            return cls(data["weights"], data["bias"], meta["classes"], meta["tool_names"], meta["embedding_model"],
+                       meta.get("embedding_backend", "torch"))
+
+    def save(self, path: str = INTENT_CLASSIFIER_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {"classes": self.classes, "tool_names": self.tool_names, "embedding_model": self.embedding_model,
+                "embedding_backend": self.embedding_backend}
+        np.savez(path, weights=self.weights, bias=self.bias, meta=np.array(json.dumps(meta)))
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        logits = features @ self.weights.T + self.bias
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def classify(self, embedding: np.ndarray, current_intent_tool: Optional[str],
+                 tools_list: List[Tuple[str, float]]) -> Tuple[str, float]:
+        features = featurize(embedding, current_intent_tool, tools_list, self.tool_names)
+        probs = self.predict_proba(features)
+        best = int(np.argmax(probs))
+        return self.classes[best], float(probs[best])
+
+    def route(self, user_message: str, embedding: np.ndarray, current_intent_tool: Optional[str],
+              tools_list: List[Tuple[str, float]],
+              min_confidence: float = CLASSIFIER_MIN_CONFIDENCE) -> Optional[Dict[str, Any]]:
+        """Decision dict in the same shape as the LLM's, or None when not confident enough."""
+        if MULTI_TASK_PATTERN.search(user_message):
+            return None
+
+        start = time.perf_counter()
+        label, confidence = self.classify(embedding, current_intent_tool, tools_list)
+        metrics.observe("intent_classifier_ms", (time.perf_counter() - start) * 1000)
+
+        if confidence < min_confidence:
+            metrics.incr("intent_classifier_escalations")
+            return None
+        if label == FOLLOWUP_LABEL:
+            return {
+                "decision": "followup",
+                "selected_tools": [current_intent_tool] if current_intent_tool else [],
+                "reason": f"Classifier: follow-up ({confidence:.2f})",
+                "tier": "classifier"
+            }
+        return {
+            "decision": "new",
+            "selected_tools": [] if label == NO_TOOL_LABEL else [label],
+            "reason": f"Classifier: {label} ({confidence:.2f})",
+            "tier": "classifier"
+        }
+
+
+def load_intent_classifier(tool_names: List[str], embedding_model: str, embedding_backend: str,
+                           path: str = INTENT_CLASSIFIER_PATH) -> Optional[IntentClassifier]:
+    """Load the trained classifier if present and trained for these tools and embeddings (model and backend)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        classifier = IntentClassifier.load(path)
+    except Exception as e:
+        print(f"Could not load intent classifier from {path}: {e}")
+        return None
+    if (classifier.embedding_model, classifier.embedding_backend) != (embedding_model, embedding_backend) \
+            or sorted(classifier.tool_names) != sorted(tool_names):
+        print(f"Intent classifier at {path} was trained for other tools or embeddings; retrain it.")
+        return None
+    print(f"Loaded intent classifier ({len(classifier.classes)} classes) from {path}")
+    return classifier
+
+
+# ============================================
+# TRAINING & EVALUATION
+# ============================================
+
+def labeled_examples(records: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    examples = []
+    for record in records:
+        label = llm_label(record)
+        if label is not None and record.get("user_message"):
+            examples.append((record, label))
+    return examples
+
+
+def _feature_matrix(examples: List[Tuple[Dict[str, Any], str]], tool_names: List[str],
+                    embed: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+    embeddings = embed([record["user_message"] for record, _ in examples])
+    return np.stack([
+        featurize(embedding, record.get("current_intent"), [tuple(c) for c in record.get("candidates", [])], tool_names)
+        for embedding, (record, _) in zip(embeddings, examples)
+    ])
+
+
+def train(log_path: str, tool_names: List[str], model_path: str = INTENT_CLASSIFIER_PATH,
+          embedding_model: Optional[str] = None, holdout: float = 0.2,
+          embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+          embedding_backend: str = "torch") -> Dict[str, Any]:
+    """Fit a multinomial logistic regression on LLM-labeled turns and save it as NumPy weights."""
+    from sklearn.linear_model import LogisticRegression
+
+    examples = labeled_examples(read_routing_log(log_path))
+    if len({label for _, label in examples}) < 2:
+        raise ValueError(f"Need LLM-labeled turns of at least two classes in {log_path}, found {len(examples)} turns")
+
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - holdout)) if holdout > 0 else len(examples)
+    train_examples, test_examples = examples[:split], examples[split:]
+
+    if embed is None:
+        service = get_embedding_service()
+        embed, embedding_model, embedding_backend = service.encode, service.model_name, service.backend
+    x_train = _feature_matrix(train_examples, tool_names, embed)
+    y_train = [label for _, label in train_examples]
+
+    model = LogisticRegression(max_iter=2000, C=4.0)
+    model.fit(x_train, y_train)
+
+    classes = [str(c) for c in model.classes_]
+    weights, bias = model.coef_, model.intercept_
+    if len(classes) == 2:
+        # Binary logistic regression keeps one row; expand to softmax form
+        weights = np.vstack([np.zeros_like(weights), weights])
+        bias = np.concatenate([[0.0], bias])
+
+    classifier = IntentClassifier(weights, bias, classes, tool_names, embedding_model, embedding_backend)
+    classifier.save(model_path)
+
+    report = {"trained_on": len(train_examples), "classes": dict(Counter(y_train)), "model_path": model_path}
+    if test_examples:
+        report["holdout"] = evaluate_examples(classifier, test_examples, embed)
+    return report
+
+
+def evaluate_examples(classifier: IntentClassifier, examples: List[Tuple[Dict[str, Any], str]],
+                      embed: Callable[[List[str]], np.ndarray],
+                      min_confidence: float = CLASSIFIER_MIN_CONFIDENCE) -> Dict[str, Any]:
+    """Accuracy against the LLM labels, overall and on the turns the classifier would answer."""
+    features = _feature_matrix(examples, classifier.tool_names, embed)
+
+    start = time.perf_counter()
+    probs = classifier.predict_proba(features)
+    per_turn_ms = (time.perf_counter() - start) * 1000 / max(len(examples), 1)
+
+    predicted = [classifier.classes[i] for i in probs.argmax(axis=1)]
+    confidence = probs.max(axis=1)
+    labels = [label for _, label in examples]
+
+    correct = [p == y for p, y in zip(predicted, labels)]
+    confident = [c >= min_confidence for c in confidence]
+    answered = [ok for ok, conf in zip(correct, confident) if conf]
+
+    per_class = {}
+    for label in sorted(set(labels)):
+        hits = [ok for ok, y in zip(correct, labels) if y == label]
+        per_class[label] = round(sum(hits) / len(hits), 4)
+
+    return {
+        "turns": len(examples),
+        "accuracy": round(sum(correct) / len(correct), 4) if correct else None,
+        "min_confidence": min_confidence,
+        "coverage": round(len(answered) / len(examples), 4) if examples else None,
+        "accuracy_when_confident": round(sum(answered) / len(answered), 4) if answered else None,
+        "per_class_accuracy": per_class,
+        "inference_ms_per_turn": round(per_turn_ms, 4),
+    }
+
+
+def evaluate(log_path: str, model_path: str = INTENT_CLASSIFIER_PATH,
+             min_confidence: float = CLASSIFIER_MIN_CONFIDENCE) -> Dict[str, Any]:
+    classifier = IntentClassifier.load(model_path)
+    examples = labeled_examples(read_routing_log(log_path))
+    if not examples:
+        raise ValueError(f"No LLM-labeled turns in {log_path}")
+    service = get_embedding_service()
+    if (service.model_name, service.backend) != (classifier.embedding_model, classifier.embedding_backend):
+        raise ValueError(f"Classifier was trained on {classifier.embedding_model} ({classifier.embedding_backend}) "
+                         f"embeddings, the embedding service uses {service.model_name} ({service.backend})")
+    return evaluate_examples(classifier, examples, service.encode, min_confidence)
+
+
+if __name__ == "__main__":
+    # python -m flask_api_service.intent_classifier train|evaluate [--log routing.jsonl]
+    parser = argparse.ArgumentParser(description="Train or evaluate the routing intent classifier.")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--log", default=ROUTING_LOG_PATH)
+    parser.add_argument("--model", default=INTENT_CLASSIFIER_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--min-confidence", type=float, default=CLASSIFIER_MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        from flask_api_service.tool_setup import TOOL_REGISTRY
+        result = train(args.log, list(TOOL_REGISTRY.keys()), args.model, holdout=args.holdout)
+    else:
+        result = evaluate(args.log, args.model, args.min_confidence)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,161 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from applications.metrics.mod import metrics
+
+# Tier 2: retrieval is decisive when the top tool is strong and clearly ahead.
+# Retrieval thresholds are calibrated on the routing log with
+# `python -m flask_api_service.tool_retriever` and can be set per deployment.
+ROUTE_MIN_SCORE = float(os.environ.get("ROUTE_MIN_SCORE", "0.70"))
+ROUTE_MIN_MARGIN = float(os.environ.get("ROUTE_MIN_MARGIN", "0.08"))
+
+# When the routing LLM gives no usable JSON, the top tool takes over the intent above this score
+INTENT_CHANGE_THRESHOLD = float(os.environ.get("INTENT_CHANGE_THRESHOLD", "0.65"))
+
+# Fraction of deterministically routed turns that are also sent to the LLM,
+# so routing agreement can be measured offline from the log
+SHADOW_LLM_RATE = float(os.environ.get("ROUTER_SHADOW_LLM_RATE", "0"))
+
+ROUTING_LOG_PATH = os.environ.get("ROUTING_LOG_PATH", os.path.join("logs", "routing_decisions.jsonl"))
+
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+
+# Tier 1: replies that only make sense as answers to the active flow
+SHORT_REPLY_PATTERN = re.compile(
+    r"^\s*("
+    r"y|yes|yeah|yep|no|nope|ok|okay|sure|confirm|confirmed|proceed|go ahead|correct|right|done|that's right"
+    r"|\d+(\s*(adults?|kids?|children|people|persons?|guests?|travell?ers?|passengers?|nights?|days?|pax|inr|rs|usd|\$))?"
+    r"|\d{4}-\d{2}-\d{2}"
+    rf"|\d{{1,2}}(st|nd|rd|th)?(\s+of)?\s+{_MONTH}(\s+\d{{4}})?"
+    rf"|{_MONTH}\s+\d{{1,2}}(st|nd|rd|th)?(\s+\d{{4}})?"
+    r"|today|tomorrow|day after tomorrow|next (week|month|monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+    r")\s*[.!]*\s*$",
+    re.IGNORECASE
+)
+
+# A second task in the same message is the LLM's call, not the score margin's
+MULTI_TASK_PATTERN = re.compile(r"\b(and|also|plus|as well as)\b", re.IGNORECASE)
+
+_log_lock = threading.Lock()
+
+
+def route_deterministic(user_message: str, current_intent_tool: Optional[str],
+                        tools_list: List[Tuple[str, float]]) -> Optional[Dict[str, Any]]:
+    """
+    Decide the unambiguous turns without the LLM. Returns a decision dict
+    (decision, selected_tools, reason, tier) or None to escalate to the LLM.
+    """
+    if current_intent_tool and SHORT_REPLY_PATTERN.match(user_message):
+        return {
+            "decision": "followup",
+            "selected_tools": [current_intent_tool],
+            "reason": "Short reply continuing the active intent",
+            "tier": "short_reply"
+        }
+
+    if not tools_list or MULTI_TASK_PATTERN.search(user_message):
+        return None
+
+    top_tool, top_score = tools_list[0]
+    runner_up_score = tools_list[1][1] if len(tools_list) > 1 else 0.0
+    if top_score < ROUTE_MIN_SCORE or top_score - runner_up_score < ROUTE_MIN_MARGIN:
+        return None
+
+    if top_tool == current_intent_tool:
+        return {
+            "decision": "followup",
+            "selected_tools": [top_tool],
+            "reason": f"Retrieval confirms the active intent (score {top_score:.2f})",
+            "tier": "score_margin"
+        }
+    return {
+        "decision": "new",
+        "selected_tools": [top_tool],
+        "reason": f"Decisive retrieval (score {top_score:.2f}, margin {top_score - runner_up_score:.2f})",
+        "tier": "score_margin"
+    }
+
+
+def should_shadow_llm() -> bool:
+    return SHADOW_LLM_RATE > 0 and random.random() < SHADOW_LLM_RATE
+
+
+def log_routing_decision(user_message: str, current_intent_tool: Optional[str],
+                         tools_list: List[Tuple[str, float]], decision: Optional[Dict[str, Any]],
+                         tier: str, latency_ms: float,
+                         shadow_decision: Optional[Dict[str, Any]] = None) -> None:
+    """Append one routing decision to the JSONL routing log and count it per tier."""
+    metrics.incr("routing_decisions", tier=tier)
+    metrics.observe("routing_ms", latency_ms, tier=tier)
+
+    record = {
+        "ts": int(time.time() * 1000),
+        "user_message": user_message,
+        "current_intent": current_intent_tool,
+        "candidates": [[name, round(float(score), 4)] for name, score in tools_list],
+        "decision": (decision or {}).get("decision"),
+        "selected_tools": (decision or {}).get("selected_tools", []),
+        "tier": tier,
+        "latency_ms": round(latency_ms, 2),
+    }
+    if shadow_decision is not None:
+        record["llm_decision"] = shadow_decision.get("decision")
+        record["llm_selected_tools"] = shadow_decision.get("selected_tools", [])
+
+    print(f"Routing tier: {tier} → {record['decision']} {record['selected_tools']} ({latency_ms:.1f} ms)")
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(ROUTING_LOG_PATH) or ".", exist_ok=True)
+            with open(ROUTING_LOG_PATH, "a") as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Could not write routing log: {e}")
+
+
+def read_routing_log(path: str = ROUTING_LOG_PATH) -> List[Dict[str, Any]]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def summarize_routing_log(path: str = ROUTING_LOG_PATH) -> Dict[str, Any]:
+    """Tier shares (LLM-call reduction) and agreement with shadowed LLM decisions."""
+    records = read_routing_log(path)
+    tiers = Counter(r.get("tier") for r in records)
+    total = len(records)
+
+    shadowed = [r for r in records if "llm_decision" in r]
+    agreed = [
+        r for r in shadowed
+        if r.get("decision") == r.get("llm_decision")
+        and (r.get("decision") == "followup" or r.get("selected_tools") == r.get("llm_selected_tools"))
+    ]
+
+    llm_calls = tiers.get("llm", 0) + tiers.get("fallback", 0)
+    return {
+        "turns": total,
+        "tiers": dict(tiers),
+        "llm_call_share": round(llm_calls / total, 4) if total else 0.0,
+        "shadowed_turns": len(shadowed),
+        "agreement": round(len(agreed) / len(shadowed), 4) if shadowed else None,
+    }
+
+
+if __name__ == "__main__":
+    # python -m flask_api_service.intent_router [routing_log.jsonl]
+    log_path = sys.argv[1] if len(sys.argv) > 1 else ROUTING_LOG_PATH
+    print(json.dumps(summarize_routing_log(log_path), indent=2))
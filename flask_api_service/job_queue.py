@@ -0,0 +1,179 @@
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from applications.metrics.mod import metrics
+from flask_api_service.constants import JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL_SECONDS, TURN_DEADLINE_SECONDS
+
+# (event name, payload); a job ends with ("status", {"status_code"}) and ("final", response body)
+JobEvent = Tuple[str, Dict[str, Any]]
+
+
+class TurnJob:
+    """One queued chat turn: its status, the events it produced so far and, once done, the response."""
+
+    def __init__(self, user_id: str, query: str, ticket: Optional[str] = None,
+                 deadline_seconds: float = TURN_DEADLINE_SECONDS):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.query = query
+        self.ticket = ticket  # admission ticket, held until the job ends
+        self.deadline_seconds = deadline_seconds  # turn deadline, counted from when the job starts running
+        self.status = "queued"  # queued → running → done | failed
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.status_code: Optional[int] = None  # HTTP status of the equivalent /handle_user_query call
+        self.events: List[JobEvent] = []
+        self._changed = threading.Condition()
+
+    def publish(self, event: str, payload: Dict[str, Any]) -> None:
+        with self._changed:
+            self.events.append((event, payload))
+            self._changed.notify_all()
+
+    def follow(self, timeout_seconds: float) -> Iterator[JobEvent]:
+        """Every event of the job, from the first; blocks for new ones until the job finishes or the timeout passes."""
+        deadline = time.monotonic() + timeout_seconds
+        sent = 0
+        while True:
+            with self._changed:
+                while sent == len(self.events) and self.finished_at is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self._changed.wait(remaining)
+                pending = self.events[sent:]
+                finished = self.finished_at is not None
+            for event in pending:
+                yield event
+            sent += len(pending)
+            if finished and sent == len(self.events):
+                return
+
+    @property
+    def queue_wait_ms(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return round((self.started_at - self.submitted_at) * 1000, 1)
+
+    @property
+    def run_ms(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return round((self.finished_at - self.started_at) * 1000, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "job_status": self.status,
+            "submitted_at": int(self.submitted_at * 1000),
+            "queue_wait_ms": self.queue_wait_ms,
+            "run_ms": self.run_ms,
+            "status_code": self.status_code,
+            "result": self.result
+        }
+
+
+class JobQueue:
+    """
+    Runs chat turns off the request thread on a bounded worker pool.
+
+    submit() returns at once with a job id (or None once JOB_QUEUE_DEPTH jobs
+    are waiting), so a burst of users does not hold Flask threads for the whole
+    LLM pipeline. Finished jobs are kept JOB_RESULT_TTL_SECONDS for polling.
+    Queue wait and run time are recorded per job (job_queue_wait_ms / job_run_ms).
+    """
+
+    def __init__(self, runner: Callable[[TurnJob], Iterator[JobEvent]], workers: int = JOB_WORKERS,
+                 max_queued: int = JOB_QUEUE_DEPTH, result_ttl_seconds: float = JOB_RESULT_TTL_SECONDS):
+        self.runner = runner
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl_seconds = result_ttl_seconds
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="turn-job")
+        self._jobs: Dict[str, TurnJob] = {}
+        self._queued = 0
+        self._running = 0
+        self._run_seconds: Optional[float] = None  # smoothed job run time, for retry_after()
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: str, query: str, ticket: Optional[str] = None,
+               deadline_seconds: float = TURN_DEADLINE_SECONDS) -> Optional[TurnJob]:
+        job = TurnJob(user_id, query, ticket, deadline_seconds)
+        with self._lock:
+            self._expire()
+            if self._queued >= self.max_queued:
+                metrics.incr("jobs_rejected")
+                return None
+            self._queued += 1
+            self._jobs[job.id] = job
+        metrics.incr("jobs_submitted")
+        self.pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[TurnJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job: TurnJob) -> int:
+        """Jobs ahead of this one (0 once it is running)."""
+        if job.status != "queued":
+            return 0
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.status == "queued" and j.submitted_at < job.submitted_at)
+
+    def retry_after(self) -> int:
+        """Seconds until a full queue has likely drained by one job."""
+        with self._lock:
+            run_seconds = self._run_seconds or 1.0
+        return max(1, math.ceil(run_seconds / self.workers))
+
+    def _expire(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl_seconds:
+                del self._jobs[job_id]
+
+    def _run(self, job: TurnJob) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job.started_at = time.time()
+        job.status = "running"
+        metrics.observe("job_queue_wait_ms", job.queue_wait_ms)
+        try:
+            for event, payload in self.runner(job):
+                if event == "status":
+                    job.status_code = payload["status_code"]
+                elif event == "final":
+                    job.result = payload
+                job.publish(event, payload)
+            job.status = "done" if job.result is not None else "failed"
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.status = "failed"
+        finally:
+            with job._changed:
+                job.finished_at = time.time()
+                job._changed.notify_all()
+            with self._lock:
+                self._running -= 1
+                run_seconds = job.finished_at - job.started_at
+                self._run_seconds = run_seconds if self._run_seconds is None \
+                    else self._run_seconds + 0.2 * (run_seconds - self._run_seconds)
+            metrics.observe("job_run_ms", job.run_ms, status=job.status)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "queued": self._queued,
+                "running": self._running,
+                "retained": len(self._jobs)
+            }
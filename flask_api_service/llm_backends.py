@@ -0,0 +1,210 @@
+import argparse
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import httpx
+from ollama import ResponseError
+
+from applications.etcd.init_etcd import LLMBackendConfig, LLMConfig
+from applications.metrics.mod import metrics
+
+# Connections to each Ollama server are kept alive and shared by every profile's client
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120)
+
+# A server that accepts the connection but stops sending is given up on after this long without a chunk
+BACKEND_TIMEOUT = httpx.Timeout(connect=3.0, read=120.0, write=30.0, pool=60.0)
+HEALTH_CHECK_TIMEOUT_SECONDS = 2.0
+
+# A server with the model loaded is preferred unless it has this many more requests than the least busy one
+AFFINITY_SLACK = 2
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Errors that mean the server (not the request) is at fault, so another server may succeed."""
+    if isinstance(error, ResponseError):
+        return error.status_code >= 500 or error.status_code == 404  # 404: model not on this server
+    return isinstance(error, (ConnectionError, httpx.TransportError))
+
+
+class Backend:
+    """One Ollama server: its health, the models it has loaded and its outstanding requests."""
+
+    def __init__(self, config: LLMBackendConfig):
+        self.url = config.url.rstrip("/")
+        self.models: Set[str] = set(config.models)
+        self.transport = httpx.HTTPTransport(limits=HTTP_POOL_LIMITS)
+        self.healthy = True
+        self.unhealthy_until = 0.0
+        self.loaded_models: Set[str] = set()   # from /api/ps, plus models it served since
+        self.missing_models: Set[str] = set()  # models it answered 404 for
+        self.outstanding = 0
+        self.last_error: Optional[str] = None
+        self.last_check: Optional[float] = None
+
+    def serves(self, model: str) -> bool:
+        return model not in self.missing_models and (not self.models or model in self.models)
+
+    def available(self, now: float) -> bool:
+        return self.healthy or now >= self.unhealthy_until
+
+
+class BackendPool:
+    """
+    Ollama servers behind the LLM clients.
+
+    select() picks, among healthy servers that serve the model, the one with
+    the fewest outstanding requests, preferring servers that already have the
+    model loaded (so requests do not force model reloads) unless they are
+    AFFINITY_SLACK requests busier. A server that fails a request is taken out
+    of rotation until a health check (GET /api/ps, which also reports the
+    loaded models) passes again or backend_cooldown_seconds pass; a server
+    that lacks a model is skipped for it until its next health check.
+    """
+
+    def __init__(self, backends: Sequence[LLMBackendConfig], health_check_interval_seconds: float = 10.0,
+                 cooldown_seconds: float = 15.0):
+        if not backends:
+            raise ValueError("At least one LLM backend must be configured")
+        self.backends = [Backend(b) for b in backends]
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._next = 0  # rotates ties between equally busy servers
+        self._health_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, config: LLMConfig) -> "BackendPool":
+        return cls(config.backends, config.health_check_interval_seconds, config.backend_cooldown_seconds)
+
+    # ---------------- selection ----------------
+
+    def select(self, model: str, exclude: Sequence[Backend] = ()) -> Optional[Backend]:
+        """The server for the next request for model, or None when every server has been excluded."""
+        now = time.time()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude and b.serves(model)]
+            if not candidates:
+                candidates = [b for b in self.backends if b not in exclude]
+            if not candidates:
+                return None
+            # All down: try the one whose cooldown ends first rather than failing outright
+            available = [b for b in candidates if b.available(now)] or \
+                [min(candidates, key=lambda b: b.unhealthy_until)]
+
+            self._next = (self._next + 1) % len(self.backends)
+            order = {b: (i - self._next) % len(self.backends) for i, b in enumerate(self.backends)}
+            least_busy = min(available, key=lambda b: (b.outstanding, order[b]))
+            warm = [b for b in available if model in b.loaded_models]
+            chosen = least_busy
+            if warm:
+                warm_best = min(warm, key=lambda b: (b.outstanding, order[b]))
+                if warm_best.outstanding - least_busy.outstanding <= AFFINITY_SLACK:
+                    chosen = warm_best
+            chosen.outstanding += 1
+        metrics.incr("llm_backend_requests", backend=chosen.url, warm=model in chosen.loaded_models)
+        return chosen
+
+    def release(self, backend: Backend, model: str, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+        self.record(backend, model, error)
+
+    def record(self, backend: Backend, model: str, error: Optional[BaseException] = None) -> None:
+        """Outcome of a request to backend: the model is loaded there, or the server/model failed."""
+        with self._lock:
+            if error is None:
+                backend.loaded_models.add(model)
+                return
+            if isinstance(error, ResponseError) and error.status_code == 404:
+                backend.missing_models.add(model)
+                backend.loaded_models.discard(model)
+            else:
+                backend.healthy = False
+                backend.unhealthy_until = time.time() + self.cooldown_seconds
+            backend.last_error = str(error)[:200]
+        metrics.incr("llm_backend_failures", backend=backend.url)
+        print(f"LLM backend {backend.url} failed for {model}: {error}")
+
+    @contextmanager
+    def lease(self, model: str, exclude: Sequence[Backend] = ()):
+        """Hold a server for one request; a backend failure raised inside marks it unhealthy."""
+        backend = self.select(model, exclude)
+        if backend is None:
+            raise ConnectionError(f"No LLM backend left to try for {model}")
+        try:
+            yield backend
+        except BaseException as e:
+            self.release(backend, model, e if is_backend_failure(e) else None)
+            raise
+        self.release(backend, model)
+
+    # ---------------- health checks ----------------
+
+    def check(self, backend: Backend) -> bool:
+        try:
+            response = httpx.get(f"{backend.url}/api/ps", timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            loaded = {m.get("model") or m.get("name") for m in response.json().get("models", [])}
+        except Exception as e:
+            with self._lock:
+                if backend.healthy:
+                    print(f"LLM backend {backend.url} is down: {e}")
+                backend.healthy = False
+                backend.unhealthy_until = time.time() + self.cooldown_seconds
+                backend.last_error = str(e)[:200]
+                backend.last_check = time.time()
+            return False
+        with self._lock:
+            if not backend.healthy:
+                print(f"LLM backend {backend.url} is back")
+            backend.healthy = True
+            backend.loaded_models = {m for m in loaded if m}
+            # Models it answered 404 for get another try (they may have been pulled since)
+            backend.missing_models.clear()
+            backend.last_check = time.time()
+        return True
+
+    def check_all(self) -> None:
+        for backend in self.backends:
+            self.check(backend)
+
+    def start_health_checks(self) -> None:
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                self.check_all()
+                time.sleep(self.health_check_interval_seconds)
+
+        self._health_thread = threading.Thread(target=loop, name="llm-backend-health", daemon=True)
+        self._health_thread.start()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{
+                "url": b.url,
+                "healthy": b.healthy,
+                "outstanding": b.outstanding,
+                "loaded_models": sorted(b.loaded_models),
+                "last_error": b.last_error,
+                "last_check": int(b.last_check * 1000) if b.last_check else None
+            } for b in self.backends]
+
+
+if __name__ == "__main__":
+    # python -m flask_api_service.llm_backends [--url http://host:11434 ...]
+    parser = argparse.ArgumentParser(description="Health of the configured (or given) Ollama backends.")
+    parser.add_argument("--url", action="append", help="backend URL (repeatable); defaults to the config")
+    args = parser.parse_args()
+
+    if args.url:
+        pool = BackendPool([LLMBackendConfig(url=url) for url in args.url])
+    else:
+        from flask_api_service.llm_clients import llm_config
+        pool = BackendPool.from_config(llm_config())
+    pool.check_all()
+    print(json.dumps(pool.snapshot(), indent=2))
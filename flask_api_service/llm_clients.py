@@ -0,0 +1,277 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_ollama import ChatOllama
+
+from applications.etcd.init_etcd import global_config, LLMConfig, LLMProfileConfig
+from applications.metrics.mod import metrics
+from flask_api_service.prompt_builder import prompt_cache_stats
+from flask_api_service.constants import STREAMED_INVOKE_BELOW_SECONDS
+from flask_api_service.deadline import Deadline, TurnCancelled, current_deadline
+from flask_api_service.llm_backends import Backend, BackendPool, BACKEND_TIMEOUT, is_backend_failure
+
+# Longest a call waits for a free slot in its profile before failing the turn
+LLM_QUEUE_TIMEOUT_SECONDS = 60
+
+
+def llm_config() -> LLMConfig:
+    """AppConfig.llm (defaults when no config is loaded)."""
+    return global_config.config.llm if global_config.config else LLMConfig()
+
+
+def llm_profiles() -> Dict[str, LLMProfileConfig]:
+    """Per-node model and generation settings."""
+    config = llm_config()
+    return {"routing": config.routing, "tool_calling": config.tool_calling, "formatting": config.formatting}
+
+
+def chat_options(profile: LLMProfileConfig) -> Dict[str, Any]:
+    """Ollama generation options of a profile (used when a call overrides one of them)."""
+    options = {"temperature": profile.temperature, "num_predict": profile.num_predict}
+    if profile.stop:
+        options["stop"] = profile.stop
+    if profile.repeat_penalty is not None:
+        options["repeat_penalty"] = profile.repeat_penalty
+    return options
+
+
+def chat_params(profile: LLMProfileConfig) -> Dict[str, Any]:
+    """ChatOllama keyword arguments for a profile."""
+    params: Dict[str, Any] = {
+        "model": profile.model,
+        "temperature": profile.temperature,
+        "num_predict": profile.num_predict,
+        "reasoning": profile.reasoning,
+    }
+    if profile.stop:
+        params["stop"] = profile.stop
+    if profile.keep_alive is not None:
+        params["keep_alive"] = profile.keep_alive
+    if profile.repeat_penalty is not None:
+        params["repeat_penalty"] = profile.repeat_penalty
+    if profile.json_format:
+        params["format"] = "json"
+    return params
+
+
+class LLMClientRegistry:
+    """
+    Long-lived ChatOllama clients, one per profile and Ollama server, over each
+    server's keep-alive HTTP pool.
+
+    Each profile (one per graph node) has its own model, reasoning level, token
+    cap and concurrency limit, so a burst of formatting calls cannot starve
+    routing. Every call goes to the server the BackendPool picks; when that
+    server fails, the call is retried on another one. bind_tools results are
+    memoized per server and tool subset so tool schemas are converted once, not
+    on every turn.
+    """
+
+    def __init__(self, profiles: Dict[str, LLMProfileConfig], pool: BackendPool):
+        self.profiles = profiles
+        self.pool = pool
+        self._clients: Dict[Tuple[str, str], ChatOllama] = {}
+        self._bound: Dict[Tuple[str, str, Tuple[str, ...]], Any] = {}
+        self._slots = {name: threading.BoundedSemaphore(p.max_concurrency) for name, p in profiles.items()}
+        self._lock = threading.Lock()
+
+    def client(self, profile: str, backend: Backend) -> ChatOllama:
+        key = (backend.url, profile)
+        llm = self._clients.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._clients.get(key)
+                if llm is None:
+                    llm = ChatOllama(
+                        base_url=backend.url,
+                        sync_client_kwargs={"transport": backend.transport, "timeout": BACKEND_TIMEOUT},
+                        **chat_params(self.profiles[profile])
+                    )
+                    self._clients[key] = llm
+        return llm
+
+    def with_tools(self, profile: str, tools: Sequence[Any], backend: Backend) -> Any:
+        key = (backend.url, profile, tuple(sorted(t.name for t in tools)))
+        bound = self._bound.get(key)
+        if bound is None:
+            llm = self.client(profile, backend)
+            with self._lock:
+                bound = self._bound.get(key)
+                if bound is None:
+                    bound = llm.bind_tools(list(tools))
+                    self._bound[key] = bound
+        return bound
+
+    def _runnable(self, profile: str, tools: Optional[Sequence[Any]], backend: Backend) -> Any:
+        return self.with_tools(profile, tools, backend) if tools else self.client(profile, backend)
+
+    def _acquire(self, profile: str) -> threading.BoundedSemaphore:
+        slots = self._slots[profile]
+        deadline = current_deadline()
+        timeout = LLM_QUEUE_TIMEOUT_SECONDS if deadline is None else min(LLM_QUEUE_TIMEOUT_SECONDS, deadline.remaining())
+        wait_start = time.perf_counter()
+        if not slots.acquire(timeout=timeout):
+            if deadline is not None and deadline.reason:
+                metrics.incr("llm_calls_cancelled", profile=profile, reason=deadline.reason, stage="queued")
+                raise TurnCancelled(deadline.reason)
+            metrics.incr("llm_queue_timeouts", profile=profile)
+            raise TimeoutError(f"No free '{profile}' LLM slot after {LLM_QUEUE_TIMEOUT_SECONDS}s")
+        metrics.observe("llm_queue_wait_ms", (time.perf_counter() - wait_start) * 1000, profile=profile)
+        return slots
+
+    def _call_kwargs(self, profile: str, format: Optional[Any], num_predict: Optional[int]) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        if format is not None:
+            kwargs["format"] = format
+        if num_predict is not None:
+            kwargs["options"] = dict(chat_options(self.profiles[profile]), num_predict=num_predict)
+        return kwargs
+
+    def _record_response(self, profile: str, messages: List[Any], response: Any,
+                         tools: Optional[Sequence[Any]]) -> None:
+        prompt_cache_stats.record(profile, messages, response, tools)
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage.get("output_tokens") is not None:
+            metrics.observe("llm_output_tokens", usage["output_tokens"], profile=profile,
+                            model=self.profiles[profile].model)
+
+    def warm(self, profile: str, backend: Backend, messages: List[Any]) -> float:
+        """
+        One-token generation for the profile on a specific server: loads the model
+        (renewing its keep_alive) and primes the server's cache with the prompt
+        prefix. Returns the call's duration in ms.
+        """
+        model = self.profiles[profile].model
+        options = dict(chat_options(self.profiles[profile]), num_predict=1)
+        start = time.perf_counter()
+        try:
+            self.client(profile, backend).invoke(messages, options=options)
+        except Exception as e:
+            if is_backend_failure(e):
+                self.pool.record(backend, model, e)
+            raise
+        self.pool.record(backend, model)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.observe("llm_warm_ms", elapsed_ms, profile=profile, backend=backend.url)
+        return elapsed_ms
+
+    def _failover(self, profile: str, call: Callable[[Backend], Any]) -> Any:
+        """call(backend) on the pool's pick, retried on the next server while servers fail."""
+        model = self.profiles[profile].model
+        tried: List[Backend] = []
+        attempts = len(self.pool.backends)
+        for attempt in range(attempts):
+            backend = None
+            try:
+                with self.pool.lease(model, tried) as backend:
+                    return call(backend)
+            except Exception as e:
+                if backend is None or attempt == attempts - 1 or not is_backend_failure(e):
+                    raise
+                tried.append(backend)
+                metrics.incr("llm_failovers", profile=profile)
+
+    @staticmethod
+    def _checked(chunks: Iterator[Any], profile: str, deadline: Optional[Deadline], call_start: float) -> Iterator[Any]:
+        """Pass chunks through, aborting the request (closing its HTTP response) once the deadline has passed."""
+        try:
+            for chunk in chunks:
+                if deadline is not None and deadline.reason:
+                    metrics.incr("llm_calls_cancelled", profile=profile, reason=deadline.reason, stage="generating")
+                    metrics.observe("llm_cancelled_after_ms", (time.perf_counter() - call_start) * 1000,
+                                    profile=profile)
+                    raise TurnCancelled(deadline.reason)
+                yield chunk
+        finally:
+            chunks.close()
+
+    def invoke(self, profile: str, messages: List[Any], tools: Optional[Sequence[Any]] = None,
+               format: Optional[Any] = None, num_predict: Optional[int] = None) -> Any:
+        """
+        Invoke the profile's client (with tools bound, if given) within its concurrency limit.
+        format (e.g. a JSON schema) and num_predict override the profile for this call.
+
+        Once the turn's deadline is close (less than STREAMED_INVOKE_BELOW_SECONDS
+        left) the call is streamed and aggregated instead, so it can be aborted
+        between chunks; with more time left it is a plain request, cancelled only
+        at the next node. A failed server is retried on another.
+        """
+        kwargs = self._call_kwargs(profile, format, num_predict)
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+        slots = self._acquire(profile)
+
+        model = self.profiles[profile].model
+        call_start = time.perf_counter()
+
+        def call(backend: Backend) -> Any:
+            runnable = self._runnable(profile, tools, backend)
+            if deadline is None or deadline.remaining() >= STREAMED_INVOKE_BELOW_SECONDS:
+                return runnable.invoke(messages, **kwargs)
+            response = None
+            for chunk in self._checked(runnable.stream(messages, **kwargs), profile, deadline, call_start):
+                response = chunk if response is None else response + chunk
+            return response
+
+        try:
+            response = self._failover(profile, call)
+        finally:
+            slots.release()
+            metrics.observe("llm_call_ms", (time.perf_counter() - call_start) * 1000, profile=profile, model=model)
+
+        self._record_response(profile, messages, response, tools)
+        return response
+
+    def stream(self, profile: str, messages: List[Any], tools: Optional[Sequence[Any]] = None,
+               format: Optional[Any] = None, num_predict: Optional[int] = None) -> Iterator[Any]:
+        """
+        Stream the profile's response as message chunks, holding a concurrency slot
+        until the stream ends. Closing the generator early closes the HTTP response,
+        which makes Ollama stop generating. The turn's deadline (if any) is checked
+        on every chunk; once it passes, the request is aborted with TurnCancelled.
+
+        A server that fails before the first chunk is replaced by another; after
+        that the error is raised (chunks already handed out cannot be taken back).
+        """
+        kwargs = self._call_kwargs(profile, format, num_predict)
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+        slots = self._acquire(profile)
+
+        model = self.profiles[profile].model
+        call_start = time.perf_counter()
+        response = None
+        completed = False
+        tried: List[Backend] = []
+        attempts = len(self.pool.backends)
+        try:
+            for attempt in range(attempts):
+                backend = None
+                try:
+                    with self.pool.lease(model, tried) as backend:
+                        chunks = self._runnable(profile, tools, backend).stream(messages, **kwargs)
+                        for chunk in self._checked(chunks, profile, deadline, call_start):
+                            response = chunk if response is None else response + chunk
+                            yield chunk
+                    completed = True
+                    break
+                except Exception as e:
+                    if response is not None or backend is None or attempt == attempts - 1 \
+                            or not is_backend_failure(e):
+                        raise
+                    tried.append(backend)
+                    metrics.incr("llm_failovers", profile=profile)
+        finally:
+            slots.release()
+            metrics.observe("llm_call_ms", (time.perf_counter() - call_start) * 1000, profile=profile, model=model)
+            if not completed:
+                metrics.incr("llm_streams_cancelled", profile=profile)
+
+        if response is not None:
+            self._record_response(profile, messages, response, tools)
+
+
+llm_clients = LLMClientRegistry(llm_profiles(), BackendPool.from_config(llm_config()))
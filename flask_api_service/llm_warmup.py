@@ -0,0 +1,133 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from applications.etcd.init_etcd import LLMWarmupConfig
+from applications.metrics.mod import metrics
+from flask_api_service.prompt_builder import IST
+
+# User turn appended to each profile's real prompt prefix for the warmup generation
+WARMUP_USER_MESSAGE = HumanMessage(content="Hi")
+
+
+class LLMWarmup:
+    """
+    Keeps the Ollama tier warm so no user request pays the model load.
+
+    At boot, every profile's model gets a one-token generation on every server
+    that serves it, using the profile's real system prompt, which also primes
+    the server's prompt (prefix) cache. During business hours the same pings
+    repeat every keepalive_interval_seconds, renewing the models' keep_alive
+    before Ollama evicts them. Outside business hours the models are left to
+    expire.
+
+    Warm/cold per server and model comes from the backend pool (/api/ps
+    health checks and successful calls) and is reported on /health/ready.
+    With required_for_readiness, the instance is ready once readiness_profile
+    (warmed first) has been warmed successfully on at least one server; until
+    then the boot warmup is retried every keepalive_interval_seconds. Once
+    ready it stays ready: models are left to expire outside business hours.
+    """
+
+    def __init__(self, clients: Any, prompts: Dict[str, Callable[[], List[Any]]], config: LLMWarmupConfig):
+        self.clients = clients
+        self.prompts = prompts
+        self.config = config
+        self.state = "disabled" if not config.enabled else "not_started"  # → warming → done
+        self.primary_warmed = False  # the readiness profile was warmed on at least one server
+        self.last_run: Optional[float] = None
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def in_business_hours(self, now: Optional[datetime] = None) -> bool:
+        now = (now or datetime.now(IST)).astimezone(IST)
+        start, end = self.config.business_hours
+        return now.weekday() in self.config.business_days and start <= now.hour < end
+
+    def run(self, reason: str = "boot") -> Dict[str, Dict[str, Any]]:
+        """Warm every profile on every healthy server that serves its model."""
+        results: Dict[str, Dict[str, Any]] = {}
+        now = time.time()
+        for profile in sorted(self.prompts, key=lambda p: p != self.config.readiness_profile):
+            model = self.clients.profiles[profile].model
+            messages = self.prompts[profile]() + [WARMUP_USER_MESSAGE]
+            for backend in self.clients.pool.backends:
+                if not backend.serves(model) or not backend.available(now):
+                    continue
+                key = f"{backend.url} {profile}"
+                try:
+                    elapsed_ms = self.clients.warm(profile, backend, messages)
+                    results[key] = {"model": model, "ok": True, "ms": round(elapsed_ms, 1)}
+                    if profile == self.config.readiness_profile:
+                        self.primary_warmed = True
+                except Exception as e:
+                    metrics.incr("llm_warm_failures", profile=profile, backend=backend.url)
+                    results[key] = {"model": model, "ok": False, "error": str(e)[:200]}
+                    print(f"LLM warmup ({reason}) failed for {profile} on {backend.url}: {e}")
+        metrics.incr("llm_warm_runs", reason=reason)
+        with self._lock:
+            self.last_run = time.time()
+            self.last_results = results
+        return results
+
+    def start(self) -> None:
+        """
+        Boot warmup (repeated until the readiness profile is warm), then
+        keep-alive pings during business hours, in one daemon thread.
+        """
+        if not self.config.enabled or self._thread is not None:
+            return
+
+        def loop():
+            self.state = "warming"
+            start = time.perf_counter()
+            self.run("boot")
+            while not self.primary_warmed and self.config.readiness_profile in self.prompts:
+                time.sleep(self.config.keepalive_interval_seconds)
+                self.run("boot_retry")
+            self.state = "done"
+            print(f"LLM warmup done in {time.perf_counter() - start:.1f}s")
+            while True:
+                time.sleep(self.config.keepalive_interval_seconds)
+                if self.in_business_hours():
+                    self.run("keepalive")
+
+        self._thread = threading.Thread(target=loop, name="llm-warmup", daemon=True)
+        self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        if not self.config.enabled or not self.config.required_for_readiness:
+            return True
+        return self.primary_warmed or self.config.readiness_profile not in self.prompts
+
+    def status(self) -> Dict[str, Any]:
+        models = []
+        for profile in self.prompts:
+            model = self.clients.profiles[profile].model
+            for backend in self.clients.pool.backends:
+                if not backend.serves(model):
+                    continue
+                models.append({
+                    "backend": backend.url,
+                    "profile": profile,
+                    "model": model,
+                    "status": "warm" if backend.healthy and model in backend.loaded_models else "cold"
+                })
+        with self._lock:
+            last_run = self.last_run
+            errors = {key: r["error"] for key, r in self.last_results.items() if not r["ok"]}
+        return {
+            "warmup": self.state,
+            "warm": bool(models) and all(m["status"] == "warm" for m in models),
+            "required": self.config.required_for_readiness,
+            "ready": self.ready,
+            "business_hours": self.in_business_hours(),
+            "last_run": int(last_run * 1000) if last_run else None,
+            "models": models,
+            "errors": errors
+        }
@@ -0,0 +1,147 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import SystemMessage
+
+from flask_api_service.token_counter import count_message_tokens
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+NO_INTENT_TEXT = "No matched tool. Respond as a helpful assistant."
+
+MEMORY_CONTEXT_HEADER = "Earlier in this conversation (summary):"
+
+
+@lru_cache(maxsize=4)
+def _date_message(date_str: str) -> SystemMessage:
+    return SystemMessage(content=f"Current date (IST): {date_str}")
+
+
+def date_context_message(now: Optional[datetime] = None) -> SystemMessage:
+    """
+    Date-only time context. A seconds-resolution timestamp changed the prompt
+    every second; the date keeps it identical for a whole day.
+    """
+    now = now or datetime.now(IST)
+    return _date_message(now.astimezone(IST).strftime("%Y-%m-%d (%A)"))
+
+
+class PromptBuilder:
+    """
+    Assembles the tool-calling prompt from static to dynamic so consecutive
+    turns share the longest possible prefix and Ollama can reuse its KV cache:
+
+        system prompt        (never changes)
+        date context         (changes daily)
+        intent + schema(s)   (changes when the intent changes)
+        memory summary       (changes when old messages leave the window)
+        conversation         (grows every turn)
+
+    Schema fragments are rendered once per tool, not on every turn.
+    """
+
+    def __init__(self, system_prompt: str, tool_registry: Dict[str, Dict[str, Any]]):
+        self.system_message = SystemMessage(content=system_prompt)
+        self.schema_text = {
+            name: json.dumps(entry.get("schema", {}), indent=2)
+            for name, entry in tool_registry.items()
+        }
+        self._intent_messages: Dict[tuple, SystemMessage] = {}
+        self._no_intent_message = SystemMessage(content=NO_INTENT_TEXT)
+        self._lock = threading.Lock()
+
+    def intent_message(self, intent_tools: Sequence[str]) -> SystemMessage:
+        """Instruction and schema(s) for the active intent(s), built once per tool combination."""
+        key = tuple(intent_tools)
+        if not key:
+            return self._no_intent_message
+        message = self._intent_messages.get(key)
+        if message is None:
+            if len(key) > 1:
+                schemas = "\n\n".join(f"{name} schema:\n{self.schema_text.get(name, '{}')}" for name in key)
+                content = (
+                    f"Current intents: {list(key)}. The user asked for several independent tasks. "
+                    f"Extract parameters for each of these tools and, once confirmed, call all of them "
+                    f"together in one response.\n\n{schemas}"
+                )
+            else:
+                content = (
+                    f"Current intent: '{key[0]}'. "
+                    f"Extract parameters ONLY for this tool.\n\n"
+                    f"Schema:\n{self.schema_text.get(key[0], '{}')}"
+                )
+            message = SystemMessage(content=content)
+            with self._lock:
+                self._intent_messages[key] = message
+        return message
+
+    def fixed_messages(self, intent_tools: Sequence[str]) -> List[SystemMessage]:
+        """The part of the tool-calling prompt that does not depend on the conversation."""
+        return [self.system_message, date_context_message(), self.intent_message(intent_tools)]
+
+    def tool_calling_messages(self, history: List[Any], intent_tools: Sequence[str],
+                              memory_context: str = "") -> List[Any]:
+        """Prompt for the tool-calling LLM. System messages in the history are dropped (they are re-sent here)."""
+        messages = self.fixed_messages(intent_tools)
+        if memory_context:
+            messages.append(SystemMessage(content=f"{MEMORY_CONTEXT_HEADER}\n{memory_context}"))
+        messages.extend(m for m in history if not isinstance(m, SystemMessage))
+        return messages
+
+
+# ============================================
+# PREFIX REUSE STATS
+# ============================================
+
+class PromptCacheStats:
+    """
+    Per-profile prompt size vs. tokens Ollama actually evaluated.
+
+    Ollama's prompt_eval_count only counts tokens it had to evaluate, so
+    prompt tokens minus prompt_eval_count is the part served from the KV
+    prefix cache. Prompt tokens are counted locally (see token_counter), so
+    the reuse ratio is an estimate.
+    """
+
+    def __init__(self):
+        self._profiles: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, profile: str, messages: List[Any], response: Any, tools: Optional[Sequence[Any]] = None) -> None:
+        metadata = getattr(response, "response_metadata", None) or {}
+        evaluated = metadata.get("prompt_eval_count")
+        if evaluated is None:
+            return
+        prompt_tokens = count_message_tokens(messages, list(tools or []))
+        reused = max(prompt_tokens - evaluated, 0)
+        eval_ms = (metadata.get("prompt_eval_duration") or 0) / 1e6
+
+        with self._lock:
+            stats = self._profiles.setdefault(profile, {
+                "calls": 0, "prompt_tokens": 0, "evaluated_tokens": 0, "reused_tokens": 0,
+                "cache_hits": 0, "prompt_eval_ms": 0.0
+            })
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["evaluated_tokens"] += evaluated
+            stats["reused_tokens"] += reused
+            stats["cache_hits"] += 1 if reused > prompt_tokens / 2 else 0
+            stats["prompt_eval_ms"] += eval_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for profile, stats in self._profiles.items():
+                result[profile] = dict(
+                    stats,
+                    reuse_ratio=round(stats["reused_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0,
+                    prompt_eval_ms_avg=round(stats["prompt_eval_ms"] / stats["calls"], 1),
+                    prompt_eval_ms=round(stats["prompt_eval_ms"], 1)
+                )
+            return result
+
+
+prompt_cache_stats = PromptCacheStats()
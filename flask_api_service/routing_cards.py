@@ -0,0 +1,145 @@
+import argparse
+import json
+import time
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+from flask_api_service.constants import ROUTING_CANDIDATES_TOKENS
+from flask_api_service.token_counter import count_tokens
+
+
+class RoutingCard(NamedTuple):
+    name: str
+    text: str       # "- name | score <score> | purpose | required: ..."
+    tokens: int     # measured once, with a placeholder score
+
+
+# Filled in per turn; card sizes are measured with a 5-character score
+_SCORE = "<score>"
+
+
+def _purpose(tool: Any, description: str) -> str:
+    """First line of the tool's own description (falls back to the registry description)."""
+    for text in (getattr(tool, "description", "") or "", description or ""):
+        for line in text.splitlines():
+            line = line.strip().lstrip("0123456789. ").strip()
+            if line:
+                return line
+    return ""
+
+
+def build_routing_cards(tool_registry: Dict[str, Dict[str, Any]]) -> Dict[str, RoutingCard]:
+    """
+    One line per tool for the routing prompt: name, one-line purpose and
+    required arguments. The full example descriptions and JSON schemas only
+    matter to the tool-calling LLM, not to the intent decision.
+    """
+    cards = {}
+    for name, entry in tool_registry.items():
+        required = (entry.get("schema") or {}).get("required", [])
+        text = f"- {name} | score {_SCORE} | {_purpose(entry.get('tool'), entry.get('description', ''))}"
+        if required:
+            text += f" | required: {', '.join(required)}"
+        cards[name] = RoutingCard(name, text, count_tokens(text.replace(_SCORE, "0.000")))
+    return cards
+
+
+def render_candidates(candidates: Sequence[Dict[str, Any]], cards: Dict[str, RoutingCard],
+                      max_tokens: int = ROUTING_CANDIDATES_TOKENS) -> str:
+    """
+    Candidate section of the routing prompt, best score first, within max_tokens
+    (the top candidate is always included). Uses the precomputed card sizes, so
+    nothing is tokenized per turn.
+    """
+    lines = []
+    used = 0
+    for candidate in sorted(candidates, key=lambda c: c.get("score", 0), reverse=True):
+        card = cards.get(candidate["name"])
+        if card is None:
+            continue
+        if lines and used + card.tokens > max_tokens:
+            break
+        lines.append(card.text.replace(_SCORE, f"{candidate.get('score', 0):.3f}"))
+        used += card.tokens
+    return "\n".join(lines) if lines else "(none)"
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def legacy_candidates_text(candidates: Sequence[Dict[str, Any]], tool_registry: Dict[str, Dict[str, Any]]) -> str:
+    """The previous candidate section: full description and JSON schema per candidate."""
+    expanded = [{
+        "name": c["name"],
+        "description": tool_registry[c["name"]]["description"],
+        "schema": tool_registry[c["name"]]["schema"],
+        "score": c["score"],
+    } for c in candidates]
+    return json.dumps(expanded, indent=2)
+
+
+def _candidate_sets(tool_names: List[str], k: int = 4) -> List[List[Dict[str, Any]]]:
+    """Each tool once as the top candidate, followed by its k-1 registry neighbours."""
+    sets = []
+    for i, name in enumerate(tool_names):
+        others = [tool_names[(i + j) % len(tool_names)] for j in range(1, k)]
+        sets.append([{"name": name, "score": 0.82}] + [{"name": n, "score": round(0.7 - 0.05 * j, 2)}
+                                                         for j, n in enumerate(others)])
+    return sets
+
+
+def benchmark(call_ollama: bool = False, user_message: str = "I need flights from Delhi to Maldives") -> Dict[str, Any]:
+    """
+    Routing prompt tokens (and, with call_ollama, Ollama prompt-eval time) with
+    the legacy JSON candidates vs. the routing cards, over one candidate set per tool.
+    """
+    from langchain_core.messages import HumanMessage
+    from flask_api_service.api_helper import INTENT_DECISION_PROMPT_MSG, routing_cards, routing_data
+    from flask_api_service.llm_clients import llm_clients
+    from flask_api_service.token_counter import count_message_tokens
+    from flask_api_service.tool_setup import TOOL_REGISTRY
+
+    results: Dict[str, Any] = {}
+    candidate_sets = _candidate_sets(list(TOOL_REGISTRY.keys()))
+    for variant in ("legacy", "cards"):
+        prompt_tokens, eval_ms, eval_tokens = [], [], []
+        for candidates in candidate_sets:
+            if variant == "legacy":
+                candidates_text = legacy_candidates_text(candidates, TOOL_REGISTRY)
+            else:
+                candidates_text = render_candidates(candidates, routing_cards)
+            messages = [INTENT_DECISION_PROMPT_MSG,
+                        HumanMessage(content=routing_data("(none)", user_message, None, candidates_text))]
+            prompt_tokens.append(count_message_tokens(messages))
+
+            if call_ollama:
+                start = time.perf_counter()
+                response = llm_clients.invoke("routing", messages)
+                metadata = response.response_metadata or {}
+                eval_ms.append((metadata.get("prompt_eval_duration") or 0) / 1e6)
+                eval_tokens.append(metadata.get("prompt_eval_count") or 0)
+                print(f"{variant} {candidates[0]['name']}: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        summary = {"prompts": len(prompt_tokens),
+                   "prompt_tokens_avg": round(sum(prompt_tokens) / len(prompt_tokens), 1)}
+        if call_ollama:
+            summary["prompt_eval_ms_avg"] = round(sum(eval_ms) / len(eval_ms), 1)
+            summary["prompt_eval_tokens_avg"] = round(sum(eval_tokens) / len(eval_tokens), 1)
+        results[variant] = summary
+
+    results["token_reduction"] = round(1 - results["cards"]["prompt_tokens_avg"] / results["legacy"]["prompt_tokens_avg"], 3)
+    return results
+
+
+if __name__ == "__main__":
+    # python -m flask_api_service.routing_cards [--ollama]
+    parser = argparse.ArgumentParser(description="Routing prompt size: legacy candidate JSON vs. routing cards.")
+    parser.add_argument("--ollama", action="store_true", help="also time prompt evaluation on the routing model")
+    parser.add_argument("--show", action="store_true", help="print the routing cards")
+    args = parser.parse_args()
+
+    if args.show:
+        from flask_api_service.tool_setup import TOOL_REGISTRY
+        for card in build_routing_cards(TOOL_REGISTRY).values():
+            print(f"[{card.tokens:>3} tok] {card.text}")
+    print(json.dumps(benchmark(args.ollama), indent=2))
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+SERVICE_MODULE = "flask_api_service.api_service"
+
+# Should only be imported on the code path that needs them (e.g. /transcribe, DB access)
+HEAVY_MODULES = ["torch", "whisper", "chromadb", "cassandra", "pymilvus", "langchain_milvus",
+                 "sentence_transformers", "transformers", "onnxruntime"]
+
+DEFAULT_FIRST_QUERY = "What is the baggage policy for IndiGo?"
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `python -X importtime` output into {module, self_us, cumulative_us, depth} rows."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return rows
+
+
+def profile_imports(module: str = SERVICE_MODULE, top: int = 25) -> Dict[str, Any]:
+    """Import the service in a fresh interpreter with -X importtime and summarize where the time goes."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=dict(os.environ, MODEL_REGISTRY_BACKGROUND="0")
+    )
+    wall_s = time.perf_counter() - start
+    rows = parse_importtime(proc.stderr)
+
+    per_package = defaultdict(int)
+    for row in rows:
+        per_package[row["module"].split(".")[0]] += row["self_us"]
+
+    slowest = sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top]
+    return {
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 and proc.stderr.strip() else None,
+        "wall_s": round(wall_s, 3),
+        "modules_imported": len(rows),
+        "total_import_ms": round(sum(r["self_us"] for r in rows) / 1000, 1),
+        "by_package_ms": {pkg: round(us / 1000, 1)
+                          for pkg, us in sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[:top]},
+        "slowest_modules_ms": {r["module"]: round(r["self_us"] / 1000, 1) for r in slowest},
+    }
+
+
+def profile_service(first_query: str, ready_timeout_s: float) -> Dict[str, Any]:
+    """In this process: service import, graph compile, model loads and first-request latency."""
+    result: Dict[str, Any] = {}
+
+    start = time.perf_counter()
+    import flask_api_service.api_service as service
+    result["service_import_s"] = round(time.perf_counter() - start, 3)
+    result["heavy_modules_at_import"] = sorted(m for m in HEAVY_MODULES if m in sys.modules)
+
+    from langgraph.checkpoint.memory import InMemorySaver
+    start = time.perf_counter()
+    service.graph_builder.compile(checkpointer=InMemorySaver(), debug=False)
+    result["graph_compile_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    from applications.model_registry.mod import model_registry
+    start = time.perf_counter()
+    model_registry.start_background_loads()
+    while not model_registry.is_ready() and time.perf_counter() - start < ready_timeout_s:
+        time.sleep(0.05)
+    result["time_to_ready_s"] = round(time.perf_counter() - start, 3)
+    result["models"] = model_registry.status()["models"]
+
+    client = service.app.test_client()
+    for label in ("first_request", "second_request"):
+        start = time.perf_counter()
+        response = client.post("/handle_user_query", json={"query": first_query, "chat_id": f"startup-profile-{label}"})
+        result[label] = {"status_code": response.status_code,
+                         "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    result["heavy_modules_after_first_request"] = sorted(m for m in HEAVY_MODULES if m in sys.modules)
+    return result
+
+
+def run_profile(first_query: str = DEFAULT_FIRST_QUERY, ready_timeout_s: float = 300) -> Dict[str, Any]:
+    """Each phase runs in a fresh interpreter so nothing is already imported or loaded."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "flask_api_service.startup_profile", "--phase", "service",
+         "--query", first_query, "--ready-timeout", str(ready_timeout_s)],
+        capture_output=True, text=True, env=dict(os.environ, MODEL_REGISTRY_BACKGROUND="0")
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        service = {"ok": False, "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else None}
+    else:
+        service = dict(json.loads(lines[-1]), ok=True)
+
+    return {
+        "timestamp": int(time.time() * 1000),
+        "python": sys.version.split()[0],
+        "imports": profile_imports(),
+        "service": service,
+    }
+
+
+if __name__ == "__main__":
+    # python -m flask_api_service.startup_profile --out startup_profile.json
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the API service.")
+    parser.add_argument("--out", default="startup_profile.json")
+    parser.add_argument("--query", default=DEFAULT_FIRST_QUERY, help="query used for the first request")
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    parser.add_argument("--phase", choices=["all", "service"], default="all", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase == "service":
+        print(json.dumps(profile_service(args.query, args.ready_timeout)))
+    else:
+        report = run_profile(args.query, args.ready_timeout)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+        print(f"Wrote {args.out}")
@@ -0,0 +1,212 @@
+import json
+import math
+from typing import Any, Dict, List, Literal, Optional, Sequence, Type
+
+from pydantic import BaseModel, Field, ValidationError
+
+from applications.metrics.mod import metrics
+
+# ============================================
+# JSON SCANNER
+# ============================================
+
+# Characters JSON allows outside strings; anything else (prose) means an opener did not start JSON
+_JSON_SYNTAX = frozenset(" \t\r\n{}[]:,-+.0123456789eEtruefalsn")
+
+
+class JsonScanner:
+    """
+    Finds complete top-level JSON objects/arrays in text that arrives in pieces.
+
+    One pass over the characters, tracking nesting depth and whether the
+    scanner is inside a string (so braces in string values do not count).
+    feed() returns the values completed by that chunk. Text outside JSON
+    (prose, code fences, reasoning) is skipped. When an opener turns out not
+    to start JSON (prose characters, or a balanced span that does not parse),
+    scanning restarts from the next opener after it, so a stray "{" in prose
+    does not hide the payload behind it.
+    """
+
+    def __init__(self, arrays: bool = True):
+        self.openers = "{[" if arrays else "{"
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        completed: List[Any] = []
+        while chunk:
+            chunk = self._scan(chunk, completed)
+        return completed
+
+    def _scan(self, text: str, completed: List[Any]) -> str:
+        """Scan text into completed; returns the text to rescan after a false start ("" when done)."""
+        for i, ch in enumerate(text):
+            if self._depth == 0:
+                if ch in self.openers:
+                    self._buffer = [ch]
+                    self._depth = 1
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch not in _JSON_SYNTAX:
+                return self._restart(text[i + 1:])
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        value = json.loads("".join(self._buffer))
+                    except ValueError:
+                        # Balanced but not JSON (e.g. "{name}" in prose)
+                        return self._restart(text[i + 1:])
+                    completed.append(value)
+                    self._buffer = []
+        return ""
+
+    def _restart(self, rest: str) -> str:
+        """Drop the current candidate; its text after the opener is scanned again."""
+        rescan = "".join(self._buffer[1:]) + rest
+        self._reset()
+        return rescan
+
+    def finish(self) -> List[Any]:
+        """End of input: an unfinished candidate was not JSON, so rescan from the opener after its start."""
+        completed: List[Any] = []
+        while self._depth > 0 and not completed:
+            completed = self.feed(self._restart(""))
+        return completed
+
+    @property
+    def pending(self) -> bool:
+        """Inside an unfinished value (e.g. the output was cut off mid-object)."""
+        return self._depth > 0
+
+
+def first_json_value(text: str) -> Optional[Any]:
+    """First complete JSON object or array in text, or None."""
+    scanner = JsonScanner()
+    values = scanner.feed(text) or scanner.finish()
+    return values[0] if values else None
+
+
+# ============================================
+# SCHEMA SIZE → GENERATION CAP
+# ============================================
+
+# Bounds used when a schema leaves a size open
+DEFAULT_STRING_CHARS = 120
+DEFAULT_ARRAY_ITEMS = 10
+NUMBER_CHARS = 20
+
+# Indentation/whitespace the model may add around the compact JSON
+WHITESPACE_FACTOR = 1.25
+
+# Thinking tokens count towards num_predict; allow for them on top of the JSON
+REASONING_TOKEN_ALLOWANCE = {None: 0, False: 0, True: 1024, "low": 256, "medium": 1024, "high": 4096}
+
+
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    ref = schema.get("$ref")
+    if ref and ref.startswith("#/$defs/"):
+        return defs.get(ref[len("#/$defs/"):], {})
+    return schema
+
+
+def schema_max_chars(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> int:
+    """Upper bound on the length of compact JSON matching the schema (open-ended sizes use the defaults above)."""
+    defs = schema.get("$defs", defs or {})
+    schema = _resolve(schema, defs)
+
+    if "enum" in schema:
+        return max(len(json.dumps(v)) for v in schema["enum"])
+    if "const" in schema:
+        return len(json.dumps(schema["const"]))
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            return max(schema_max_chars(option, defs) for option in schema[key])
+
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        size = 2 + max(len(properties) - 1, 0)  # braces and commas
+        for name, prop in properties.items():
+            size += len(json.dumps(name)) + 1 + schema_max_chars(prop, defs)
+        return size
+    if kind == "array":
+        items = schema.get("maxItems", DEFAULT_ARRAY_ITEMS)
+        return 2 + items * (schema_max_chars(schema.get("items", {}), defs) + 1)
+    if kind == "string":
+        # Escapes can double a character
+        return 2 + 2 * schema.get("maxLength", DEFAULT_STRING_CHARS)
+    if kind in ("integer", "number"):
+        return NUMBER_CHARS
+    if kind == "boolean":
+        return 5
+    if kind == "null":
+        return 4
+    return 2 + 2 * DEFAULT_STRING_CHARS
+
+
+def generation_cap(schema: Dict[str, Any], reasoning: Any = None, ceiling: Optional[int] = None) -> int:
+    """
+    num_predict for a structured call: the schema's maximum size in tokens
+    (at most one token per character) plus room for the model's reasoning.
+    """
+    tokens = math.ceil(schema_max_chars(schema) * WHITESPACE_FACTOR)
+    tokens += REASONING_TOKEN_ALLOWANCE.get(reasoning, 1024)
+    return min(tokens, ceiling) if ceiling else tokens
+
+
+# ============================================
+# OUTPUT MODELS & VALIDATION
+# ============================================
+
+class RoutingDecision(BaseModel):
+    decision: Literal["followup", "new"]
+    selected_tools: List[str] = Field(default_factory=list, max_length=4)
+    reason: str = Field(default="", max_length=200)
+
+
+def routing_schema(tool_names: Sequence[str]) -> Dict[str, Any]:
+    """RoutingDecision's JSON schema, with selected_tools restricted to known tool names."""
+    schema = RoutingDecision.model_json_schema()
+    schema["properties"]["selected_tools"]["items"] = {"type": "string", "enum": list(tool_names)}
+    schema["required"] = ["decision", "selected_tools", "reason"]
+    return schema
+
+
+def validate_output(value: Any, model: Type[BaseModel], profile: str) -> Optional[BaseModel]:
+    """Validate parsed LLM output against a Pydantic model; failures are counted per profile."""
+    metrics.incr("llm_structured_outputs", profile=profile)
+    if value is None:
+        metrics.incr("llm_json_parse_failures", profile=profile, reason="no_json")
+        return None
+    try:
+        return model.model_validate(value)
+    except ValidationError as e:
+        metrics.incr("llm_json_parse_failures", profile=profile, reason="schema")
+        print(f"{profile} output does not match {model.__name__}: {e.errors()[:3]}")
+        return None
+
+
+def parse_output(text: str, model: Type[BaseModel], profile: str) -> Optional[BaseModel]:
+    """First JSON object in the LLM's text, validated against the model."""
+    value = first_json_value(text or "")
+    if isinstance(value, list):
+        value = value[0] if value and isinstance(value[0], dict) else None
+    return validate_output(value, model, profile)
@@ -0,0 +1,62 @@
+import json
+from typing import Any, List, Optional
+
+# gpt-oss uses the o200k (harmony) vocabulary
+TOKEN_ENCODING = "o200k_base"
+
+# Fallback when the encoding cannot be loaded (no network for the first download)
+CHARS_PER_TOKEN = 4
+
+# Per-message framing added by the chat template (role, start/end markers)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_failed = False
+_tool_tokens = {}
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:
+            _encoding_failed = True
+            print(f"Token counter: {TOKEN_ENCODING} unavailable ({e}), estimating {CHARS_PER_TOKEN} chars/token")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (estimated from its length if the tokenizer is unavailable)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_text(message: Any) -> str:
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        content = " ".join(item.get("text", "") if isinstance(item, dict) else str(item) for item in content)
+    text = str(content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps([{"name": c.get("name"), "args": c.get("args")} for c in tool_calls], default=str)
+    return text
+
+
+def count_message_tokens(messages: List[Any], tools: Optional[List[Any]] = None) -> int:
+    """Prompt tokens of a chat request: messages plus the bound tool schemas."""
+    total = sum(count_tokens(message_text(m)) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+    for tool in tools or []:
+        tokens = _tool_tokens.get(tool.name)
+        if tokens is None:
+            schema = getattr(tool, "args_schema", None) or {}
+            if not isinstance(schema, dict):
+                schema = schema.model_json_schema()
+            tokens = _tool_tokens[tool.name] = count_tokens(f"{tool.name}: {tool.description}\n{json.dumps(schema)}")
+        total += tokens
+    return total
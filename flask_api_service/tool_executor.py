@@ -0,0 +1,184 @@
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Tuple
+
+from langchain_core.messages import ToolMessage
+
+from applications.metrics.mod import metrics
+from StateBase import StateBase
+from flask_api_service.deadline import current_deadline
+from tools.utils import create_response_json, handle_tool_error
+
+TOOL_WORKERS = 8
+TOOL_CALL_TIMEOUT_SECONDS = 20
+
+# Mutating calls (bookings, cancellations) keep running after a timeout, so they are
+# waited for this long, past the turn deadline, and never answered with "try again"
+MUTATING_TOOL_TIMEOUT_SECONDS = 120
+
+
+class ParallelToolExecutor:
+    """
+    Graph node that runs every tool call of the last AI message concurrently on
+    a bounded thread pool. Each call gets its own timeout; a call that times out
+    or fails is answered with an error tool result instead of failing the turn.
+    Mutating tools are waited for (MUTATING_TOOL_TIMEOUT_SECONDS): a booking
+    still running is reported as pending, never as something to retry.
+
+    Read-only calls can be started before the node runs (dispatch(), from
+    chatbot while the LLM is still generating); the node then picks up the
+    running future by tool_call_id instead of starting the call again.
+    Mutating calls only ever start in the node, once the whole message is in.
+    """
+
+    def __init__(self, tools: List[Any], max_workers: int = TOOL_WORKERS,
+                 timeout_seconds: float = TOOL_CALL_TIMEOUT_SECONDS, mutating_tools: Iterable[str] = (),
+                 mutating_timeout_seconds: float = MUTATING_TOOL_TIMEOUT_SECONDS):
+        self.tools_by_name = {t.name: t for t in tools}
+        self.timeout_seconds = timeout_seconds
+        self.mutating_tools = frozenset(mutating_tools)
+        self.mutating_timeout_seconds = mutating_timeout_seconds
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-call")
+        self._dispatched: Dict[str, Tuple[Future, float]] = {}
+        self._lock = threading.Lock()
+
+    def dispatch(self, call: Dict[str, Any]) -> bool:
+        """Start a read-only tool call now; returns False when it is left to the node (unknown or mutating tools)."""
+        if call["name"] not in self.tools_by_name or call["name"] in self.mutating_tools:
+            return False
+        now = time.monotonic()
+        future = self._submit(call)
+        with self._lock:
+            # Calls whose turn never reached the tools node (e.g. chatbot failed afterwards)
+            for call_id, (stale, started) in list(self._dispatched.items()):
+                if now - started > 3 * self.timeout_seconds:
+                    stale.cancel()
+                    del self._dispatched[call_id]
+            self._dispatched[call["id"]] = (future, now)
+        metrics.incr("tool_calls_predispatched", tool=call["name"])
+        return True
+
+    def discard(self, call_ids: Iterable[str]) -> None:
+        """Drop calls dispatched for a message that will not reach the node (failed or cancelled stream)."""
+        with self._lock:
+            entries = [self._dispatched.pop(call_id, None) for call_id in call_ids]
+        for entry in entries:
+            if entry is not None:
+                entry[0].cancel()  # a call already running finishes; its result is ignored
+                metrics.incr("tool_calls_discarded")
+
+    def _take_dispatched(self, call_id: str):
+        with self._lock:
+            entry = self._dispatched.pop(call_id, None)
+        return entry[0] if entry else None
+
+    def _submit(self, call: Dict[str, Any]) -> Future:
+        # The call runs in the caller's context (turn deadline, cursor scope)
+        return self.pool.submit(contextvars.copy_context().run, self._run, call)
+
+    def _run(self, call: Dict[str, Any]) -> str:
+        start = time.perf_counter()
+        tool = self.tools_by_name[call["name"]]
+        try:
+            return tool.invoke(call.get("args", {}))
+        finally:
+            metrics.observe("tool_call_ms", (time.perf_counter() - start) * 1000, tool=call["name"])
+
+    def __call__(self, state: StateBase) -> Dict[str, Any]:
+        last_message = state["messages"][-1]
+        tool_calls = getattr(last_message, "tool_calls", None) or []
+
+        submitted = []
+        for call in tool_calls:
+            if call["name"] not in self.tools_by_name:
+                submitted.append((call, None))
+                continue
+            future = self._take_dispatched(call["id"])
+            submitted.append((call, future or self._submit(call)))
+
+        if len(tool_calls) > 1:
+            print(f"Running {len(tool_calls)} tool calls in parallel: {[c['name'] for c in tool_calls]}")
+
+        # Tools get their own timeout, cut short by the turn's deadline (slow calls become timeout results)
+        timeout_seconds = self.timeout_seconds
+        turn_deadline = current_deadline()
+        if turn_deadline is not None:
+            timeout_seconds = min(timeout_seconds, turn_deadline.remaining())
+        deadline = time.monotonic() + timeout_seconds
+        mutating_deadline = time.monotonic() + self.mutating_timeout_seconds
+        tool_messages = []
+        for call, future in submitted:
+            name = call["name"]
+            mutating = name in self.mutating_tools
+            if future is None:
+                content = create_response_json(f"Unknown tool: {name}", status=False, error="unknown_tool")
+            else:
+                try:
+                    wait_until = mutating_deadline if mutating else deadline
+                    content = future.result(timeout=max(0.0, wait_until - time.monotonic()))
+                except FuturesTimeout:
+                    metrics.incr("tool_call_timeouts", tool=name)
+                    if mutating:
+                        # Still running and may yet complete: a retry could book or cancel twice
+                        content = create_response_json(
+                            "Your request is still being processed. Please check your bookings "
+                            "in a few minutes before trying again.",
+                            status=False,
+                            error="pending"
+                        )
+                    else:
+                        future.cancel()
+                        content = create_response_json(
+                            f"{name} took too long to respond. Please try again.",
+                            status=False,
+                            error="timeout"
+                        )
+                except Exception as ex:
+                    content = handle_tool_error(ex, name)
+
+            if not isinstance(content, str):
+                content = json.dumps(content, default=str)
+            tool_messages.append(ToolMessage(content=content, name=name, tool_call_id=call["id"]))
+
+        return {"messages": tool_messages}
+
+
+def merge_tool_results(tool_messages: List[ToolMessage]) -> str:
+    """
+    Merge several tool results into one response envelope. Each result keeps
+    its own data/search_type under `data`; texts are joined in call order.
+    """
+    texts = []
+    sections = []
+    cursor_id = None
+    any_success = False
+
+    for message in tool_messages:
+        try:
+            payload = json.loads(message.content)
+        except (TypeError, json.JSONDecodeError):
+            payload = {"text": str(message.content), "status": True}
+
+        if payload.get("text"):
+            texts.append(payload["text"])
+        sections.append({
+            "tool": message.name,
+            "search_type": payload.get("search_type"),
+            "status": payload.get("status", False),
+            "data": payload.get("data"),
+            "cursor_id": payload.get("cursor_id"),
+        })
+        cursor_id = cursor_id or payload.get("cursor_id")
+        any_success = any_success or payload.get("status") is True
+
+    return create_response_json(
+        "\n\n".join(texts),
+        status=any_success,
+        data=sections,
+        search_type="MULTI",
+        cursor_id=cursor_id
+    )
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from applications.embeddings.mod import EmbeddingService, get_embedding_service
+
+TOOL_INDEX_DIR = os.environ.get("TOOL_INDEX_DIR", "models")
+
+_EXAMPLE_PREFIX = re.compile(r"^\s*\d+\.\s*")
+
+
+def example_lines(description: str) -> List[str]:
+    """Split a registry description into its example lines ('1. "Find a hotel"' → 'Find a hotel')."""
+    lines = []
+    for line in description.splitlines():
+        line = _EXAMPLE_PREFIX.sub("", line).strip().strip('"').strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def similarity_to_score(similarity: np.ndarray) -> np.ndarray:
+    """
+    Map cosine similarity onto the scale the Chroma retriever produced
+    (1 - squared L2 / 1.5 on unit vectors), so routing thresholds keep their meaning.
+    """
+    return np.maximum(0.0, 1.0 - (2.0 - 2.0 * similarity) / 1.5)
+
+
+class NumpyToolRetriever:
+    """
+    In-process tool retriever over a precomputed embedding matrix.
+
+    Every example line of every tool description gets its own unit vector;
+    a query is scored with one matmul and each tool keeps its best line
+    (max-similarity). The matrix is persisted under TOOL_INDEX_DIR, keyed by
+    a hash of the registry descriptions and the model name, so a restart
+    with unchanged tools only loads the file.
+    """
+
+    def __init__(self, tool_registry: Dict[str, Dict[str, Any]], embedder: Optional[EmbeddingService] = None,
+                 index_dir: str = TOOL_INDEX_DIR):
+        self.tool_registry = tool_registry
+        self.embedder = embedder or get_embedding_service()
+        self.model_name = self.embedder.model_name
+        self.index_dir = index_dir
+
+        self.tool_names: List[str] = list(tool_registry.keys())
+        self.lines: List[str] = []
+        line_owner: List[int] = []
+        for tool_idx, name in enumerate(self.tool_names):
+            tool_lines = example_lines(tool_registry[name]["description"]) or [name]
+            self.lines.extend(tool_lines)
+            line_owner.extend([tool_idx] * len(tool_lines))
+
+        # Lines are grouped per tool, so reduceat over group starts gives the per-tool max
+        self.line_owner = np.array(line_owner, dtype=np.int32)
+        self.group_starts = np.searchsorted(self.line_owner, np.arange(len(self.tool_names)))
+
+        self.index_key = self._index_key()
+        self.matrix = self._load_or_build()
+
+    def _index_key(self) -> str:
+        source = json.dumps(
+            {"model": self.model_name, "backend": self.embedder.backend,
+             "tools": {name: self.tool_registry[name]["description"] for name in self.tool_names}},
+            sort_keys=True
+        )
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.index_dir, f"tool_index.{self.index_key}.npz")
+
+    def _load_or_build(self) -> np.ndarray:
+        if os.path.exists(self.index_path):
+            with np.load(self.index_path, allow_pickle=False) as data:
+                matrix = data["matrix"]
+            if matrix.shape[0] == len(self.lines):
+                print(f"Loaded tool index {self.index_path} ({matrix.shape[0]} example lines).")
+                return matrix
+
+        matrix = self.embedder.encode(self.lines)
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp.npz"
+        np.savez(tmp_path, matrix=matrix)
+        os.replace(tmp_path, self.index_path)
+        print(f"Indexed {len(self.tool_names)} tools ({len(self.lines)} example lines) into {self.index_path}.")
+        return matrix
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embedder.embed_query(query)
+
+    def score_all(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Score of every tool for one query embedding (max over the tool's example lines)."""
+        similarities = self.matrix @ np.asarray(query_embedding, dtype=np.float32)
+        return similarity_to_score(np.maximum.reduceat(similarities, self.group_starts))
+
+    def retrieve_tool_and_score(self, query: str, k: int = 1,
+                                query_embedding: Optional[np.ndarray] = None
+                                ) -> Tuple[Optional[str], float, List[Tuple[str, float]]]:
+        """
+        Retrieves the top tool name, its similarity score, and the list of all retrieved
+        tool-score pairs.
+
+        Returns:
+            (top_tool_name, top_similarity_score, all_results_list)
+        """
+        if not self.tool_names:
+            return (None, 0.0, [])
+
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        scores = self.score_all(query_embedding)
+
+        k = min(k, len(self.tool_names))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        all_results = [(self.tool_names[i], float(scores[i])) for i in top]
+        return (all_results[0][0], all_results[0][1], all_results)
+
+
+# ============================================
+# THRESHOLD CALIBRATION
+# ============================================
+
+# (score, margin) grid searched by calibrate_thresholds
+CALIBRATION_SCORES = [round(0.50 + 0.01 * i, 2) for i in range(46)]
+CALIBRATION_MARGINS = [round(0.01 * i, 2) for i in range(21)]
+
+
+def _threshold_stats(rows: List[Tuple[str, float, float, Optional[str]]], total: int,
+                     min_score: float, min_margin: float) -> Dict[str, Any]:
+    """Coverage and precision of 'top tool wins' for rows of (top tool, score, margin, expected tool)."""
+    decided = [top == expected for top, score, margin, expected in rows if score >= min_score and margin >= min_margin]
+    return {
+        "min_score": min_score,
+        "min_margin": min_margin,
+        "decided": len(decided),
+        "coverage": round(len(decided) / total, 4) if total else None,
+        "precision": round(sum(decided) / len(decided), 4) if decided else None,
+    }
+
+
+def _best_thresholds(rows, total, target_precision, min_decided, margins):
+    """Widest coverage among the (score, margin) pairs that meet the precision target."""
+    best = None
+    for min_score in CALIBRATION_SCORES:
+        for min_margin in margins:
+            stats = _threshold_stats(rows, total, min_score, min_margin)
+            if stats["decided"] < min_decided or stats["precision"] < target_precision:
+                continue
+            if best is None or stats["decided"] > best["decided"]:
+                best = stats
+    return best
+
+
+def calibrate_thresholds(retriever: NumpyToolRetriever,
+                         examples: List[Tuple[str, Optional[str], Optional[str]]],
+                         current: Dict[str, Tuple[float, float]], fast_lane_tools: List[str],
+                         target_precision: float = 0.97, min_decided: int = 20) -> Dict[str, Any]:
+    """
+    Re-score labeled turns (message, current intent, expected tool or None) with
+    this retriever and report, for the routing, fast-lane and fallback
+    thresholds, how the current values and the recommended ones (widest
+    coverage at target_precision) perform. current maps each threshold family
+    to its (min_score, min_margin).
+    """
+    rows = []
+    for message, _, expected in examples:
+        _, _, ranked = retriever.retrieve_tool_and_score(message, k=2)
+        top_tool, top_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        rows.append((top_tool, top_score, top_score - runner_up, expected))
+
+    families = {
+        "routing": (rows, CALIBRATION_MARGINS),
+        "fast_lane": ([r for r in rows if r[0] in fast_lane_tools], CALIBRATION_MARGINS),
+        "fallback": (rows, [0.0]),
+    }
+    report: Dict[str, Any] = {"turns": len(rows), "target_precision": target_precision}
+    for family, (family_rows, margins) in families.items():
+        min_score, min_margin = current[family]
+        report[family] = {
+            "current": _threshold_stats(family_rows, len(rows), min_score, min_margin),
+            "recommended": _best_thresholds(family_rows, len(rows), target_precision, min_decided, margins),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    # python -m flask_api_service.tool_retriever [--log routing.jsonl] [--target-precision 0.97]
+    import argparse
+
+    from flask_api_service import fast_lane, intent_router
+    from flask_api_service.intent_classifier import FOLLOWUP_LABEL, NO_TOOL_LABEL, labeled_examples
+    from flask_api_service.tool_setup import TOOL_REGISTRY
+
+    parser = argparse.ArgumentParser(description="Calibrate retrieval thresholds on the LLM-labeled routing log.")
+    parser.add_argument("--log", default=intent_router.ROUTING_LOG_PATH)
+    parser.add_argument("--target-precision", type=float, default=0.97)
+    parser.add_argument("--min-decided", type=int, default=20)
+    args = parser.parse_args()
+
+    labeled = []
+    for record, label in labeled_examples(intent_router.read_routing_log(args.log)):
+        # The tool retrieval should put first: the active one for follow-ups, none for no-tool turns
+        expected = record.get("current_intent") if label == FOLLOWUP_LABEL else label
+        labeled.append((record["user_message"], record.get("current_intent"),
+                        None if label == NO_TOOL_LABEL else expected))
+
+    result = calibrate_thresholds(
+        NumpyToolRetriever(TOOL_REGISTRY),
+        labeled,
+        {
+            "routing": (intent_router.ROUTE_MIN_SCORE, intent_router.ROUTE_MIN_MARGIN),
+            "fast_lane": (fast_lane.FAST_LANE_MIN_SCORE, fast_lane.FAST_LANE_MIN_MARGIN),
+            "fallback": (intent_router.INTENT_CHANGE_THRESHOLD, 0.0),
+        },
+        sorted(fast_lane.FAST_LANE_TOOLS),
+        args.target_precision,
+        args.min_decided
+    )
+    print(json.dumps(result, indent=2))
@@ -18,6 +18,7 @@ from tools.support_tools import (
 )
 from tools.book_trip import book_trip, BookTripInput
 from tools.view_bookings import view_bookings, ViewBookingsInput
+from tools.next_page import next_page, NextPageInput
 
 # ==========================================
 # Structured Tools
@@ -330,6 +331,24 @@ book_trip_tool = StructuredTool.from_function(
     args_schema=BookTripInput
 )
 
+next_page_tool = StructuredTool.from_function(
+    func=next_page,
+    name="next_page",
+    description=(
+        "Show more results from the previous flight, hotel or package search.\n\n"
+        "USE THIS TOOL FOR:\n"
+        "- Paging through search results that were already found\n\n"
+        "COMMON QUESTION TYPES:\n"
+        "✓ 'Show me more'\n"
+        "✓ 'Next page'\n"
+        "✓ 'Any other options?'\n\n"
+        "PARAMETER:\n"
+        "- cursor_id: cursor_id from the previous results (required)\n"
+        "- page_size: Number of results (optional, default 10)\n"
+    ),
+    args_schema=NextPageInput
+)
+
 # List of tools to export
 tools = [
     search_hotels_tool,
@@ -345,9 +364,20 @@ tools = [
     get_baggage_policy_tool,
     track_flight_tool,
     view_bookings_tool,
-    book_trip_tool
+    book_trip_tool,
+    next_page_tool
 ]
 
+# Tools that change bookings: they must run exactly once, so they are never
+# abandoned on a timeout and never started before the tool call is complete
+MUTATING_TOOLS = frozenset({
+    book_flight_tool.name,
+    book_hotel_tool.name,
+    book_package_tool.name,
+    book_trip_tool.name,
+    cancel_booking_tool.name
+})
+
 # ==========================================
 # Tool Registry
 # ==========================================
@@ -543,6 +573,18 @@ def get_tool_registry():
         "schema": BookTripInput.model_json_schema()
     }
 
+    registry["next_page"] = {
+        "tool": next_page_tool,
+        "description": f"""
+            1. Show more results from the previous search
+            2. Go to the next page of flights, hotels or packages
+            3. "Show me more"
+            4. "Next page"
+            5. "Any other options?"
+        """,
+        "schema": NextPageInput.model_json_schema()
+    }
+
     return registry
 
 TOOL_REGISTRY = get_tool_registry()
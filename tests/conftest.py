@@ -0,0 +1,77 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubOllama:
+    """
+    A local stand-in for an Ollama server: GET /api/ps lists the loaded models,
+    POST /api/chat answers with one NDJSON chunk. down (500s) and missing
+    (404 for those models) simulate failing servers; requests records the
+    models asked for.
+    """
+
+    def __init__(self, name: str, loaded=()):
+        self.name = name
+        self.loaded = set(loaded)
+        self.missing = set()
+        self.down = False
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json"):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if stub.down:
+                    return self._send(500, json.dumps({"error": "down"}))
+                self._send(200, json.dumps({"models": [{"model": m, "name": m} for m in sorted(stub.loaded)]}))
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append(body["model"])
+                if stub.down:
+                    return self._send(500, json.dumps({"error": "down"}))
+                if body["model"] in stub.missing:
+                    return self._send(404, json.dumps({"error": f"model '{body['model']}' not found"}))
+                stub.loaded.add(body["model"])
+                chunk = {"model": body["model"], "created_at": "2026-01-01T00:00:00Z",
+                         "message": {"role": "assistant", "content": stub.name},
+                         "done": True, "done_reason": "stop", "prompt_eval_count": 1, "eval_count": 1}
+                self._send(200, json.dumps(chunk) + "\n", "application/x-ndjson")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_ollama():
+    """Factory for stub Ollama servers, shut down after the test."""
+    servers = []
+
+    def start(name: str, loaded=()):
+        server = StubOllama(name, loaded)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,87 @@
+import sqlite3
+
+from flask import Flask, g
+
+from applications.etcd.init_etcd import AdmissionConfig
+from flask_api_service.admission import INITIAL_TURN_SECONDS, AdmissionController, admission_control, \
+    take_admission_ticket
+import flask_api_service.admission as admission_module
+
+
+def _controller(tmp_path, llm_slots=1, **config):
+    return AdmissionController(AdmissionConfig(store_path=str(tmp_path / "admission.sqlite3"), **config), llm_slots)
+
+
+def _turn_seconds(controller):
+    with sqlite3.connect(controller.store_path) as connection:
+        row = connection.execute("SELECT value FROM stats WHERE key = 'turn_seconds'").fetchone()
+    return row[0] if row else INITIAL_TURN_SECONDS
+
+
+def test_user_bucket_allows_burst_then_rate_limits(tmp_path):
+    controller = _controller(tmp_path, user_burst=2, user_rate_per_second=0.5, max_in_flight=100,
+                             queue_deadline_seconds=1000)
+    assert controller.admit("alice").admitted
+    assert controller.admit("alice").admitted
+    rejected = controller.admit("alice")
+    assert not rejected.admitted
+    assert rejected.reason == "user_rate"
+    assert rejected.retry_after == 2
+    assert controller.admit("bob").admitted  # buckets are per user
+
+
+def test_in_flight_cap_rejects_until_a_ticket_is_released(tmp_path):
+    controller = _controller(tmp_path, max_in_flight=1, queue_deadline_seconds=1000)
+    first = controller.admit("alice")
+    rejected = controller.admit("bob")
+    assert not rejected.admitted
+    assert rejected.reason == "overloaded"
+    assert rejected.retry_after >= 1
+    controller.release(first.ticket)
+    assert controller.admit("bob").admitted
+
+
+def test_long_estimated_wait_is_turned_away(tmp_path):
+    controller = _controller(tmp_path, max_in_flight=100, queue_deadline_seconds=INITIAL_TURN_SECONDS * 1.5)
+    assert controller.admit("a").admitted  # runs
+    assert controller.admit("b").admitted  # waits one turn
+    rejected = controller.admit("c")       # would wait two turns
+    assert not rejected.admitted
+    assert rejected.retry_after == 3
+
+
+def test_release_without_record_leaves_turn_time_alone(tmp_path):
+    controller = _controller(tmp_path)
+    controller.release(controller.admit("alice").ticket, record=False)
+    assert _turn_seconds(controller) == INITIAL_TURN_SECONDS
+    assert controller.snapshot()["in_flight"] == 0
+    controller.release(controller.admit("alice").ticket)
+    assert _turn_seconds(controller) < INITIAL_TURN_SECONDS
+
+
+def test_taken_ticket_stays_in_flight_after_the_response(tmp_path, monkeypatch):
+    controller = _controller(tmp_path)
+    monkeypatch.setattr(admission_module, "admission", controller)
+    app = Flask(__name__)
+    taken = []
+
+    @app.route("/jobs", methods=["POST"])
+    @admission_control
+    def submit():
+        taken.append(take_admission_ticket())
+        return "queued", 202
+
+    @app.before_request
+    def user():
+        g.user_id = "alice"
+
+    app.test_client().post("/jobs").close()
+    assert controller.snapshot()["in_flight"] == 1
+    controller.release(taken[0], record=False)
+    assert controller.snapshot()["in_flight"] == 0
+    assert _turn_seconds(controller) == INITIAL_TURN_SECONDS
+
+
+def test_disabled_admits_everything(tmp_path):
+    controller = _controller(tmp_path, enabled=False, max_in_flight=1)
+    assert all(controller.admit("alice").admitted for _ in range(10))
@@ -0,0 +1,66 @@
+import time
+
+from tools.cursor_cache import CursorCache, cursor_scope
+
+
+def test_pages_through_stored_list():
+    cache = CursorCache()
+    cursor = cache.store(list(range(25)), 10)
+
+    page, next_cursor, total, _ = cache.page(cursor, 10)
+    assert page == list(range(10, 20))
+    assert total == 25
+
+    page, next_cursor, _, _ = cache.page(next_cursor, 10)
+    assert page == list(range(20, 25))
+    assert next_cursor is None
+
+
+def test_nothing_left_to_page_stores_nothing():
+    cache = CursorCache()
+    assert cache.store(list(range(5)), 10) is None
+
+
+def test_named_lists_page_in_lockstep():
+    cache = CursorCache()
+    cursor = cache.store({"outbound": list(range(12)), "inbound": list(range(3))}, 10, {"label": "flights"})
+
+    page, next_cursor, total, meta = cache.page(cursor, 10)
+    assert page == {"outbound": [10, 11], "inbound": []}
+    assert (next_cursor, total, meta["label"]) == (None, 12, "flights")
+
+
+def test_unknown_or_malformed_cursor():
+    cache = CursorCache()
+    assert cache.page("missing:10") is None
+    assert cache.page("abc:notanumber") is None
+    assert cache.page("") is None
+
+
+def test_expired_lists_are_dropped():
+    cache = CursorCache(ttl_seconds=0)
+    cursor = cache.store(list(range(20)), 10)
+    time.sleep(0.01)
+    assert cache.page(cursor) is None
+
+
+def test_least_recently_used_list_is_evicted():
+    cache = CursorCache(max_lists=2)
+    first = cache.store(list(range(20)), 10)
+    second = cache.store(list(range(20)), 10)
+    cache.page(first)  # first is now the most recently used
+    cache.store(list(range(20)), 10)
+
+    assert cache.page(first) is not None
+    assert cache.page(second) is None
+
+
+def test_cursor_only_pages_in_its_own_conversation():
+    cache = CursorCache()
+    with cursor_scope("user-a/chat-1"):
+        cursor = cache.store(list(range(20)), 10)
+
+    with cursor_scope("user-b/chat-2"):
+        assert cache.page(cursor) is None
+    with cursor_scope("user-a/chat-1"):
+        assert cache.page(cursor) is not None
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from applications.etcd.init_etcd import LLMBackendConfig, LLMProfileConfig
+from flask_api_service.constants import STREAMED_INVOKE_BELOW_SECONDS, TURN_DEADLINE_SECONDS
+from flask_api_service.deadline import Deadline, TurnCancelled, active_deadline, current_deadline, request_deadline
+from flask_api_service.job_queue import JobQueue
+from flask_api_service.llm_backends import BackendPool
+from flask_api_service.llm_clients import LLMClientRegistry
+
+
+def test_deadline_expires():
+    deadline = Deadline(0.05)
+    assert deadline.reason is None
+    time.sleep(0.06)
+    assert deadline.reason == "deadline"
+    assert deadline.remaining() == 0.0
+
+
+def test_cancel_reports_disconnected():
+    deadline = Deadline()
+    deadline.cancel()
+    with pytest.raises(TurnCancelled) as e:
+        deadline.check("chatbot")
+    assert e.value.reason == "disconnected"
+    assert e.value.node == "chatbot"
+
+
+@pytest.mark.parametrize("data, seconds", [
+    (None, TURN_DEADLINE_SECONDS),
+    ({"deadline_seconds": 5}, 5),
+    ({"deadline_seconds": TURN_DEADLINE_SECONDS * 10}, TURN_DEADLINE_SECONDS),
+    ({"deadline_seconds": "soon"}, TURN_DEADLINE_SECONDS),
+    ({"deadline_seconds": -1}, TURN_DEADLINE_SECONDS),
+])
+def test_request_deadline_is_clamped(data, seconds):
+    assert request_deadline(data).seconds == seconds
+
+
+def test_active_deadline_is_scoped():
+    deadline = Deadline()
+    with active_deadline(deadline):
+        assert current_deadline() is deadline
+    assert current_deadline() is None
+
+
+def test_job_runs_with_the_requested_deadline():
+    seen = []
+
+    def runner(job):
+        seen.append(job.deadline_seconds)
+        yield "final", {}
+
+    queue = JobQueue(runner, workers=1)
+    job = queue.submit("alice", "hi", deadline_seconds=7)
+    queue.pool.shutdown(wait=True)
+    assert seen == [7]
+    assert job.status == "done"
+
+
+class _Runnable:
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append("invoke")
+        return AIMessageChunk(content="ok")
+
+    def stream(self, messages, **kwargs):
+        self.calls.append("stream")
+        yield AIMessageChunk(content="o")
+        yield AIMessageChunk(content="k")
+
+
+def _registry(runnable):
+    registry = LLMClientRegistry({"routing": LLMProfileConfig()}, BackendPool([LLMBackendConfig()]))
+    registry._runnable = lambda profile, tools, backend: runnable
+    return registry
+
+
+def test_invoke_streams_only_when_the_deadline_is_close():
+    runnable = _Runnable()
+    registry = _registry(runnable)
+    assert registry.invoke("routing", []).content == "ok"
+    with active_deadline(Deadline(STREAMED_INVOKE_BELOW_SECONDS * 2)):
+        registry.invoke("routing", [])
+    with active_deadline(Deadline(STREAMED_INVOKE_BELOW_SECONDS / 2)):
+        assert registry.invoke("routing", []).content == "ok"
+    assert runnable.calls == ["invoke", "invoke", "stream"]
+
+
+def test_invoke_past_the_deadline_is_cancelled():
+    registry = _registry(_Runnable())
+    deadline = Deadline()
+    deadline.cancel()
+    with active_deadline(deadline), pytest.raises(TurnCancelled):
+        registry.invoke("routing", [])
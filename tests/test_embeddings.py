@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+import pytest
+
+import applications.embeddings.mod as embeddings
+from applications.etcd.init_etcd import EmbeddingConfig
+
+
+class _CountingEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def services(monkeypatch):
+    monkeypatch.setattr(embeddings, "_embedding_service", None)
+    monkeypatch.setattr(embeddings, "_rag_embedding_service", None)
+
+    def configure(**fields):
+        monkeypatch.setattr(embeddings, "_embedding_config", lambda: EmbeddingConfig(**fields))
+    return configure
+
+
+def test_rag_defaults_to_the_model_its_collection_was_indexed_with(services):
+    services()
+    rag = embeddings.get_rag_embedding_service()
+    assert rag.model_name == "all-MiniLM-L6-v2"
+    assert rag is not embeddings.get_embedding_service()
+
+
+def test_rag_shares_the_routing_service_when_configured_alike(services):
+    services(model_name="all-MiniLM-L6-v2", rag_model_name="all-MiniLM-L6-v2")
+    assert embeddings.get_rag_embedding_service() is embeddings.get_embedding_service()
+
+
+def test_concurrent_queries_are_batched_and_cached():
+    service = embeddings.EmbeddingService("test", batch_window_ms=50)
+    encoder = service._model = _CountingEncoder()
+
+    threads = [threading.Thread(target=service.embed_query, args=(text,)) for text in ["a", "bb", "a", "ccc"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert sorted(sum(encoder.batches, [])) == ["a", "bb", "ccc"]
+    assert service.embed_query("bb")[0] == 2.0
+    assert sum(len(batch) for batch in encoder.batches) == 3  # the last query was a cache hit
@@ -0,0 +1,23 @@
+import pytest
+
+from flask_api_service.fast_lane import extract_booking_id
+
+
+@pytest.mark.parametrize("message, booking_id", [
+    ("status of BKG-f_del_mle_1-2?", "BKG-f_del_mle_1-2"),
+    ("check booking BKG-RANDOM-3897", "BKG-RANDOM-3897"),
+    ("is HTL-h_mal_1-DEL confirmed", "HTL-h_mal_1-DEL"),
+    ("PKG-pkg_mal_1-2.", "PKG-pkg_mal_1-2"),
+    ("my booking (HTL-h_dxb_1-STA) please", "HTL-h_dxb_1-STA"),
+])
+def test_extracts_every_issued_id_format(message, booking_id):
+    assert extract_booking_id(message) == booking_id
+
+
+def test_ids_keep_their_case():
+    assert extract_booking_id("BKG-f_del_mle_1-2") == "BKG-f_del_mle_1-2"
+    assert extract_booking_id("bkg-f_del_mle_1-2") is None
+
+
+def test_no_id():
+    assert extract_booking_id("what is the status of my booking") is None
@@ -0,0 +1,39 @@
+import json
+
+import numpy as np
+
+from flask_api_service.intent_classifier import IntentClassifier, load_intent_classifier
+
+TOOLS = ["search_hotels", "search_flights"]
+
+
+def _save(path, backend="torch"):
+    classifier = IntentClassifier(np.zeros((2, 3)), np.zeros(2), ["followup", "search_hotels"], TOOLS,
+                                  "all-MiniLM-L6-v2", backend)
+    classifier.save(str(path))
+    return path
+
+
+def test_loads_when_model_backend_and_tools_match(tmp_path):
+    path = _save(tmp_path / "clf.npz", "onnx-int8")
+    classifier = load_intent_classifier(TOOLS, "all-MiniLM-L6-v2", "onnx-int8", str(path))
+    assert classifier is not None
+    assert classifier.embedding_backend == "onnx-int8"
+
+
+def test_rejects_other_embedding_backend(tmp_path):
+    path = _save(tmp_path / "clf.npz", "torch")
+    assert load_intent_classifier(TOOLS, "all-MiniLM-L6-v2", "onnx-int8", str(path)) is None
+
+
+def test_rejects_other_embedding_model_or_tools(tmp_path):
+    path = _save(tmp_path / "clf.npz")
+    assert load_intent_classifier(TOOLS, "BAAI/bge-m3", "torch", str(path)) is None
+    assert load_intent_classifier(TOOLS + ["book_hotel"], "all-MiniLM-L6-v2", "torch", str(path)) is None
+
+
+def test_classifiers_saved_without_a_backend_are_torch(tmp_path):
+    path = tmp_path / "old.npz"
+    meta = {"classes": ["followup", "none"], "tool_names": TOOLS, "embedding_model": "all-MiniLM-L6-v2"}
+    np.savez(path, weights=np.zeros((2, 3)), bias=np.zeros(2), meta=np.array(json.dumps(meta)))
+    assert IntentClassifier.load(str(path)).embedding_backend == "torch"
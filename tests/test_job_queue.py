@@ -0,0 +1,19 @@
+from flask_api_service.job_queue import JobQueue
+
+
+def test_status_is_kept_on_the_job_not_in_the_result():
+    body = {"status": True, "text": "hello"}
+
+    def runner(job):
+        yield "node", {"node": "chatbot", "status": "done"}
+        yield "status", {"status_code": 200}
+        yield "final", body
+
+    queue = JobQueue(runner, workers=1)
+    job = queue.submit("alice", "hi")
+    queue.pool.shutdown(wait=True)
+    record = job.to_dict()
+    assert record["job_status"] == "done"
+    assert record["status_code"] == 200
+    assert record["result"] == body
+    assert [event for event, _ in job.follow(0)] == ["node", "status", "final"]
@@ -0,0 +1,88 @@
+import time
+
+from langchain_core.messages import HumanMessage
+
+from applications.etcd.init_etcd import LLMBackendConfig, LLMProfileConfig
+from flask_api_service.llm_backends import AFFINITY_SLACK, BackendPool
+from flask_api_service.llm_clients import LLMClientRegistry
+
+MODEL = "stub-model"
+
+
+def _pool(*servers, cooldown_seconds=15.0):
+    return BackendPool([LLMBackendConfig(url=s.url) for s in servers], cooldown_seconds=cooldown_seconds)
+
+
+def _registry(pool):
+    return LLMClientRegistry({"routing": LLMProfileConfig(model=MODEL, reasoning=None)}, pool)
+
+
+def _ask(registry):
+    return registry.invoke("routing", [HumanMessage(content="hi")]).content
+
+
+def test_least_outstanding_server_is_picked(stub_ollama):
+    pool = _pool(stub_ollama("a"), stub_ollama("b"), stub_ollama("c"))
+    busy = [pool.select(MODEL), pool.select(MODEL)]
+    idle = pool.select(MODEL)
+    assert idle not in busy
+    pool.release(busy[0], MODEL)
+    assert pool.select(MODEL) is busy[0]
+
+
+def test_loaded_model_is_preferred_within_affinity_slack(stub_ollama):
+    pool = _pool(stub_ollama("warm", loaded=[MODEL]), stub_ollama("cold"))
+    pool.check_all()
+    warm, cold = pool.backends
+    warm.outstanding = AFFINITY_SLACK
+    assert pool.select(MODEL) is warm
+    cold.outstanding = 0
+    assert pool.select(MODEL) is cold  # warm is now AFFINITY_SLACK + 1 busier
+
+
+def test_failed_server_is_failed_over_and_cooled_down(stub_ollama):
+    first, second = stub_ollama("first", loaded=[MODEL]), stub_ollama("second")
+    pool = _pool(first, second, cooldown_seconds=0.2)
+    pool.check_all()
+    registry = _registry(pool)
+    first.down = True
+
+    assert _ask(registry) == "second"
+    assert first.requests == [MODEL]
+    assert not pool.backends[0].healthy
+    assert _ask(registry) == "second"
+    assert first.requests == [MODEL]  # not tried again while cooling down
+
+    first.down = False
+    time.sleep(0.25)
+    pool.backends[1].outstanding = AFFINITY_SLACK + 1  # make first the obvious pick
+    assert _ask(registry) == "first"
+
+
+def test_health_check_brings_a_server_back(stub_ollama):
+    first, second = stub_ollama("first"), stub_ollama("second")
+    pool = _pool(first, second)
+    first.down = True
+    pool.check_all()
+    assert [b.healthy for b in pool.backends] == [False, True]
+    first.down = False
+    pool.check_all()
+    assert [b.healthy for b in pool.backends] == [True, True]
+
+
+def test_missing_model_is_retried_after_a_health_check(stub_ollama):
+    first, second = stub_ollama("first"), stub_ollama("second")
+    pool = _pool(first, second)
+    registry = _registry(pool)
+    first.missing.add(MODEL)
+    pool.backends[1].outstanding = 1  # first is picked first
+
+    assert _ask(registry) == "second"
+    assert MODEL in pool.backends[0].missing_models
+    assert pool.backends[0].healthy  # a missing model is not a server failure
+
+    first.missing.clear()
+    pool.check_all()
+    assert not pool.backends[0].missing_models
+    pool.backends[1].outstanding = AFFINITY_SLACK + 1  # second has the model loaded by now
+    assert _ask(registry) == "first"
@@ -0,0 +1,66 @@
+import time
+
+from langchain_core.messages import SystemMessage
+
+from applications.etcd.init_etcd import LLMBackendConfig, LLMProfileConfig, LLMWarmupConfig
+from flask_api_service.llm_backends import BackendPool
+from flask_api_service.llm_clients import LLMClientRegistry
+from flask_api_service.llm_warmup import LLMWarmup
+
+
+def _warmup(server, **config):
+    profiles = {name: LLMProfileConfig(model=f"{name}-model", reasoning=None)
+                for name in ("routing", "tool_calling", "formatting")}
+    clients = LLMClientRegistry(profiles, BackendPool([LLMBackendConfig(url=server.url)]))
+    prompts = {name: (lambda: [SystemMessage(content="system")]) for name in profiles}
+    return LLMWarmup(clients, prompts, LLMWarmupConfig(**config))
+
+
+def test_not_ready_until_the_primary_profile_is_warmed(stub_ollama):
+    server = stub_ollama("ollama")
+    warmup = _warmup(server)
+    assert not warmup.ready
+    assert not warmup.status()["ready"]
+
+    warmup.run("boot")
+    assert server.requests[0] == "tool_calling-model"  # warmed first
+    assert sorted(server.requests) == ["formatting-model", "routing-model", "tool_calling-model"]
+    status = warmup.status()
+    assert status["ready"] and status["warm"]
+
+
+def test_failed_warmup_is_not_ready(stub_ollama):
+    server = stub_ollama("ollama")
+    server.missing.add("tool_calling-model")
+    warmup = _warmup(server)
+    warmup.run("boot")
+    assert not warmup.ready
+    assert "tool_calling" in " ".join(warmup.status()["errors"])
+
+    server.down = True
+    warmup.run("boot")
+    assert not warmup.ready
+
+
+def test_boot_warmup_is_retried_until_the_primary_profile_is_warm(stub_ollama):
+    server = stub_ollama("ollama")
+    server.missing.add("tool_calling-model")
+    warmup = _warmup(server, keepalive_interval_seconds=0.05, business_days=[])
+    warmup.start()
+    time.sleep(0.2)
+    assert warmup.state == "warming" and not warmup.ready
+
+    server.missing.clear()
+    warmup.clients.pool.check_all()  # the pool's health check lets the server be asked for the model again
+    for _ in range(40):
+        if warmup.state == "done":
+            break
+        time.sleep(0.05)
+    assert warmup.ready
+    assert warmup.state == "done"
+
+
+def test_readiness_can_be_decoupled_from_warmup(stub_ollama):
+    server = stub_ollama("ollama")
+    assert _warmup(server, required_for_readiness=False).ready
+    assert _warmup(server, enabled=False).ready
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from tools.cursor_cache import cursor_cache, cursor_scope
+from tools.result_cache import ResultCache, cached_tool, result_cache
+from tools.utils import create_response_json
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(("k",), compute, "t")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert calls == [1]
+    assert results == ["value"] * 8
+
+
+def test_error_is_shared_and_not_cached():
+    cache = ResultCache()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError("boom")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get_or_compute(("k",), failing, "t")
+    assert len(calls) == 2
+
+
+def test_should_cache_filters_results():
+    cache = ResultCache()
+    cache.get_or_compute(("k",), lambda: "bad", "t", should_cache=lambda value: value != "bad")
+    assert cache.get_or_compute(("k",), lambda: "good", "t") == "good"
+
+
+def test_expired_entries_are_recomputed():
+    cache = ResultCache(ttl_seconds=0)
+    cache.get_or_compute(("k",), lambda: 1, "t")
+    time.sleep(0.01)
+    assert cache.get_or_compute(("k",), lambda: 2, "t") == 2
+
+
+def test_lru_eviction_and_file_invalidation():
+    cache = ResultCache(max_entries=2)
+    cache.get_or_compute(("a",), lambda: "a", "t", ("flights.json",))
+    cache.get_or_compute(("b",), lambda: "b", "t", ("hotels.json",))
+    cache.get_or_compute(("c",), lambda: "c", "t", ("hotels.json",))
+    assert cache.stats()["entries"] == 2
+
+    cache.invalidate_file("hotels.json")
+    assert cache.stats()["entries"] == 0
+    assert cache.get_or_compute(("a",), lambda: "recomputed", "t") == "recomputed"
+
+
+class _SearchInput(BaseModel):
+    query: str
+
+
+def _paged_tool(calls):
+    @cached_tool("test_paged_search", _SearchInput)
+    def search(**kwargs):
+        calls.append(kwargs)
+        results = list(range(25))
+        cursor_id = cursor_cache.store(results, 10, {"label": "items"})
+        return create_response_json("found", data=results[:10], cursor_id=cursor_id)
+    return search
+
+
+def test_cache_hit_gets_a_fresh_cursor_in_its_own_conversation():
+    result_cache.clear()
+    calls = []
+    search = _paged_tool(calls)
+
+    with cursor_scope("user-a/chat"):
+        first = json.loads(search(query="x"))
+    with cursor_scope("user-b/chat"):
+        second = json.loads(search(query="x"))
+        assert len(calls) == 1
+        assert second["cursor_id"] != first["cursor_id"]
+        page, _, total, _ = cursor_cache.page(second["cursor_id"])
+    assert page == list(range(10, 20))
+    assert total == 25
+
+
+def test_cache_hit_pages_after_original_cursor_is_evicted():
+    result_cache.clear()
+    search = _paged_tool([])
+    first = json.loads(search(query="y"))
+
+    list_id = first["cursor_id"].partition(":")[0]
+    with cursor_cache._lock:
+        del cursor_cache._lists[list_id]
+    assert cursor_cache.page(first["cursor_id"]) is None
+
+    replayed = json.loads(search(query="y"))
+    assert cursor_cache.page(replayed["cursor_id"]) is not None
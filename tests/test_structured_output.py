@@ -0,0 +1,38 @@
+import pytest
+
+from flask_api_service.structured_output import JsonScanner, first_json_value
+
+
+@pytest.mark.parametrize("text, value", [
+    ('{"a": 1}', {"a": 1}),
+    ('Sure! ```json\n{"decision": "new"}\n```', {"decision": "new"}),
+    ('use { to start. {"a":1}', {"a": 1}),
+    ('{ {"a": 1}', {"a": 1}),
+    ('fill in {name} then {"b": [1, 2]}', {"b": [1, 2]}),
+    ('{"s": "braces } { in strings", "n": null}', {"s": "braces } { in strings", "n": None}),
+    ('{"quote": "say \\"hi\\" {"}', {"quote": 'say "hi" {'}),
+    ('[1, 2, {"x": true}]', [1, 2, {"x": True}]),
+])
+def test_first_json_value(text, value):
+    assert first_json_value(text) == value
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "{ unterminated", "{not: json}"])
+def test_first_json_value_none(text):
+    assert first_json_value(text) is None
+
+
+def test_values_complete_across_chunks():
+    scanner = JsonScanner(arrays=False)
+    chunks = ['thinking { about it ', '{"name": "search', '_hotels", "args": {"loc', 'ation": "Dubai"}}', ' and [1]']
+    completed = [scanner.feed(chunk) for chunk in chunks]
+    assert completed == [[], [], [], [{"name": "search_hotels", "args": {"location": "Dubai"}}], []]
+    assert not scanner.pending
+
+
+def test_cut_off_value_is_pending():
+    scanner = JsonScanner()
+    assert scanner.feed('{"a": [1, 2') == []
+    assert scanner.pending
+    assert scanner.finish() == []
+    assert not scanner.pending
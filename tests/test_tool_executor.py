@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+from flask_api_service.tool_executor import ParallelToolExecutor
+
+
+class _Tool:
+    def __init__(self, name, seconds=0.0, result="done"):
+        self.name = name
+        self.seconds = seconds
+        self.result = result
+        self.finished = threading.Event()
+
+    def invoke(self, args):
+        time.sleep(self.seconds)
+        self.finished.set()
+        return json.dumps({"status": True, "text": self.result})
+
+
+def _turn(*names):
+    calls = [{"name": name, "args": {}, "id": f"call-{i}"} for i, name in enumerate(names)]
+    return {"messages": [AIMessage(content="", tool_calls=calls)]}
+
+
+def _results(output):
+    return [json.loads(message.content) for message in output["messages"]]
+
+
+def test_calls_run_in_parallel():
+    executor = ParallelToolExecutor([_Tool("a", 0.2), _Tool("b", 0.2)])
+    start = time.monotonic()
+    results = _results(executor(_turn("a", "b")))
+    assert [r["status"] for r in results] == [True, True]
+    assert time.monotonic() - start < 0.35
+
+
+def test_slow_read_only_call_times_out():
+    executor = ParallelToolExecutor([_Tool("search", 0.5)], timeout_seconds=0.05)
+    (result,) = _results(executor(_turn("search")))
+    assert result["status"] is False
+    assert result["error"] == "timeout"
+
+
+def test_mutating_call_is_waited_for_past_the_timeout():
+    booking = _Tool("book_hotel", 0.2, "booked")
+    executor = ParallelToolExecutor([booking], timeout_seconds=0.05, mutating_tools={"book_hotel"})
+    (result,) = _results(executor(_turn("book_hotel")))
+    assert result == {"status": True, "text": "booked"}
+
+
+def test_mutating_call_still_running_is_pending_not_retry():
+    booking = _Tool("cancel_booking", 0.3)
+    executor = ParallelToolExecutor([booking], timeout_seconds=0.01, mutating_tools={"cancel_booking"},
+                                    mutating_timeout_seconds=0.05)
+    (result,) = _results(executor(_turn("cancel_booking")))
+    assert result["error"] == "pending"
+    assert "please try again" not in result["text"].lower()
+    assert booking.finished.wait(1)  # the call itself was not abandoned
+
+
+def test_unknown_tool_is_reported():
+    executor = ParallelToolExecutor([])
+    (result,) = _results(executor(_turn("missing")))
+    assert result["error"] == "unknown_tool"
+
+
+def test_mutating_call_is_not_dispatched_mid_stream():
+    booking = _Tool("book_flight")
+    executor = ParallelToolExecutor([booking], mutating_tools={"book_flight"})
+    assert executor.dispatch({"name": "book_flight", "args": {}, "id": "call-0"}) is False
+    assert not booking.finished.wait(0.1)
+
+
+def test_discarded_call_is_not_picked_up():
+    search = _Tool("search", 0.1, "first")
+    executor = ParallelToolExecutor([search])
+    assert executor.dispatch({"name": "search", "args": {}, "id": "call-0"})
+    executor.discard(["call-0"])
+    assert executor._take_dispatched("call-0") is None
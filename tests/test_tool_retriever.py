@@ -0,0 +1,64 @@
+import zlib
+
+import numpy as np
+
+from flask_api_service.tool_retriever import NumpyToolRetriever, calibrate_thresholds, example_lines
+
+REGISTRY = {
+    "search_hotels": {"description": '1. "find a hotel"\n2. "hotels in dubai"'},
+    "search_flights": {"description": '1. "find flights"\n2. "air tickets to delhi"'},
+    "get_baggage_policy": {"description": '1. "baggage allowance"'},
+}
+
+
+class _BagOfWords:
+    """Deterministic stand-in for the embedding service: hashed bag of words, unit-normalized."""
+    model_name = "bag-of-words"
+    backend = "test"
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % 64] += 1.0
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+    def embed_query(self, text):
+        return self.encode([text])[0]
+
+
+def _retriever(tmp_path):
+    return NumpyToolRetriever(REGISTRY, embedder=_BagOfWords(), index_dir=str(tmp_path))
+
+
+def test_example_lines_strip_numbering_and_quotes():
+    assert example_lines(REGISTRY["search_hotels"]["description"]) == ["find a hotel", "hotels in dubai"]
+
+
+def test_best_example_line_wins(tmp_path):
+    top, score, ranked = _retriever(tmp_path).retrieve_tool_and_score("hotels in dubai", k=3)
+    assert top == "search_hotels"
+    assert score == ranked[0][1] and score > ranked[1][1]
+    assert len(ranked) == 3
+
+
+def test_index_is_reused_from_disk(tmp_path):
+    first = _retriever(tmp_path)
+    second = _retriever(tmp_path)
+    assert first.index_path == second.index_path
+    assert np.array_equal(first.matrix, second.matrix)
+
+
+def test_calibration_reports_current_and_recommended_thresholds(tmp_path):
+    examples = [("hotels in dubai", None, "search_hotels"), ("air tickets to delhi", None, "search_flights"),
+                ("baggage allowance", None, "get_baggage_policy"), ("find", None, None)] * 10
+    current = {"routing": (0.70, 0.08), "fast_lane": (0.70, 0.05), "fallback": (0.65, 0.0)}
+    report = calibrate_thresholds(_retriever(tmp_path), examples, current, ["get_baggage_policy"],
+                                  target_precision=0.95, min_decided=5)
+
+    assert report["turns"] == 40
+    routing = report["routing"]
+    assert routing["current"]["min_score"] == 0.70
+    assert routing["recommended"]["precision"] >= 0.95
+    assert routing["recommended"]["decided"] >= 5
+    assert report["fast_lane"]["recommended"]["decided"] <= 10
@@ -1,5 +1,6 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, ValidationError
+from tools.result_cache import cached_tool
 from tools.utils import load_data, create_response_json, handle_tool_error
 
 class CreateItineraryInput(BaseModel):
@@ -8,6 +9,7 @@ class CreateItineraryInput(BaseModel):
     purpose: str = Field(description="Purpose of visit (e.g., 'leisure', 'business').")
     budget: float = Field(default=5000.0, description="Max budget in INR (e.g. 5000.0, 10000.50).")
 
+@cached_tool("create_itinerary", CreateItineraryInput, ["destinations.json"])
 def create_itinerary(*args, **kwargs) -> str:
     """
     Create a travel itinerary based on user preferences.
@@ -0,0 +1,117 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+PAGE_SIZE = 10
+MAX_CURSOR_LISTS = 1000
+CURSOR_TTL_SECONDS = 30 * 60
+
+# A ranked result is either one list or named lists paged in lockstep
+# (e.g. {"outbound": [...], "inbound": [...]} for round-trip flights).
+RankedResults = Union[List[Any], Dict[str, List[Any]]]
+
+# Conversation the running tool call belongs to (set per graph node by api_service.timed_node);
+# cursors are only valid in the conversation that created them
+_cursor_scope: ContextVar[str] = ContextVar("cursor_scope", default="")
+
+
+def current_cursor_scope() -> str:
+    return _cursor_scope.get()
+
+
+@contextmanager
+def cursor_scope(scope: str):
+    token = _cursor_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _cursor_scope.reset(token)
+
+
+class CursorCache:
+    """
+    Bounded LRU + TTL store of complete ranked result lists.
+
+    A search stores its full candidate list once; a cursor id is
+    "<list_id>:<offset>", so fetching the next page is a slice of the
+    stored list - O(page size), no re-query and no re-validation.
+
+    Each list belongs to the conversation (cursor scope) that stored it; a
+    cursor presented from another conversation is treated as unknown.
+    """
+
+    def __init__(self, max_lists: int = MAX_CURSOR_LISTS, ttl_seconds: int = CURSOR_TTL_SECONDS):
+        self.max_lists = max_lists
+        self.ttl_seconds = ttl_seconds
+        self._lists: "OrderedDict[str, Tuple[float, str, RankedResults, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def store(self, results: RankedResults, offset: int, meta: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Stash results and return the cursor for the page starting at offset (None if nothing is left)."""
+        if _result_length(results) <= offset:
+            return None
+
+        list_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._lists[list_id] = (time.time(), current_cursor_scope(), results, meta or {})
+            while len(self._lists) > self.max_lists:
+                self._lists.popitem(last=False)
+        return f"{list_id}:{offset}"
+
+    def entry(self, cursor_id: str) -> Optional[Tuple[RankedResults, int, Dict[str, Any]]]:
+        """(results, offset, meta) behind a cursor, e.g. to store it again under a fresh cursor."""
+        list_id, _, offset_str = (cursor_id or "").partition(":")
+        with self._lock:
+            entry = self._lists.get(list_id)
+        if entry is None or not offset_str.isdigit():
+            return None
+        _, scope, results, meta = entry
+        if scope != current_cursor_scope():
+            return None
+        return results, int(offset_str), meta
+
+    def page(self, cursor_id: str, page_size: int = PAGE_SIZE) -> Optional[Tuple[RankedResults, Optional[str], int, Dict[str, Any]]]:
+        """
+        Return (page, next_cursor_id, total, meta) for a cursor, or None if the
+        cursor is unknown, expired or belongs to another conversation.
+        """
+        list_id, _, offset_str = (cursor_id or "").partition(":")
+        try:
+            offset = max(0, int(offset_str))
+        except ValueError:
+            return None
+
+        with self._lock:
+            entry = self._lists.get(list_id)
+            if entry is None:
+                return None
+            created, scope, results, meta = entry
+            if scope != current_cursor_scope():
+                return None
+            if time.time() - created > self.ttl_seconds:
+                del self._lists[list_id]
+                return None
+            self._lists.move_to_end(list_id)
+
+        end = offset + page_size
+        if isinstance(results, dict):
+            page = {name: items[offset:end] for name, items in results.items()}
+        else:
+            page = results[offset:end]
+
+        total = _result_length(results)
+        next_cursor = f"{list_id}:{end}" if end < total else None
+        return page, next_cursor, total, meta
+
+
+def _result_length(results: RankedResults) -> int:
+    if isinstance(results, dict):
+        return max((len(items) for items in results.values()), default=0)
+    return len(results)
+
+
+cursor_cache = CursorCache()
@@ -0,0 +1,154 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from applications.logger.mod import generate_app_log, LogLevels
+from tools.utils import DATA_DIR
+
+
+class Dataset:
+    """
+    Read-only, in-memory view of a JSON data file.
+
+    The file is parsed once and re-read only when its mtime/size changes.
+    Field indexes (lowercased value -> record positions) are built lazily so
+    searches touch only the matching records instead of scanning the file.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.path = os.path.join(DATA_DIR, filename)
+        self.records: List[Dict[str, Any]] = []
+        self.version: str = ""
+        self._stat_key = None
+        self._indexes: Dict[str, Dict[str, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """Reload the file if it changed on disk. Returns True when a reload happened."""
+        try:
+            st = os.stat(self.path)
+            stat_key = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stat_key = None
+
+        if stat_key == self._stat_key and self.version:
+            return False
+
+        with self._lock:
+            if stat_key == self._stat_key and self.version:
+                return False
+
+            if stat_key is None:
+                raw = b"[]"
+            else:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+
+            records = json.loads(raw)
+            self.records = records if isinstance(records, list) else []
+            self.version = hashlib.sha1(raw).hexdigest()[:16]
+            self._indexes = {}
+            self._stat_key = stat_key
+            generate_app_log(
+                api_name="dataset",
+                log_level=LogLevels.Info,
+                message=f"Loaded dataset {self.filename} ({len(self.records)} records, version {self.version})"
+            )
+            return True
+
+    def _index(self, field: str) -> Dict[str, List[int]]:
+        index = self._indexes.get(field)
+        if index is not None:
+            return index
+
+        with self._lock:
+            index = self._indexes.get(field)
+            if index is None:
+                index = {}
+                for pos, record in enumerate(self.records):
+                    value = record.get(field, "") if isinstance(record, dict) else ""
+                    index.setdefault(str(value).lower(), []).append(pos)
+                self._indexes[field] = index
+        return index
+
+    def positions_equal(self, field: str, value: Any) -> List[int]:
+        """Positions of records whose field equals value (case-insensitive)."""
+        return self._index(field).get(str(value).lower(), [])
+
+    def positions_contains(self, field: str, value: Any) -> List[int]:
+        """
+        Positions of records whose field contains value (case-insensitive).
+        Only the distinct values of the field are scanned, not every record.
+        """
+        needle = str(value).lower()
+        positions: List[int] = []
+        for key, postings in self._index(field).items():
+            if needle in key:
+                positions.extend(postings)
+        positions.sort()
+        return positions
+
+    def select(self, positions: Iterable[int]) -> List[Dict[str, Any]]:
+        """The shared records at positions; read-only, use copies() for anything handed to callers."""
+        return [self.records[pos] for pos in positions]
+
+    def copies(self, positions: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Independent copies of the records at positions (all records by default)."""
+        if positions is None:
+            positions = range(len(self.records))
+        return [copy.deepcopy(self.records[pos]) for pos in positions]
+
+
+def intersect_positions(*position_lists: List[int]) -> List[int]:
+    """Intersect sorted position lists, keeping file order."""
+    if not position_lists:
+        return []
+    ordered = sorted(position_lists, key=len)
+    result = set(ordered[0])
+    for positions in ordered[1:]:
+        result.intersection_update(positions)
+        if not result:
+            break
+    return sorted(result)
+
+
+_datasets: Dict[str, Dataset] = {}
+_reload_listeners: List[Callable[[str, str], None]] = []
+_registry_lock = threading.Lock()
+
+
+def get_dataset(filename: str) -> Dataset:
+    """Return the shared Dataset for filename, reloading it if the file changed."""
+    dataset = _datasets.get(filename)
+    if dataset is None:
+        with _registry_lock:
+            dataset = _datasets.get(filename)
+            if dataset is None:
+                dataset = Dataset(filename)
+                _datasets[filename] = dataset
+
+    if dataset.refresh():
+        for listener in list(_reload_listeners):
+            try:
+                listener(filename, dataset.version)
+            except Exception as e:
+                generate_app_log(
+                    api_name="dataset",
+                    log_level=LogLevels.Error,
+                    message=f"Dataset reload listener failed for {filename}: {e}"
+                )
+    return dataset
+
+
+def dataset_version(*filenames: str) -> str:
+    """Combined version string for one or more data files."""
+    return "-".join(get_dataset(name).version for name in filenames)
+
+
+def on_dataset_reload(listener: Callable[[str, str], None]) -> None:
+    """Register a callback(filename, version) fired whenever a dataset is (re)loaded."""
+    _reload_listeners.append(listener)
@@ -0,0 +1,66 @@
+from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from tools.utils import create_response_json, handle_tool_error
+from tools.cursor_cache import cursor_cache, PAGE_SIZE
+
+class NextPageInput(BaseModel):
+    cursor_id: str = Field(description="The cursor_id returned by the previous search results.")
+    page_size: int = Field(default=PAGE_SIZE, description="Number of results to show.")
+
+def next_page(*args, **kwargs) -> str:
+    """
+    Show the next page of results from a previous search, without searching again.
+    """
+    try:
+        payload_candidate: Optional[dict] = None
+
+        if 'payload' in kwargs:
+            payload_candidate = kwargs.pop('payload')
+
+        if args:
+            if len(args) >= 2 and isinstance(args[0], dict) and isinstance(args[1], dict):
+                payload_candidate = payload_candidate or args[1]
+            else:
+                for a in args:
+                    if isinstance(a, dict):
+                        if payload_candidate is None:
+                            payload_candidate = a
+
+        merged: Dict[str, Any] = {}
+        if payload_candidate:
+            if not isinstance(payload_candidate, dict):
+                return create_response_json("payload must be a dict", status=False)
+            merged.update(payload_candidate)
+
+        merged.update(kwargs)
+
+        try:
+            validated = NextPageInput(**merged)
+        except ValidationError as e:
+            return create_response_json(f"Invalid payload: {e}", status=False)
+
+        page_size = max(1, min(validated.page_size, 50))
+        cursor_page = cursor_cache.page(validated.cursor_id, page_size)
+
+        if cursor_page is None:
+            return create_response_json(
+                "These results have expired. Please run the search again.",
+                status=False
+            )
+
+        page, next_cursor, total, meta = cursor_page
+        label = meta.get("label", "results")
+        msg = f"Here are more {label} ({total} in total)."
+        if not next_cursor:
+            msg += " That's all of them."
+
+        return create_response_json(
+            msg,
+            status=True,
+            data=page,
+            search_type=meta.get("search_type"),
+            cursor_id=next_cursor
+        )
+
+    except Exception as ex:
+        return handle_tool_error(ex, "next_page")
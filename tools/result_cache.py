@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from applications.metrics.mod import metrics
+from tools.cursor_cache import cursor_cache
+from tools.dataset import dataset_version, on_dataset_reload
+
+MAX_CACHE_ENTRIES = 512
+CACHE_TTL_SECONDS = 5 * 60
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """
+    Bounded TTL/LRU cache with singleflight request coalescing.
+
+    Concurrent misses for the same key run the computation once; the other
+    callers block on the in-flight result instead of recomputing it.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHE_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any], tool_name: str,
+                       data_files: Tuple[str, ...] = (),
+                       should_cache: Callable[[Any], bool] = lambda _: True) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value, _ = entry
+                if time.time() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    metrics.incr("tool_cache_hits", tool=tool_name)
+                    return value
+                del self._entries[key]
+
+            flight = self._in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._in_flight[key] = flight
+
+        if not is_leader:
+            metrics.incr("tool_cache_coalesced", tool=tool_name)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        metrics.incr("tool_cache_misses", tool=tool_name)
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if flight.error is None and should_cache(flight.result):
+                    self._entries[key] = (time.time(), flight.result, data_files)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        metrics.incr("tool_cache_evictions")
+            flight.done.set()
+
+        return flight.result
+
+    def invalidate_file(self, filename: str) -> None:
+        """Drop every entry computed from the given data file."""
+        with self._lock:
+            stale = [key for key, (_, _, files) in self._entries.items() if filename in files]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            metrics.incr("tool_cache_invalidations", len(stale))
+            print(f"Result cache: dropped {len(stale)} entries after {filename} reload")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "in_flight": len(self._in_flight),
+                    "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds}
+
+
+result_cache = ResultCache()
+on_dataset_reload(lambda filename, version: result_cache.invalidate_file(filename))
+
+
+def _is_success(cached: Tuple[Any, Any]) -> bool:
+    try:
+        return json.loads(cached[0]).get("status") is True
+    except Exception:
+        return False
+
+
+def _with_cursor_list(response: Any) -> Tuple[Any, Any]:
+    """The response plus the ranked list behind its cursor_id (if any), as stored in the cache."""
+    try:
+        cursor_id = json.loads(response).get("cursor_id")
+    except Exception:
+        cursor_id = None
+    return response, cursor_cache.entry(cursor_id) if cursor_id else None
+
+
+def _replay(cached: Tuple[Any, Any]) -> Any:
+    """
+    A cached response for a new caller. Responses that page get a fresh cursor
+    (in the caller's conversation) over the cached list, so "show more" works
+    even after the original cursor has left the cursor cache.
+    """
+    response, cursor_list = cached
+    if cursor_list is None:
+        return response
+    results, offset, meta = cursor_list
+    payload = json.loads(response)
+    payload["cursor_id"] = cursor_cache.store(results, offset, meta)
+    payload["timestamp"] = int(time.time() * 1000)
+    return json.dumps(payload, indent=2)
+
+
+def cached_tool(tool_name: str, input_model: Type[BaseModel], data_files: Iterable[str] = ()):
+    """
+    Cache a read-only tool on (tool, canonicalized validated args, dataset version).
+
+    Calls that do not validate (or use positional payloads) bypass the cache so
+    the tool produces its usual error response. Only successful responses are stored,
+    with the ranked list behind their cursor; every cache hit is issued a new cursor.
+    """
+    data_files = tuple(data_files)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if args:
+                return func(*args, **kwargs)
+
+            merged: Dict[str, Any] = {}
+            payload = kwargs.get("payload")
+            if isinstance(payload, dict):
+                merged.update(payload)
+            merged.update({k: v for k, v in kwargs.items() if k != "payload"})
+
+            try:
+                validated = input_model(**merged)
+            except ValidationError:
+                return func(*args, **kwargs)
+
+            canonical_args = json.dumps(validated.model_dump(), sort_keys=True, default=str)
+            key = (tool_name, canonical_args, dataset_version(*data_files) if data_files else "")
+            computed = []
+
+            def compute():
+                computed.append(True)
+                return _with_cursor_list(func(**validated.model_dump()))
+
+            cached = result_cache.get_or_compute(key, compute, tool_name, data_files, should_cache=_is_success)
+            # The caller that ran the tool already holds a fresh cursor
+            return cached[0] if computed else _replay(cached)
+        return wrapper
+    return decorator
@@ -1,6 +1,9 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, ValidationError
-from tools.utils import load_data, create_response_json, handle_tool_error
+from tools.result_cache import cached_tool
+from tools.utils import create_response_json, handle_tool_error
+from tools.dataset import get_dataset, intersect_positions
+from tools.cursor_cache import cursor_cache, PAGE_SIZE
 
 class SearchFlightsInput(BaseModel):
     origin: str = Field(description="Departure city.")
@@ -13,6 +16,7 @@ class SearchFlightsInput(BaseModel):
     return_date: str = Field(default="", description="Return date for round-trip (YYYY-MM-DD).")
     budget: int = Field(default=0, description="Optional maximum price per ticket.")
 
+@cached_tool("search_flights", SearchFlightsInput, ["flights.json"])
 def search_flights(*args, **kwargs) -> str:
     """
     Search for flights between cities on specific dates (one-way or round-trip).
@@ -69,17 +73,17 @@ def search_flights(*args, **kwargs) -> str:
         
         budget = validated.budget
         
-        all_flights = load_data("flights.json")
+        flights = get_dataset("flights.json")
         
         # --- Helper for filtering ---
         def filter_flights(org, dst, travel_date):
-            # Using startswith to handle "Delhi" match against "Delhi, India"
-            matches = [
-                f for f in all_flights
-                if org.lower() in f.get("origin", "").lower()
-                and dst.lower() in f.get("destination", "").lower()
-                and f.get("date") == travel_date
-            ]
+            # Substring match handles "Delhi" against "Delhi, India"; the date
+            # index narrows the candidates before the city checks.
+            matches = flights.select(intersect_positions(
+                flights.positions_equal("date", travel_date),
+                flights.positions_contains("origin", org),
+                flights.positions_contains("destination", dst),
+            ))
             
             # Additional Country-based matching check if needed (e.g. searching "India" -> "Maldives")
             # But relying on startswith or "in" might be broad. Let's stick to startswith first.
@@ -89,8 +93,9 @@ def search_flights(*args, **kwargs) -> str:
             
             if budget > 0:
                 matches = [f for f in matches if f["price"] <= budget]
-                
-            return matches[:10]
+
+            # Copy so nothing downstream can modify the shared dataset records
+            return [dict(f) for f in matches]
 
         # 1. Outbound Search
         outbound_results = filter_flights(origin, destination, date)
@@ -98,7 +103,7 @@ def search_flights(*args, **kwargs) -> str:
         if not outbound_results:
             return create_response_json(f"No flights found from {origin} to {destination} on {date}.", status=True)
 
-        data_response = {"outbound": outbound_results}
+        ranked_results = {"outbound": outbound_results}
         msg = f"Found {len(outbound_results)} outbound flights."
 
         # 2. Inbound Search (if round-trip)
@@ -110,14 +115,21 @@ def search_flights(*args, **kwargs) -> str:
                 )
             
             inbound_results = filter_flights(destination, origin, return_date)
-            data_response["inbound"] = inbound_results
+            ranked_results["inbound"] = inbound_results
             msg += f" And {len(inbound_results)} return flights."
+
+        # Show the first page; the full ranked lists stay in the cursor cache for "show more"
+        data_response = {name: items[:PAGE_SIZE] for name, items in ranked_results.items()}
+        cursor_id = cursor_cache.store(ranked_results, PAGE_SIZE, {"search_type": "FLIGHT", "label": "flights"})
+        if cursor_id:
+            msg += f" Showing the first {PAGE_SIZE}, ask for more to see the rest."
         
         return create_response_json(
             f"{msg} [View results](http://localhost:3000/view_results?type=flights)",
             status=True,
             data=data_response,
-            search_type="FLIGHT"
+            search_type="FLIGHT",
+            cursor_id=cursor_id
         )
 
     except Exception as ex:
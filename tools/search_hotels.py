@@ -1,6 +1,9 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, ValidationError
-from tools.utils import load_data, create_response_json, handle_tool_error
+from tools.result_cache import cached_tool
+from tools.utils import create_response_json, handle_tool_error
+from tools.dataset import get_dataset
+from tools.cursor_cache import cursor_cache, PAGE_SIZE
 
 class SearchHotelsInput(BaseModel):
     location: str = Field(description="City or area name (e.g., 'Dubai', 'Paris').")
@@ -9,6 +12,7 @@ class SearchHotelsInput(BaseModel):
     guests: int = Field(default=2, description="Number of guests.")
     min_rating: float = Field(default=0.0, description="Minimum hotel rating (0-5).")
 
+@cached_tool("search_hotels", SearchHotelsInput, ["hotels.json"])
 def search_hotels(*args, **kwargs) -> str:
     """
     Search for hotels in a specific location, considering availability on check-in date.
@@ -47,14 +51,14 @@ def search_hotels(*args, **kwargs) -> str:
         budget = validated.budget
         min_rating = validated.min_rating
         
-        all_hotels = load_data("hotels.json")
-        
+        hotels = get_dataset("hotels.json")
+
+        # 1. Location match (fuzzy check on location or name, via the field indexes)
+        candidates = sorted(set(hotels.positions_contains("location", location))
+                            | set(hotels.positions_contains("name", location)))
+
         results = []
-        for hotel in all_hotels:
-            # 1. Location match (fuzzy check)
-            if location.lower() not in hotel["location"].lower() and location.lower() not in hotel.get("name", "").lower():
-                continue
-                
+        for hotel in hotels.select(candidates):
             # 2. Date/Availability check
             price_to_display = hotel.get("price_per_night", 0)
             
@@ -92,14 +96,18 @@ def search_hotels(*args, **kwargs) -> str:
         if not results:
             return create_response_json(f"No hotels found in {location} for {check_in} within constraints.", status=True)
 
-        # Limit to top 10
-        results = results[:10]
+        # First page only; the rest stays in the cursor cache for "show more"
+        cursor_id = cursor_cache.store(results, PAGE_SIZE, {"search_type": "HOTEL", "label": "hotels"})
+        msg = f"Found {len(results)} hotels in {location}."
+        if cursor_id:
+            msg += f" Showing the first {PAGE_SIZE}, ask for more to see the rest."
         
         return create_response_json(
-            f"Found {len(results)} hotels in {location}. [View detailed results](http://localhost:3000/view_results?type=hotels&location={location})",
+            f"{msg} [View detailed results](http://localhost:3000/view_results?type=hotels&location={location})",
             status=True,
-            data=results,
-            search_type="HOTEL"
+            data=results[:PAGE_SIZE],
+            search_type="HOTEL",
+            cursor_id=cursor_id
         )
 
     except Exception as ex:
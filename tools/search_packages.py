@@ -1,6 +1,9 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, ValidationError
-from tools.utils import load_data, create_response_json, handle_tool_error
+from tools.result_cache import cached_tool
+from tools.utils import create_response_json, handle_tool_error
+from tools.dataset import get_dataset, intersect_positions
+from tools.cursor_cache import cursor_cache, PAGE_SIZE
 
 class SearchPackagesInput(BaseModel):
     destination: str = Field(default="", description="Optional destination filter. Leave empty if not specified.")
@@ -8,6 +11,7 @@ class SearchPackagesInput(BaseModel):
     budget: float = Field(default=0.0, description="Optional max budget. Set to 0 if not specified.")
     package_type: str = Field(default="", description="Optional type (e.g. 'Honeymoon', 'Family'). Leave empty if not specified.")
 
+@cached_tool("search_packages", SearchPackagesInput, ["packages.json"])
 def search_packages(*args, **kwargs) -> str:
     """
     Search for travel packages.
@@ -44,23 +48,25 @@ def search_packages(*args, **kwargs) -> str:
         budget = validated.budget
         package_type = validated.package_type
 
-        all_pkgs = load_data("packages.json")
-        results = all_pkgs
-        
+        packages = get_dataset("packages.json")
+        position_filters = []
+
         if destination:
-            results = [p for p in results if destination.lower() in p["destination"].lower()]
-            
+            position_filters.append(packages.positions_contains("destination", destination))
+
         if package_type:
-            results = [p for p in results if package_type.lower() == p["type"].lower()]
-            
+            position_filters.append(packages.positions_equal("type", package_type))
+
+        # Copies, so nothing downstream can modify the shared dataset records
+        if position_filters:
+            results = packages.copies(intersect_positions(*position_filters))
+        else:
+            results = packages.copies()
+
         # Treat 0.0 as "no budget limit"
         if budget > 0:
             results = [p for p in results if p["price"] <= budget]
             
-        # Limit to top 10
-        if len(results) > 10:
-             results = results[:10]
-            
         if not results:
             return create_response_json(
                 "No packages found matching criteria.",
@@ -68,11 +74,18 @@ def search_packages(*args, **kwargs) -> str:
                 data=[]
             )
             
+        # First page only; the rest stays in the cursor cache for "show more"
+        cursor_id = cursor_cache.store(results, PAGE_SIZE, {"search_type": "PACKAGE", "label": "packages"})
+        msg = f"Found {len(results)} packages."
+        if cursor_id:
+            msg += f" Showing the first {PAGE_SIZE}, ask for more to see the rest."
+
         return create_response_json(
-            f"Found {len(results)} packages. [View detailed results](http://localhost:3000/view_results?type=packages&destination={destination})",
+            f"{msg} [View detailed results](http://localhost:3000/view_results?type=packages&destination={destination})",
             status=True,
-            data=results,
-            search_type="PACKAGE"
+            data=results[:PAGE_SIZE],
+            search_type="PACKAGE",
+            cursor_id=cursor_id
         )
 
     except Exception as ex:
@@ -1,6 +1,7 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, ValidationError
 from tools.utils import create_response_json, handle_tool_error
+from tools.result_cache import cached_tool
 
 # --- Input Models ---
 
@@ -45,6 +46,7 @@ def _extract_payload(args, kwargs) -> Dict[str, Any]:
     merged.update(kwargs)
     return merged
 
+@cached_tool("get_cancellation_policy", GetCancellationPolicyInput)
 def get_cancellation_policy(*args, **kwargs) -> str:
     """Get cancellation policy for valid booking types."""
     try:
@@ -115,6 +117,7 @@ def cancel_booking(*args, **kwargs) -> str:
     except Exception as ex:
         return handle_tool_error(ex, "cancel_booking")
 
+@cached_tool("get_baggage_policy", GetBaggagePolicyInput)
 def get_baggage_policy(*args, **kwargs) -> str:
     """Get baggage policy for an airline."""
     try:
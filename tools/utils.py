@@ -25,7 +25,8 @@ def create_response_json(
         error: str = None,
         data: Any = None,
         search_type: str = None,
-        table: bool = False
+        table: bool = False,
+        cursor_id: str = None
 ) -> str:
     """Create standardized JSON response."""
     response = {
@@ -52,6 +53,9 @@ def create_response_json(
     if error:
         response["error"] = error
 
+    if cursor_id:
+        response["cursor_id"] = cursor_id
+
     return json.dumps(response, indent=2)
 
 def handle_tool_error(ex: Exception, tool_name: str) -> str: